@@ -0,0 +1,116 @@
+# Векторная генерация сумм транзакций по категориям
+import numpy as np
+from scipy.stats import truncnorm
+
+from data_generator.rng import get_rng
+
+
+# 1. Векторное случайное округление сумм
+
+def round_amounts(amounts, rate=0.6, rng=None):
+    """
+    Целочисленное округление массива сумм. Векторный аналог amt_rounding.
+    Доля rate сумм не округляется. Остальные округляются вниз до единиц,
+    десятков, сотен или тысяч - с равной вероятностью среди делителей
+    не больше суммы.
+    -------------
+    amounts: np.ndarray. Суммы.
+    rate: float. Доля случаев когда сумма не округляется.
+    rng: np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию.
+    """
+    rng = get_rng(rng)
+    amounts = np.asarray(amounts, dtype=np.float64)
+    keep = rng.random(amounts.shape[0]) < rate
+
+    # Кол-во допустимых делителей из 1, 10, 100, 1000. Хотя бы 1 для сумм меньше 1
+    divs_num = np.clip(np.floor(np.log10(np.maximum(amounts, 1))).astype(np.int64) + 1, 1, 4)
+    dividers = 10.0 ** np.floor(rng.random(amounts.shape[0]) * divs_num)
+
+    return np.where(keep, amounts, amounts // dividers * dividers)
+
+
+# 2. Генератор сумм по категориям
+
+class AmountEngine:
+    """
+    Генерация массивов сумм транзакций по категориям. Параметры распределений
+    категорий хранятся массивами, суммы всех транзакций генерируются одним
+    вызовом: нормальное распределение или обрезанное нормальное, если
+    заданы границы. Затем округление до копеек и случайное целочисленное
+    округление round_amounts.
+    ---------
+    Атрибуты:
+    ---------
+    names: np.ndarray. Названия категорий.
+    positions: dict. Название категории -> позиция в массивах параметров.
+    mean: np.ndarray. Средние сумм категорий.
+    std: np.ndarray. Стандартные отклонения сумм категорий.
+    low: np.ndarray | None. Нижние границы. None - нормальное распределение.
+    high: np.ndarray | None. Верхние границы. None - нормальное распределение.
+    floor: float | None. Минимальная сумма для нормального распределения.
+    rate: float. Доля сумм без целочисленного округления.
+    """
+    def __init__(self, categories, mean_col, std_col, low_col=None, high_col=None, floor=None, rate=0.6):
+        """
+        categories: pd.DataFrame. Категории с параметрами сумм и колонкой category.
+        mean_col: str. Колонка средних.
+        std_col: str. Колонка стандартных отклонений.
+        low_col: str. Колонка нижних границ. Вместе с high_col включает обрезанное нормальное.
+        high_col: str. Колонка верхних границ.
+        floor: float. Минимальная сумма для нормального распределения. None - без ограничения.
+        rate: float. Доля сумм без целочисленного округления.
+        """
+        self.names = categories["category"].to_numpy()
+        self.positions = dict(zip(self.names.tolist(), range(self.names.shape[0])))
+        self.mean = categories[mean_col].to_numpy(dtype=np.float64)
+        self.std = categories[std_col].to_numpy(dtype=np.float64)
+        truncated = low_col is not None and high_col is not None
+        self.low = categories[low_col].to_numpy(dtype=np.float64) if truncated else None
+        self.high = categories[high_col].to_numpy(dtype=np.float64) if truncated else None
+        self.floor = floor
+        self.rate = rate
+
+
+    def index(self, category_names):
+        """
+        Позиции категорий в массивах параметров.
+        ---------------
+        category_names: array-like. Названия категорий.
+        """
+        positions = self.positions
+        return np.array([positions[name] for name in category_names], dtype=np.int64)
+
+
+    def generate(self, cat_idx, rng=None):
+        """
+        Суммы для массива категорий.
+        ---------------
+        cat_idx: np.ndarray. Позиции категорий транзакций.
+        rng: np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию.
+        ---------------
+        Возвращает np.ndarray сумм
+        """
+        rng = get_rng(rng)
+        mean = self.mean[cat_idx]
+        std = self.std[cat_idx]
+
+        if self.low is None:
+            amounts = rng.normal(mean, std)
+            if self.floor is not None:
+                amounts = np.maximum(self.floor, amounts)
+        else:
+            amounts = truncnorm.rvs((self.low[cat_idx] - mean) / std, (self.high[cat_idx] - mean) / std, \
+                                    loc=mean, scale=std, size=mean.shape[0], random_state=rng)
+
+        return round_amounts(np.round(amounts, 2), rate=self.rate, rng=rng)
+
+
+    def amount(self, category_name, rng=None):
+        """
+        Одна сумма для категории.
+        ---------------
+        category_name: str. Название категории.
+        rng: np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию.
+        """
+        cat_idx = np.array([self.positions[category_name]], dtype=np.int64)
+        return float(self.generate(cat_idx=cat_idx, rng=rng)[0])
@@ -2,6 +2,14 @@
 
 import pandas as pd
 from dataclasses import dataclass
+from typing import Union
+
+from data_generator.merchants import MerchantIndex, MerchantBandIndex
+from data_generator.devices import ClientDeviceIndex
+from data_generator.sampler import SamplerRegistry
+from data_generator.amounts import AmountEngine
+from data_generator.distance import DistanceService
+from data_generator.fraud.pools import DrawPool, CityIpPool
 
 # 1. Датакласс под конфиги для легальных транзакций.
 
@@ -16,7 +24,9 @@ class LegitCfg:
                     если применимо, году. Чтобы генерировать первые транзакции.
     transactions: pd.DataFrame. Пустой датафрейм под транзакции.
     client_devices: pd.DataFrame. id и информация о девайсах клиентов.
+    device_index: ClientDeviceIndex. Индекс девайсов клиентов по client_id.
     offline_merchants: pd.DataFrame. Оффлайн мерчанты с их координатами.
+    merchant_index: MerchantIndex. Индекс оффлайн мерчантов по (город, категория).
     categories: pd.DataFrame. Названия категорий и их полные характеристики.
                     Берутся из cat_stats_full.csv.
     online_merchant_ids: pd.Series. id для онлайн мерчантов
@@ -41,6 +51,14 @@ class LegitCfg:
             'legit_'
     directory: str. Путь к отдельной папке под конкретно текущую генерацию.
     txns_file_name: str. Название файла с транзакциями который будет создан.
+    engine: str. Способ генерации: 'batch' - пакетно по клиенту, 'row' - по одной транз-ции.
+    workers: int. Кол-во процессов для генерации. 1 - в одном процессе.
+    seed: int. Seed запуска. Ключ потоков случайных чисел клиентов.
+    samplers: SamplerRegistry. Alias таблицы для семплирования категорий по share
+              и часов по весам времени.
+    amount_engine: AmountEngine. Генератор сумм по категориям: нормальное распределение
+                   с avg_amt, amt_std и минимумом 1.
+    summary_file: str. Название файла сводки по клиентам в папке legit.
     """
     clients: pd.DataFrame
     timestamps: pd.DataFrame
@@ -63,6 +81,14 @@ class LegitCfg:
     prefix: str
     directory: str
     txns_file_name: str
+    engine: str
+    merchant_index: MerchantIndex
+    workers: int
+    seed: int
+    device_index: ClientDeviceIndex
+    samplers: SamplerRegistry
+    amount_engine: AmountEngine
+    summary_file: str
 
 
 # 2. Датакласс под конфиги фрода в покупках, когда аккаунт или карта клиента скомпрометированы
@@ -77,8 +103,10 @@ class ComprClientFraudCfg:
     ---------------------
     clients: pd.DataFrame
     timestamps: pd.DataFrame
-    transactions: pd.DataFrame
+    client_summary: pd.DataFrame. Сводка по клиентам из легальной генерации. Индекс client_id.
+                    Данные последней транзакции клиента: last_unix, last_online, last_lat, last_lon.
     offline_merchants: pd.DataFrame
+    merchant_index: MerchantIndex. Индекс оффлайн мерчантов по (город, категория).
     categories: pd.DataFrame
     online_merchant_ids: pd.Series
     all_time_weights: dict
@@ -101,10 +129,24 @@ class ComprClientFraudCfg:
     run_dir: str. Путь к директории под текущую генерацию.
     directory: str. Путь к отдельной папке под конкретно текущую генерацию.
     txns_file_name: str. Название файла с транзакциями который будет создан.
+    seed: int. Seed запуска. Ключ потоков случайных чисел клиентов.
+    samplers: SamplerRegistry. Alias таблицы для семплирования категорий по fraud_share,
+              правил по weight и часов по весам времени.
+    amount_engine: AmountEngine. Генератор фрод сумм по категориям из fraud_amounts:
+                   обрезанное нормальное распределение.
+    distance: DistanceService. Расчет расстояний между транзакциями. Режим из
+              rules.distance_mode в compr.yaml.
+    ip_pool: CityIpPool. Перемешанные фрод IP разбитые по городам. Выборка без возвращения.
+    device_pool: DrawPool. Перемешанные id фрод девайсов. Выборка без возвращения.
+    engine: str. Способ генерации: 'batch' - массивами группами по правилам, 'row' - по клиенту.
+    other_city_index: MerchantIndex | MerchantBandIndex. Семплирование оффлайн мерчантов
+                      из других городов для fast_geo_change. С весами полос расстояния
+                      если заданы rules.geo_bands в compr.yaml.
+    rule_online: dict. Правило -> онлайн флаг правила из rules.
     """
     clients: pd.DataFrame
     timestamps: pd.DataFrame
-    transactions: pd.DataFrame
+    client_summary: pd.DataFrame
     offline_merchants: pd.DataFrame
     categories: pd.DataFrame
     online_merchant_ids: pd.Series
@@ -123,6 +165,16 @@ class ComprClientFraudCfg:
     run_dir: str
     directory: str
     txns_file_name: str
+    merchant_index: MerchantIndex
+    seed: int
+    samplers: SamplerRegistry
+    amount_engine: AmountEngine
+    distance: DistanceService
+    ip_pool: CityIpPool
+    device_pool: DrawPool
+    engine: str
+    other_city_index: Union[MerchantIndex, MerchantBandIndex]
+    rule_online: dict
 
 
 # 3. Датакласс для конфигов транзакций дропов-распределителей
@@ -138,6 +190,7 @@ class DropDistributorCfg:
     accounts: pd.DataFrame. Номера счетов клиентов.
     outer_accounts: pd.Series. Номера внешних счетов для транзакций вне банка.
     client_devices: pd.DataFrame
+    device_index: ClientDeviceIndex. Индекс девайсов клиентов по client_id.
     online_merchant_ids: pd.Series
     cities: pd.DataFrame
     in_lim: int. лимит входящих транзакций. После его достижения - отклонение всех операций клиента
@@ -179,6 +232,13 @@ class DropDistributorCfg:
     run_dir: str. Название общей папки для хранениявсех файлов текущего
              запуска генерации: легальных, compromised фрода, дроп фрода.
     txns_file_name: str. Название файла с транзакциями который будет создан.
+    seed: int. Seed запуска. Ключ потоков случайных чисел клиентов.
+    outer_pool: DrawPool. Перемешанные внешние счета. Выборка без возвращения.
+    outer_per_drop: int. Макс. кол-во внешних счетов одного дропа: out_lim + attempts["trf_max"] + 1.
+                    Размер части пула внешних счетов дропа.
+    engine: str. Способ генерации: 'lifecycle' - дропы по очереди, 'event' - очередь событий по времени,
+                 'lockstep' - шаг всех дропов разом массивами.
+    workers: int. Кол-во процессов для генерации. 1 - в одном процессе.
     """
     clients: pd.DataFrame
     timestamps: pd.DataFrame
@@ -212,6 +272,12 @@ class DropDistributorCfg:
     run_dir: str
     directory: str
     txns_file_name: str
+    seed: int
+    device_index: ClientDeviceIndex
+    outer_pool: DrawPool
+    outer_per_drop: int
+    engine: str
+    workers: int
 
 
 # 4. Датакласс для конфигов транзакций дропов-покупателей 
@@ -227,6 +293,7 @@ class DropPurchaserCfg:
     accounts: pd.DataFrame. Номера счетов клиентов.
     outer_accounts: pd.Series. Номера внешних счетов для транзакций вне банка.
     client_devices: pd.DataFrame
+    device_index: ClientDeviceIndex. Индекс девайсов клиентов по client_id.
     online_merchant_ids: pd.Series
     categories: pd.DataFrame. Категории специально для дропов покупателей.
     cities: pd.DataFrame
@@ -267,6 +334,11 @@ class DropPurchaserCfg:
     run_dir: str. Название общей папки для хранениявсех файлов текущего
              запуска генерации: легальных, compromised фрода, дроп фрода.
     txns_file_name: str. Название файла с транзакциями который будет создан.
+    seed: int. Seed запуска. Ключ потоков случайных чисел клиентов.
+    samplers: SamplerRegistry. Alias таблица для семплирования категорий по weight.
+    engine: str. Способ генерации: 'lifecycle' - дропы по очереди, 'event' - очередь событий по времени,
+                 'lockstep' - шаг всех дропов разом массивами.
+    workers: int. Кол-во процессов для генерации. 1 - в одном процессе.
     """
     clients: pd.DataFrame
     timestamps: pd.DataFrame
@@ -298,6 +370,8 @@ class DropPurchaserCfg:
     run_dir: str
     directory: str
     txns_file_name: str
-
-
-
+    seed: int
+    device_index: ClientDeviceIndex
+    samplers: SamplerRegistry
+    engine: str
+    workers: int
@@ -0,0 +1,164 @@
+# Общие данные запуска генерации: файлы и производные таблицы читаются один раз на все этапы
+import os
+import pandas as pd
+import geopandas as gpd
+
+from data_generator.general_time import create_timestamps_range_df
+from data_generator.devices import ClientDeviceIndex
+from data_generator.merchants import MerchantIndex
+
+
+class RunDataContext:
+    """
+    Данные одного запуска генерации общие для билдеров конфигов всех этапов.
+    Файл читается один раз и кэшируется по пути, времени изменения и размеру
+    файла. Если файл перезаписан между этапами, например accounts.csv после
+    дропов распределителей, он читается заново.
+    Таблицы отдаются поверхностными копиями: добавление, удаление и замена
+    колонок не меняют кэш. Значения в таблицах менять на месте нельзя.
+    Создается в run_generator.py и передается в раннеры этапов.
+    ---------
+    Атрибуты:
+    ---------
+    files: dict. Абсолютный путь -> ((время изменения, размер), таблица).
+    derived: dict. Ключ -> производная таблица или объект: timestamps, индексы девайсов и мерчантов.
+    reads: int. Кол-во чтений файлов с диска.
+    hits: int. Кол-во запросов отданных из кэша.
+    """
+    def __init__(self):
+        self.files = {}
+        self.derived = {}
+        self.reads = 0
+        self.hits = 0
+
+
+    @staticmethod
+    def file_key(path):
+        """
+        Абсолютный путь и версия файла: время изменения в наносекундах и размер.
+        ---------------
+        path: str. Путь к файлу.
+        """
+        stat = os.stat(path)
+        return os.path.abspath(path), (stat.st_mtime_ns, stat.st_size)
+
+
+    @staticmethod
+    def view(data):
+        """
+        Поверхностная копия таблицы. Данные колонок общие с кэшем.
+        ---------------
+        data: pd.DataFrame | pd.Series | gpd.GeoDataFrame.
+        """
+        if isinstance(data, (pd.DataFrame, pd.Series)):
+            return data.copy(deep=False)
+        return data
+
+
+    def load(self, path):
+        """
+        Прочитать файл по расширению: csv, gpkg или parquet.
+        ---------------
+        path: str. Путь к файлу.
+        """
+        file_type = str(path).split(".")[-1]
+
+        if file_type == "csv":
+            return pd.read_csv(path)
+
+        if file_type == "gpkg":
+            return gpd.read_file(path)
+
+        if file_type == "parquet":
+            return pd.read_parquet(path, engine="pyarrow")
+
+        raise ValueError(f"Unsupported file type '{file_type}': {path}")
+
+
+    def read_file(self, path, file=""):
+        """
+        Таблица из файла. С диска - только при первом запросе или после изменения файла.
+        ---------------
+        path: str. Путь к директории или файлу.
+        file: str. Название файла с расширением в path если path это директория.
+        """
+        if os.path.isdir(path) and file != "":
+            path = os.path.join(path, file)
+
+        abs_path, version = self.file_key(path)
+        cached = self.files.get(abs_path)
+        if cached is not None and cached[0] == version:
+            self.hits += 1
+            return self.view(cached[1])
+
+        data = self.load(path)
+        self.files[abs_path] = (version, data)
+        self.reads += 1
+        return self.view(data)
+
+
+    def read_by_precedence(self, path_01, path_02):
+        """
+        Таблица из файла path_01 если он есть, иначе из path_02.
+        ---------------
+        path_01: str. Путь к файлу у которого приоритет.
+        path_02: str. Путь к альтернативному файлу.
+        """
+        for path in (path_01, path_02):
+            if os.path.exists(path):
+                return self.read_file(path=path)
+
+        raise ValueError(f"""No files in paths: {path_01}
+            or {path_02}""")
+
+
+    def timestamps(self, stamps_cfg):
+        """
+        Диапазон timestamp-ов из create_timestamps_range_df. Создается один раз на настройки.
+        ---------------
+        stamps_cfg: dict. Конфиги генерации timestamps из time.yaml
+        """
+        key = ("timestamps",) + tuple(sorted((k, str(v)) for k, v in stamps_cfg.items()))
+        if key not in self.derived:
+            self.derived[key] = create_timestamps_range_df(stamps_cfg=stamps_cfg)
+        else:
+            self.hits += 1
+        return self.view(self.derived[key])
+
+
+    def build_once(self, name, path, build):
+        """
+        Объект построенный по таблице из файла. Один объект на версию файла.
+        ---------------
+        name: str. Название объекта. Часть ключа кэша.
+        path: str. Путь к файлу с исходной таблицей.
+        build: callable. Построение объекта из таблицы.
+        """
+        abs_path, version = self.file_key(path)
+        key = (name, abs_path, version)
+        if key not in self.derived:
+            self.derived[key] = build(self.read_file(path=path))
+        else:
+            self.hits += 1
+        return self.derived[key]
+
+
+    def device_index(self, path):
+        """
+        ClientDeviceIndex по файлу девайсов клиентов. Индекс только для чтения.
+        ---------------
+        path: str. Путь к файлу девайсов клиентов.
+        """
+        return self.build_once(name="device_index", path=path, \
+                               build=lambda data: ClientDeviceIndex(client_devices=data))
+
+
+    def merchant_index(self, path):
+        """
+        MerchantIndex по файлу оффлайн мерчантов. Кэш границ внутри индекса
+        заполняется по запросам и общий для всех этапов.
+        ---------------
+        path: str. Путь к файлу оффлайн мерчантов.
+        """
+        return self.build_once(name="merchant_index", path=path, \
+                               build=lambda data: MerchantIndex(merchants_df=data))
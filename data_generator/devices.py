@@ -0,0 +1,114 @@
+# Индекс девайсов клиентов для быстрого семплирования по client_id
+import numpy as np
+
+from data_generator.rng import get_rng
+
+
+class ClientDeviceIndex:
+    """
+    Индекс девайсов клиентов в формате CSR: массив device_id отсортированный
+    по клиентам и массив смещений. Девайсы одного клиента лежат в непрерывном
+    диапазоне device_id[offsets[i]:offsets[i + 1]]. Поиск и семплирование
+    девайса клиента за O(1) без фильтрации датафрейма.
+    ---------
+    Атрибуты:
+    ---------
+    client_ids: np.ndarray. Уникальные id клиентов по возрастанию.
+    offsets: np.ndarray. Начала диапазонов клиентов в device_id. Длина на 1 больше
+             кол-ва клиентов. Последний элемент - общее кол-во девайсов.
+    device_id: np.ndarray. id девайсов отсортированные по клиентам.
+    positions: dict. client_id -> позиция клиента в client_ids.
+    """
+    def __init__(self, client_devices):
+        """
+        client_devices: pd.DataFrame. Девайсы клиентов с колонками client_id, device_id.
+        """
+        devices = client_devices.sort_values("client_id", kind="stable")
+        client_col = devices["client_id"].to_numpy(dtype=np.int64)
+
+        self.device_id = devices["device_id"].to_numpy()
+        self.client_ids, starts = np.unique(client_col, return_index=True)
+        self.offsets = np.append(starts, client_col.shape[0]).astype(np.int64)
+        self.positions = dict(zip(self.client_ids.tolist(), range(self.client_ids.shape[0])))
+
+
+    def to_arrays(self):
+        """
+        Массивы индекса для ReferenceStore.
+        ---------------
+        Возвращает (массивы, скалярные параметры)
+        """
+        return {"device_id": self.device_id, "client_ids": self.client_ids, "offsets": self.offsets}, {}
+
+
+    @classmethod
+    def from_arrays(cls, device_id, client_ids, offsets):
+        """
+        Индекс из массивов to_arrays без сортировки датафрейма.
+        Заново строится только словарь positions.
+        ---------------
+        device_id: np.ndarray. id девайсов отсортированные по клиентам.
+        client_ids: np.ndarray. Уникальные id клиентов по возрастанию.
+        offsets: np.ndarray. Начала диапазонов клиентов в device_id.
+        """
+        index = cls.__new__(cls)
+        index.device_id = device_id
+        index.client_ids = client_ids
+        index.offsets = offsets
+        index.positions = dict(zip(client_ids.tolist(), range(client_ids.shape[0])))
+        return index
+
+
+    def bounds(self, client_id):
+        """
+        Диапазон девайсов клиента в device_id.
+        ---------------
+        client_id: int. id клиента.
+        ---------------
+        Возвращает (начало, конец). Если у клиента нет девайсов, то ValueError
+        """
+        pos = self.positions.get(int(client_id))
+        if pos is None:
+            raise ValueError(f"No devices for client_id {client_id}")
+        return int(self.offsets[pos]), int(self.offsets[pos + 1])
+
+
+    def devices(self, client_id):
+        """
+        Все девайсы клиента. Представление массива без копии.
+        ---------------
+        client_id: int. id клиента.
+        """
+        start, end = self.bounds(client_id)
+        return self.device_id[start:end]
+
+
+    def sample(self, client_id, size=None, rng=None):
+        """
+        Случайный девайс клиента. С равной вероятностью.
+        ---------------
+        client_id: int. id клиента.
+        size: int. Кол-во девайсов с повторениями. None - один девайс скаляром.
+        rng: np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию.
+        """
+        start, end = self.bounds(client_id)
+        return self.device_id[get_rng(rng).integers(start, end, size=size)]
+
+
+    def sample_many(self, client_ids, rng=None):
+        """
+        По одному случайному девайсу для каждого client_id массива. С равной вероятностью.
+        ---------------
+        client_ids: np.ndarray. id клиентов, с повторениями.
+        rng: np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию.
+        """
+        client_ids = np.asarray(client_ids, dtype=np.int64)
+        pos = np.searchsorted(self.client_ids, client_ids)
+        found = pos < self.client_ids.shape[0]
+        found[found] = self.client_ids[pos[found]] == client_ids[found]
+        if not found.all():
+            raise ValueError(f"No devices for client_id {client_ids[~found][0]}")
+
+        starts = self.offsets[pos]
+        counts = self.offsets[pos + 1] - starts
+        return self.device_id[starts + (get_rng(rng).random(client_ids.shape[0]) * counts).astype(np.int64)]
@@ -0,0 +1,81 @@
+# Расчет расстояний между координатами транзакций
+import numpy as np
+from pyproj import Geod
+
+
+# Средний радиус Земли в километрах (IUGG)
+EARTH_RADIUS_KM = 6371.0088
+
+
+class DistanceService:
+    """
+    Расстояния между парами координат. Принимает скаляры или массивы
+    одинаковой длины - массивы считаются одним векторным вызовом.
+    Режимы:
+    'geodesic' - геодезический расчёт по эллипсоиду WGS84 через один
+                 общий объект pyproj.Geod.
+    'haversine' - формула гаверсинусов на сфере со средним радиусом Земли.
+                  Быстрее, но погрешность относительно WGS84 до ~0.6% расстояния,
+                  т.е. не больше 6 км на 1000 км. Для проверок порога скорости
+                  fast_geo_change (800 км/ч) этого достаточно.
+    ---------
+    Атрибуты:
+    ---------
+    mode: str. 'geodesic' или 'haversine'.
+    geod: pyproj.Geod. Эллипсоид WGS84. None в режиме 'haversine'.
+    """
+    modes = ("geodesic", "haversine")
+
+    def __init__(self, mode="geodesic"):
+        """
+        mode: str. 'geodesic' или 'haversine'.
+        """
+        if mode not in self.modes:
+            raise ValueError(f"Unknown distance mode '{mode}'. Expected one of {self.modes}")
+        self.mode = mode
+        self.geod = Geod(ellps="WGS84") if mode == "geodesic" else None
+
+
+    def meters(self, lat_01, lon_01, lat_02, lon_02):
+        """
+        Расстояние в метрах без округления.
+        -----------------------------
+        lat_01 - float | np.ndarray. Широта первой точки
+        lon_01 - float | np.ndarray. Долгота первой точки
+        lat_02 - float | np.ndarray. Широта второй точки
+        lon_02 - float | np.ndarray. Долгота второй точки
+        """
+        if self.mode == "geodesic":
+            # [-1] берет последний элемент из кортежа. Это метры
+            return self.geod.inv(lon_01, lat_01, lon_02, lat_02)[-1]
+
+        lat_01, lon_01, lat_02, lon_02 = map(np.radians, (lat_01, lon_01, lat_02, lon_02))
+        hav = np.sin((lat_02 - lat_01) / 2) ** 2 \
+              + np.cos(lat_01) * np.cos(lat_02) * np.sin((lon_02 - lon_01) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * 1000 * np.arcsin(np.sqrt(np.minimum(hav, 1)))
+
+
+    def distance(self, lat_01, lon_01, lat_02, lon_02, km=True):
+        """
+        Расстояние с тем же округлением, что и в calc_distance.
+        -----------------------------
+        lat_01 - float | np.ndarray. Широта первой точки
+        lon_01 - float | np.ndarray. Долгота первой точки
+        lat_02 - float | np.ndarray. Широта второй точки
+        lon_02 - float | np.ndarray. Долгота второй точки
+        km - bool. True - километры с 2 знаками после запятой. False - целые метры
+        -----------------------------
+        Для скаляров возвращает float, для массивов np.ndarray
+        """
+        distance_m = self.meters(lat_01=lat_01, lon_01=lon_01, lat_02=lat_02, lon_02=lon_02)
+
+        if np.ndim(distance_m) == 0:
+            distance_m = float(distance_m)
+            return round(distance_m / 1000, 2) if km else round(distance_m)
+
+        distance_m = np.asarray(distance_m, dtype=np.float64)
+        return np.round(distance_m / 1000, 2) if km else np.round(distance_m).astype(np.int64)
+
+
+# Общий сервис геодезических расстояний. Для calc_distance
+default_distance = DistanceService(mode="geodesic")
@@ -0,0 +1,284 @@
+# Пакетная генерация compromised client фрода массивами NumPy. Правила группами
+import numpy as np
+import pandas as pd
+
+from data_generator.configs import ComprClientFraudCfg
+from data_generator.amounts import round_amounts
+from data_generator.utils import get_values_from_truncnorm
+from data_generator.general_time import timestamps_by_hour
+from data_generator.fraud.compr.time import generate_time_fast_geo_jump, derive_times_from_geo
+from data_generator.rng import get_rng
+
+
+class ComprBatchGenerator:
+    """
+    Генерация фрод транзакций всех compromised клиентов за один вызов.
+    Правила семплируются сразу для всех клиентов, затем клиенты группируются
+    по правилу и категории, суммы, локации и время каждой группы создаются
+    массивами. Серия trans_freq_increase разворачивается в несколько строк,
+    все строки серии кроме первой берут мерчанта, гео, IP и девайс первой.
+    По распределению результат совпадает с построчной генерацией
+    gen_purchase_fraud_txn. Колонки как у build_transaction.
+    ---------
+    Атрибуты:
+    ---------
+    configs: ComprClientFraudCfg. Конфиги и данные для генерации фрод транзакций.
+    rule_online: dict. Правило -> онлайн флаг правила. Из configs.rule_online.
+    cat_names: np.ndarray. Названия категорий.
+    cat_round_clock: np.ndarray. Флаги круглосуточных категорий.
+    online_merchant_ids: np.ndarray. id онлайн мерчантов.
+    stamps_by_hour: dict. Час -> unix время из timestamps в этом часе.
+    freq_cfg: dict. Конфиги правила trans_freq_increase из compr.yaml.
+    threshold: int. Предел скорости перемещения клиента км/ч.
+    """
+    # Правила со сменой гео за короткое время
+    geo_jump_rules = ("fast_geo_change", "fast_geo_change_online")
+    # Правила со временем от последней транзакции с учетом гео
+    geo_lag_rules = ("new_ip_and_device_high_amount", "new_device_and_high_amount", "trans_freq_increase")
+    # Правила с IP в городе клиента
+    same_city_rules = ("new_device_and_high_amount",)
+
+    def __init__(self, configs: ComprClientFraudCfg):
+        """
+        configs: ComprClientFraudCfg. Конфиги и данные для генерации фрод транзакций.
+        """
+        self.configs = configs
+        self.rule_online = configs.rule_online
+        self.cat_names = configs.categories["category"].to_numpy()
+        self.cat_round_clock = configs.categories["round_clock"].to_numpy(dtype=bool)
+        self.online_merchant_ids = configs.online_merchant_ids.to_numpy()
+        self.stamps_by_hour = timestamps_by_hour(configs.timestamps)
+        self.freq_cfg = configs.rules_cfg["freq_txn"]
+        self.threshold = configs.rules_cfg["threshold"]
+
+
+    def expand_rows(self, rules, rng):
+        """
+        Строки транзакций по клиентам. Одна строка на клиента,
+        для trans_freq_increase - серия из случайного кол-ва строк.
+        ---------------
+        rules: np.ndarray. Правила клиентов.
+        rng: np.random.Generator.
+        ---------------
+        Возвращает позиции клиентов строк и номера транзакций в серии.
+        0 - для правил с одной транзакцией, как txn_num в gen_purchase_fraud_txn.
+        """
+        is_freq = rules == "trans_freq_increase"
+        low = self.freq_cfg["txn_num"]["min"]
+        high = self.freq_cfg["txn_num"]["max"]
+
+        counts = np.ones(rules.shape[0], dtype=np.int64)
+        counts[is_freq] = rng.integers(low, high + 1, size=is_freq.sum())
+
+        client_pos = np.repeat(np.arange(rules.shape[0]), counts)
+        # Номер строки внутри серии клиента начиная с 1
+        series_starts = np.repeat(np.cumsum(counts) - counts, counts)
+        txn_num = np.arange(client_pos.shape[0]) - series_starts + 1
+        txn_num[~is_freq[client_pos]] = 0
+
+        return client_pos, txn_num
+
+
+    def sample_categories(self, online, rng):
+        """
+        Категории строк по fraud_share. Онлайн и оффлайн отдельными alias таблицами
+        как в sample_category.
+        ---------------
+        online: np.ndarray. Онлайн флаги строк.
+        rng: np.random.Generator.
+        ---------------
+        Возвращает позиции категорий в categories
+        """
+        samplers = self.configs.samplers
+        cat_idx = np.empty(online.shape[0], dtype=np.int64)
+        cat_idx[online] = samplers.draw(key="fraud_online", size=online.sum(), rng=rng)
+        cat_idx[~online] = samplers.draw(key="fraud_offline", size=(~online).sum(), rng=rng)
+
+        return cat_idx
+
+
+    def amounts(self, cat_names, is_freq, rng):
+        """
+        Суммы строк. Для trans_freq_increase по конфигам правила, для остальных
+        по фрод параметрам категорий.
+        ---------------
+        cat_names: np.ndarray. Названия категорий строк.
+        is_freq: np.ndarray. Флаги строк правила trans_freq_increase.
+        rng: np.random.Generator.
+        """
+        engine = self.configs.amount_engine
+        amount_cfg = self.freq_cfg["amount"]
+        amounts = np.empty(cat_names.shape[0], dtype=np.float64)
+
+        amounts[~is_freq] = engine.generate(cat_idx=engine.index(cat_names[~is_freq]), rng=rng)
+
+        freq_amounts = get_values_from_truncnorm(low_bound=amount_cfg["min"], high_bound=amount_cfg["max"], \
+                                                 mean=amount_cfg["mean"], std=amount_cfg["std"], \
+                                                 size=is_freq.sum(), rng=rng)
+        amounts[is_freq] = round_amounts(np.round(freq_amounts, 2), rate=0.4, rng=rng)
+
+        return amounts
+
+
+    def locations(self, rules, client_cities, cat_names, online, rng):
+        """
+        Мерчант, координаты, город, IP и девайс для строк с новыми данными.
+        Строки серий trans_freq_increase кроме первой сюда не передаются.
+        ---------------
+        rules: np.ndarray. Правила строк.
+        client_cities: np.ndarray. Города клиентов строк.
+        cat_names: np.ndarray. Названия категорий строк.
+        online: np.ndarray. Онлайн флаги строк.
+        rng: np.random.Generator.
+        ---------------
+        Возвращает dict колонок транзакций
+        """
+        configs = self.configs
+        size = rules.shape[0]
+        merchant_id = np.empty(size, dtype=np.float64)
+        trans_lat = np.empty(size, dtype=np.float64)
+        trans_lon = np.empty(size, dtype=np.float64)
+        trans_city = np.empty(size, dtype=object)
+        trans_ip = np.full(size, "not applicable", dtype=object)
+        device_id = np.full(size, np.nan)
+
+        # Оффлайн. Мерчант категории не из города клиента. Группами по (город, категория)
+        offline_pos = np.flatnonzero(~online)
+        pairs = pd.DataFrame({"city": client_cities[offline_pos], "category": cat_names[offline_pos]})
+        for (city, category), group in pairs.groupby(["city", "category"], sort=False).indices.items():
+            positions = offline_pos[group]
+            merchant_id[positions], trans_lat[positions], trans_lon[positions], trans_city[positions] = \
+                configs.other_city_index.sample_other_city(city=city, category=category, \
+                                                           size=positions.shape[0], rng=rng)
+
+        # Онлайн. Случайный онлайн мерчант, неиспользованные IP и девайс
+        online_pos = np.flatnonzero(online)
+        merchant_id[online_pos] = self.online_merchant_ids[rng.integers(0, self.online_merchant_ids.shape[0], \
+                                                                        size=online_pos.shape[0])]
+        device_id[online_pos] = configs.device_pool.take(online_pos.shape[0])
+        # IP без возвращения. Каждая выборка меняет остатки пула, поэтому по одной
+        ip_pool = configs.ip_pool
+        for pos in online_pos.tolist():
+            if rules[pos] in self.same_city_rules:
+                ip_data = ip_pool.same_city(city=client_cities[pos])
+            else:
+                ip_data = ip_pool.another_city(city=client_cities[pos], rng=rng)
+            trans_ip[pos], trans_lat[pos], trans_lon[pos], trans_city[pos] = ip_data
+
+        return {"merchant_id": merchant_id, "trans_city": trans_city, "trans_lat": trans_lat, \
+                "trans_lon": trans_lon, "trans_ip": trans_ip, "device_id": device_id}
+
+
+    def times(self, rules, txn_num, source, last_unix, geo_distance, online, round_clock, rng):
+        """
+        Unix время строк группами по правилам как в get_time_fraud_txn.
+        ---------------
+        rules: np.ndarray. Правила строк.
+        txn_num: np.ndarray. Номера транзакций в серии trans_freq_increase.
+        source: np.ndarray. Позиция первой строки серии для каждой строки. Для одиночных строк - сама строка.
+        last_unix: np.ndarray. Unix время последней легальной транзакции клиента строки.
+        geo_distance: np.ndarray. Расстояние до последней легальной транзакции, км.
+        online: np.ndarray. Онлайн флаги строк.
+        round_clock: np.ndarray. Флаги круглосуточных категорий строк.
+        rng: np.random.Generator.
+        """
+        configs = self.configs
+        unix_time = np.empty(rules.shape[0], dtype=np.int64)
+        is_freq = rules == "trans_freq_increase"
+
+        jump = np.isin(rules, self.geo_jump_rules)
+        unix_time[jump] = generate_time_fast_geo_jump(last_txn_unix=last_unix[jump], \
+                                                      geo_distance=geo_distance[jump], \
+                                                      threshold=self.threshold, rng=rng)
+
+        # Первая транзакция серии trans_freq_increase тоже с лагом от последней легальной
+        lag = np.isin(rules, self.geo_lag_rules) & (~is_freq | (txn_num == 1))
+        unix_time[lag] = derive_times_from_geo(last_txn_unix=last_unix[lag], geo_distance=geo_distance[lag], \
+                                               min=30, max=60, threshold=self.threshold, rng=rng)
+
+        # Остальные транзакции серии. Частые интервалы накопительно от первой транзакции
+        freq_rest = is_freq & (txn_num > 1)
+        time_cfg = self.freq_cfg["time"]
+        steps = np.zeros(rules.shape[0], dtype=np.int64)
+        steps[freq_rest] = rng.integers(time_cfg["freq_low"], time_cfg["freq_high"] + 1, \
+                                        size=freq_rest.sum()) * 60
+        # Сумма интервалов от первой строки серии. У первой строки интервал 0
+        elapsed = np.cumsum(steps)
+        elapsed -= elapsed[source]
+        unix_time[freq_rest] = unix_time[source[freq_rest]] + elapsed[freq_rest]
+
+        # Остальные правила. Час по весам паттерна времени, затем unix время в этом часе
+        other = ~(jump | lag | freq_rest)
+        weights_keys = np.where(online, "Online_Fraud", \
+                                np.where(round_clock, "Offline_24h_Fraud", "Offline_Day_Fraud"))
+        for key in np.unique(weights_keys[other]):
+            positions = np.flatnonzero(other & (weights_keys == key))
+            hours = configs.samplers.draw(key=key, size=positions.shape[0], rng=rng)
+            for hour in np.unique(hours):
+                hour_pos = positions[hours == hour]
+                stamps = self.stamps_by_hour[int(hour)]
+                unix_time[hour_pos] = stamps[rng.integers(0, stamps.shape[0], size=hour_pos.shape[0])]
+
+        return unix_time
+
+
+    def generate(self, rng=None):
+        """
+        Фрод транзакции всех клиентов из configs.clients.
+        ---------------
+        rng: np.random.Generator. Генератор случайных чисел этапа. None - генератор по умолчанию.
+        ---------------
+        Возвращает pd.DataFrame с колонками как у build_transaction
+        """
+        configs = self.configs
+        rng = get_rng(rng)
+        clients = configs.clients
+        client_ids = clients["client_id"].to_numpy()
+
+        # 1. Правила всех клиентов разом и строки транзакций
+        client_rules = np.asarray(configs.samplers.draw(key="rules", size=client_ids.shape[0], rng=rng), \
+                                  dtype=object)
+        client_pos, txn_num = self.expand_rows(rules=client_rules, rng=rng)
+        rules = client_rules[client_pos]
+        is_freq = rules == "trans_freq_increase"
+        online = np.array([self.rule_online[rule] for rule in client_rules], dtype=bool)[client_pos]
+
+        # 2. Категории и суммы
+        cat_idx = self.sample_categories(online=online, rng=rng)
+        cat_names = self.cat_names[cat_idx]
+        amounts = self.amounts(cat_names=cat_names, is_freq=is_freq, rng=rng)
+
+        # 3. Локации. Новые данные только для первых строк клиентов,
+        # остальные строки серии trans_freq_increase берут данные первой
+        first_rows = np.flatnonzero(txn_num <= 1)
+        # Позиция первой строки серии среди first_rows для каждой строки
+        first_pos = np.searchsorted(first_rows, np.arange(rules.shape[0]), side="right") - 1
+        client_cities = clients["city"].to_numpy(dtype=object)[client_pos]
+        location = self.locations(rules=rules[first_rows], client_cities=client_cities[first_rows], \
+                                  cat_names=cat_names[first_rows], online=online[first_rows], rng=rng)
+        location = {col: values[first_pos] for col, values in location.items()}
+
+        # 4. Расстояние до последней легальной транзакции клиента и время
+        last_txns = configs.client_summary.loc[client_ids[client_pos]]
+        last_unix = last_txns["last_unix"].to_numpy(dtype=np.int64)
+        geo_distance = configs.distance.distance(lat_01=last_txns["last_lat"].to_numpy(dtype=np.float64), \
+                                                 lon_01=last_txns["last_lon"].to_numpy(dtype=np.float64), \
+                                                 lat_02=location["trans_lat"], lon_02=location["trans_lon"])
+        unix_time = self.times(rules=rules, txn_num=txn_num, source=first_rows[first_pos], last_unix=last_unix, \
+                               geo_distance=geo_distance, online=online, \
+                               round_clock=self.cat_round_clock[cat_idx], rng=rng)
+
+        # 5. Статусы. В серии trans_freq_increase до freq_min транз-ций - approved и не фрод
+        freq_min = self.freq_cfg["txn_num"]["min"]
+        not_detected = is_freq & (txn_num > 0) & (txn_num < freq_min)
+
+        return pd.DataFrame({
+                    "client_id": client_ids[client_pos], "unix_time": unix_time, "amount": amounts,
+                    "type": "purchase", "channel": np.where(online, "ecom", "POS").astype(object),
+                    "category": cat_names, "online": online, "merchant_id": location["merchant_id"],
+                    "trans_city": location["trans_city"], "trans_lat": location["trans_lat"],
+                    "trans_lon": location["trans_lon"], "trans_ip": location["trans_ip"],
+                    "device_id": location["device_id"], "account": np.nan, "is_fraud": ~not_detected,
+                    "is_suspicious": False, "status": np.where(not_detected, "approved", "declined").astype(object),
+                    "rule": np.where(not_detected, "not applicable", rules).astype(object)
+                    })
@@ -1,11 +1,19 @@
 # Конфиг билдер для compromised client fraud
 
 import pandas as pd
-import geopandas as gpd
+import numpy as np
 import os
 
-from data_generator.general_time import create_timestamps_range_df, get_all_time_patterns
+from data_generator.general_time import get_all_time_patterns
 from data_generator.configs import ComprClientFraudCfg
+from data_generator.merchants import MerchantBandIndex
+from data_generator.sampler import SamplerRegistry
+from data_generator.amounts import AmountEngine
+from data_generator.distance import DistanceService
+from data_generator.fraud.pools import DrawPool, CityIpPool
+from data_generator.rng import resolve_seed, stage_rng
+from data_generator.context import RunDataContext
+from data_generator.parquet_meta import parquet_num_rows
 
 class ComprConfigBuilder:
     """
@@ -20,11 +28,17 @@ class ComprConfigBuilder:
     fraud_cfg: dict. Общие конфиги фрода из fraud.yaml
     compr_cfg: dict. Конфиги для compromised фрода из compr.yaml
     run_dir: str. Путь к директории под текущую генерацию.
+    context: RunDataContext. Общие данные запуска: файлы и таблицы читаются один раз.
     clients: pd.DataFrame. Семпл клиентов для генерации
              транзакций.
+    seed: int. Seed запуска. Из base_cfg["seed"], либо случайный если его нет.
+    rng: np.random.Generator. Генератор этапа. Для выборки клиентов и весов времени.
     """
+    # Способы генерации из compr.yaml
+    engines = ("batch", "row")
+
     def __init__(self, base_cfg: dict, legit_cfg: dict, time_cfg: dict, \
-                 fraud_cfg: dict, compr_cfg: dict, run_dir: str):
+                 fraud_cfg: dict, compr_cfg: dict, run_dir: str, context: RunDataContext = None):
         """
         base_cfg: dict. Общие конфиги из base.yaml
         legit_cfg: dict.
@@ -32,6 +46,7 @@ class ComprConfigBuilder:
         fraud_cfg: dict. Общие конфиги фрода из fraud.yaml
         compr_cfg: dict. Конфиги для compromised фрода из compr.yaml
         run_dir: str. Путь к директории под текущую генерацию.
+        context: RunDataContext. Общие данные запуска. None - свой контекст у билдера.
         """
         self.base_cfg = base_cfg
         self.legit_cfg = legit_cfg
@@ -39,7 +54,10 @@ class ComprConfigBuilder:
         self.fraud_cfg = fraud_cfg
         self.compr_cfg = compr_cfg
         self.run_dir = run_dir
+        self.context = context if context is not None else RunDataContext()
         self.clients = None
+        self.seed = resolve_seed(base_cfg.get("seed"))
+        self.rng = stage_rng(seed=self.seed, stage="compr")
 
 
     def make_dir(self):
@@ -64,21 +82,21 @@ class ComprConfigBuilder:
         path: str. Путь к директории или файлу.
         file: str. Название файла с расширением
               в path если path это директория.
+        Файл читается через self.context - один раз за запуск.
         """
-        if os.path.isdir(path) and file != "":
-            file_type = file.split(".")[-1]
-            path = os.path.join(path, file)
-        if os.path.isfile(path) and file == "":
-            file_type = path.split(".")[-1]
-
-        if file_type == "csv":
-            return pd.read_csv(path)
-        
-        if file_type == "gpkg":
-            return gpd.read_file(path)
-        
-        if file_type == "parquet":
-            return pd.read_parquet(path, engine="pyarrow")
+        return self.context.read_file(path=path, file=file)
+
+
+    def read_client_summary(self):
+        """
+        Прочитать сводку по клиентам из папки legit текущей генерации.
+        Возвращает pd.DataFrame с индексом client_id.
+        """
+        legit_storage = self.legit_cfg["data_storage"]
+        leg_folder = legit_storage["folder_name"]
+        summary_file = legit_storage["files"]["summary"]
+        summary_path = os.path.join(self.run_dir, leg_folder, summary_file)
+        return self.read_file(path=summary_path).set_index("client_id")
 
 
     def estimate_clients_count(self):
@@ -87,16 +105,14 @@ class ComprConfigBuilder:
         """
         fraud_cfg = self.fraud_cfg
         legit_storage = self.legit_cfg["data_storage"]
-        leg_folder = legit_storage["folder_name"]
-        leg_txn_file = legit_storage["files"]["txns"]
-        legit_txns_path = os.path.join(self.run_dir, leg_folder, leg_txn_file)
+        txns_path = os.path.join(self.run_dir, legit_storage["folder_name"], legit_storage["files"]["txns"])
 
         fraud_rate = fraud_cfg["fraud_rates"]["total"] # доля всего фрода от всех транзакций
         compr_share = fraud_cfg["fraud_rates"]["compr_client"] # Доля compromised client фрода
 
         # отсюда посчитаем количество клиентов для дроп фрода с распределением денег
-        legit_txns = self.read_file(path=legit_txns_path)
-        legit_count = legit_txns.shape[0]
+        # Кол-во легальных транзакций из метаданных parquet файла, без чтения данных
+        legit_count = parquet_num_rows(path=txns_path)
         # подсчет количества транзакций равных 1% от всех транзакций
         # т.к. не все транзакции еще созданы, то считаем основываясь на количестве 
         # легальных транзакций и fraud rate
@@ -121,7 +137,7 @@ class ComprConfigBuilder:
         # Будем семплировать из них 
         leg_cl_sample = self.read_file(path=legit_cl_path)
         
-        compr_samp = leg_cl_sample.sample(n=clients_count, replace=False)\
+        compr_samp = leg_cl_sample.sample(n=clients_count, replace=False, random_state=self.rng)\
                                    .reset_index(drop=True)
         self.clients = compr_samp
         return compr_samp
@@ -137,27 +153,52 @@ class ComprConfigBuilder:
         base_cfg = self.base_cfg
         weight_args = self.time_cfg["time_weights_args"]
         compr_cfg = self.compr_cfg
-        legit_storage = self.legit_cfg["data_storage"]
-        leg_folder = legit_storage["folder_name"]
-        leg_txn_file = legit_storage["files"]["txns"]
-        legit_txns_path = os.path.join(self.run_dir, leg_folder, leg_txn_file)
         base_files = base_cfg["data_paths"]["base"]
         base_fraud_files = base_cfg["data_paths"]["base_fraud"]
+        engine = compr_cfg["generation"]["engine"]
+        if engine not in self.engines:
+            raise ValueError(f"Unknown compr engine '{engine}' in compr.yaml. Expected one of {self.engines}")
 
+        client_summary = self.read_client_summary()
         clients = self.get_clients_for_fraud()
-        timestamps = create_timestamps_range_df(stamps_cfg=stamps_cfg)
-        txns = self.read_file(path=legit_txns_path)
+        timestamps = self.context.timestamps(stamps_cfg=stamps_cfg)
         offline_merchants = self.read_file(path=base_files["offline_merchants"])
+        merchant_index = self.context.merchant_index(path=base_files["offline_merchants"])
         categories = self.read_file(path=base_files["cat_stats_full"])
         online_merchant_ids = self.read_file(path=base_files["online_merchant_ids"]) \
                                   .iloc[:,0] # нужны в виде серии
-        all_time_weights = get_all_time_patterns(pattern_args=weight_args)
+        all_time_weights = get_all_time_patterns(pattern_args=weight_args, rng=self.rng)
         rules = self.read_file(path=base_fraud_files["rules"])
         cities = self.read_file(path=base_files["cities"])
         fraud_devices = self.read_file(path=base_fraud_files["fraud_devices"])
         fraud_ips = self.read_file(path=base_fraud_files["fraud_ips"])
+        # Пулы фрод IP и девайсов без возвращения. Перемешиваются один раз на этап
+        ip_pool = CityIpPool(fraud_ips=fraud_ips, rng=self.rng)
+        device_pool = DrawPool(values=fraud_devices.device_id, rng=self.rng)
         fraud_amounts = self.read_file(path=base_fraud_files["cat_fraud_amts"])
+        # Alias таблицы. Категории по fraud_share в тех же сабсетах, что и в sample_category.
+        # Значения - позиции категорий в categories
+        samplers = SamplerRegistry()
+        cat_subsets = {"fraud_online": categories.online == True, \
+                       "fraud_freq": categories.category.isin(["shopping_net", "misc_net"]), \
+                       "fraud_offline": categories.online == False}
+        for key, mask in cat_subsets.items():
+            samplers.add(key=key, weights=categories.fraud_share[mask], values=np.flatnonzero(mask))
+        samplers.add(key="rules", weights=rules.weight, values=rules.rule)
+        # Онлайн флаг правила без фильтрации rules на каждую транзакцию
+        rule_online = dict(zip(rules.rule.tolist(), rules.online.astype(bool).tolist()))
+        samplers.add_time_weights(all_time_weights=all_time_weights)
+        # Фрод суммы по категориям из обрезанного нормального распределения
+        amount_engine = AmountEngine(categories=fraud_amounts, mean_col="fraud_mean", std_col="fraud_std", \
+                                     low_col="fraud_low", high_col="fraud_high", rate=0.5)
         rules_cfg = compr_cfg["rules"]
+        distance = DistanceService(mode=rules_cfg["distance_mode"])
+        # Мерчанты других городов. С весами полос расстояния если они заданы
+        if rules_cfg.get("geo_bands") is None:
+            other_city_index = merchant_index
+        else:
+            other_city_index = MerchantBandIndex(merchant_index=merchant_index, bands=rules_cfg["geo_bands"], \
+                                                 distance=distance)
         data_paths = base_cfg["data_paths"]
         dir_category = compr_cfg["data_storage"]["category"]
         folder_name = compr_cfg["data_storage"]["folder_name"]
@@ -169,14 +210,17 @@ class ComprConfigBuilder:
         
 
         return ComprClientFraudCfg(
-                        clients=clients, timestamps=timestamps, transactions=txns, \
+                        clients=clients, timestamps=timestamps, client_summary=client_summary, \
                         offline_merchants=offline_merchants, categories=categories, rules=rules, \
                         online_merchant_ids=online_merchant_ids, all_time_weights=all_time_weights, \
                         cities=cities, fraud_devices=fraud_devices, fraud_ips=fraud_ips, \
                         fraud_amounts=fraud_amounts, rules_cfg=rules_cfg, data_paths=data_paths, \
                         dir_category=dir_category, folder_name=folder_name, key_latest=key_latest, \
                         key_history=key_history, run_dir=run_dir, directory=directory, \
-                        txns_file_name=txns_file_name
+                        txns_file_name=txns_file_name, merchant_index=merchant_index, \
+                        seed=self.seed, samplers=samplers, amount_engine=amount_engine, \
+                        distance=distance, ip_pool=ip_pool, device_pool=device_pool, \
+                        engine=engine, other_city_index=other_city_index, rule_online=rule_online
                         )
     
 
@@ -3,24 +3,27 @@
 import pandas as pd
 import numpy as np
 
-from data_generator.general_time import pd_timestamp_to_unix
 from data_generator.fraud.time import derive_from_last_time
+from data_generator.utils import get_values_from_truncnorm
+from data_generator.rng import get_rng
 
 
 # 1. Подфункция генерации времени для фрод кейсов `fast_geo_change` и `fast_geo_change_online`
 
-def generate_time_fast_geo_jump(last_txn_unix, geo_distance, threshold=800):
+def generate_time_fast_geo_jump(last_txn_unix, geo_distance, threshold=800, rng=None):
         """
         Генерация времени с коротким интервалом от предыдущей транзакции, для имитации быстрой смены геопозиции
         ---------------------------------------------------------------------
-        last_txn_unix - время последней транзакции в unix формате в секундах.
+        last_txn_unix - время последней транзакции в unix формате в секундах. int или np.ndarray.
         geo_distance - кратчайшая дистанция между точками координат последней и текущей транзакции - в километрах.
+                       float или np.ndarray той же длины что и last_txn_unix - тогда время считается векторно.
                        Точки между координатами берутся при генерации транзакции. Домашний город клиента и любой другой город, кроме домашнего.
         threshold - порог скорости перемещения между точками в км/ч. Все что быстрее - фрод.
                     Это нужно чтобы генерировать соответствующее время в зависимости от дистанции между точками транзакций.
                     Быстрая скорость - маленькое время между транзакциями в плане возможностей перемещения на расстояние.
+        rng - np.random.Generator. Генератор случайных чисел клиента. None - генератор по умолчанию.
         ---------------------------------------------------------------------
-        Возвращает pd.Timestamp и unix время в секундах.
+        Возвращает unix время в секундах. int для скаляров, np.ndarray int64 для массивов.
         """
 
         # Случайно сгенерированная фактическая скорость превышающая легитимный порог. Допустим от 801 до 36000 км/ч
@@ -29,45 +32,45 @@ def generate_time_fast_geo_jump(last_txn_unix, geo_distance, threshold=800):
         # но в зависимости от расстояния мы берем разные границы для распределений, чтобы не было перекоса в очень быстрое время. 
         # Также 20 минут я случайно взял как средний интервал для подобной фрод транзакции.
         # Конечно же "скорость перемещения" может быть и больше в реальной жизни
-        
-        if geo_distance < 1000:
-            fact_speed = np.random.uniform(threshold + 1, 3000)
-        elif geo_distance >= 1000 and geo_distance <= 3000:
-            fact_speed = np.random.uniform(threshold + 1, 9000)
-        elif geo_distance > 3000 and geo_distance <= 6000:
-            fact_speed = np.random.uniform(threshold + 1, 18000)
-        else:
-            fact_speed = np.random.uniform(threshold + 1, 36000)
+        rng = get_rng(rng)
+        geo_distance = np.asarray(geo_distance, dtype=np.float64)
+
+        # Верхняя граница скорости по дистанции: до 1000 км, 1000-3000, 3000-6000, больше 6000
+        speed_high = np.select([geo_distance < 1000, geo_distance <= 3000, geo_distance <= 6000], \
+                               [3000, 9000, 18000], default=36000)
+        fact_speed = rng.uniform(threshold + 1, speed_high)
         
         # Делим полученную скорость на 3.6 для перевода в м/с - для расчета времени в секундах
         # т.к. будет добавлять к unix времени предыдущей транзакции
-        fact_speed /= 3.6
+        fact_speed = fact_speed / 3.6
 
         # переводим дистанцию в метры
         geo_distance = geo_distance * 1000
     
         # интервал времени между последней транзакцией и текущей фрод транзакцией в секундах
         time_interval = geo_distance / fact_speed
-        
-        txn_unix = round(last_txn_unix + time_interval)
-        txn_time = pd.to_datetime(txn_unix, unit="s")
+        txn_unix = np.round(last_txn_unix + time_interval)
 
-        return txn_time, txn_unix
+        if txn_unix.ndim == 0:
+            return int(txn_unix)
+        
+        return txn_unix.astype(np.int64)
 
 
 # 2. Подфункция генерации времени транзакции для правила `trans_freq_increase`
 # - несколько частых транзакций подряд
 
-def gen_time_for_frequent_trans(last_txn_unix, configs, test=False):
+def gen_time_for_frequent_trans(last_txn_unix, configs, test=False, rng=None):
     """
     Функция для имитации времени нескольких частых транзакций подряд.
     -------------------------------------------------
     last_txn_unix - unix время последней транзакции в секундах
     test - True или False. Тестируем мы функцию или нет.
+    rng - np.random.Generator. Генератор случайных чисел клиента. None - генератор по умолчанию.
     --------------------------------------------------
-    При test == False возвращает pd.Timestamp и unix time в секундах
-    При test == True возвращает pd.Timestamp, unix time в секундах и получившуюся разницу времени
-    с предыдущей транзакцией в минутах в виде int
+    При test == False возвращает unix time в секундах
+    При test == True возвращает unix time в секундах и получившуюся разницу времени
+    с предыдущей транзакцией в секундах в виде int
     """
     # мин. разрыв между транз-циями, минут
     freq_low = configs.rules_cfg["freq_txn"]["time"]["freq_low"]
@@ -76,26 +79,25 @@ def gen_time_for_frequent_trans(last_txn_unix, configs, test=False):
 
     # Случайная разница во времени в пределах взятой частоты транзакций. 
     # Выразим в секундах для удобства расчетов
-    freq = np.random.randint(freq_low, freq_high + 1) * 60
+    freq = int(get_rng(rng).integers(freq_low, freq_high + 1)) * 60
     # Прибавляем ко времени предыдущей транзакции
     txn_unix = last_txn_unix + freq
-    txn_time = pd.to_datetime(txn_unix, unit="s")
 
     if not test:
-        return txn_time, txn_unix
+        return txn_unix
     
-    return txn_time, txn_unix, freq
+    return txn_unix, freq
 
 
 # 3. Конечная функция генерации времени
 
-def get_time_fraud_txn(trans_df, configs, online, round_clock, rule=None, \
-                       geo_distance=None, lag=None):
+def get_time_fraud_txn(history, configs, online, round_clock, rule=None, \
+                       geo_distance=None, lag=None, rng=None):
     """
     Создать время для генерируемой compromised client fraud транзакции
     ---------------------------------------
-    trans_df: pd.DataFrame. Транзакции текущего клиента. Откуда брать 
-              информацию по предыдущим транзакциям клиента.
+    history: ClientTxnHistory. История транзакций текущего клиента. Откуда брать 
+             информацию по предыдущим транзакциям клиента.
     configs: ComprClientFraudCfg. Конфиги и данные для генерации фрод 
              транзакци в категории compromised client fraud.
     online: bool. Онлайн или оффлайн покупка. True or False
@@ -107,16 +109,18 @@ def get_time_fraud_txn(trans_df, configs, online, round_clock, rule=None, \
          увеличения частоты транзакций. Это задержка именно между последней легитимной 
          транзакцией и серией частых фрод транзакций. Подразумевается что функция
          get_time_fraud_txn будет использована в цикле, и для первой итерации lag будет True.
+    rng: np.random.Generator. Генератор случайных чисел клиента. None - генератор по умолчанию.
     ---------------------------------------------
-    Возвращает время для генерируемой транзакции в виде pd.Timestamp и в виде unix времени
+    Возвращает unix время генерируемой транзакции в секундах
     """
     # Предел скорости перемещения клиента между транз-циями км/ч, включительно
     threshold = configs.rules_cfg["threshold"]
-    all_time_weights = configs.all_time_weights
+    samplers = configs.samplers
     timestamps = configs.timestamps
+    rng = get_rng(rng)
     
     # Время последней транзакции клиента unix, в секундах
-    last_txn_unix = trans_df.unix_time.max()
+    last_txn_unix = history.last_unix
 
     # 1. Offline_24h_Fraud - круглосуточные оффлайн покупки
     if not online and round_clock:
@@ -130,33 +134,88 @@ def get_time_fraud_txn(trans_df, configs, online, round_clock, rule=None, \
     elif not online and not round_clock:
         weights_key = "Offline_Day_Fraud"
     
-    time_weights = all_time_weights[weights_key]["weights"]
 
     # Правила: другая гео за короткое время либо по локации оффлайн мерчанта либо по новому ip адресу
     if rule in ["fast_geo_change", "fast_geo_change_online"]:
         return generate_time_fast_geo_jump(last_txn_unix=last_txn_unix, geo_distance=geo_distance, \
-                                           threshold=threshold)
+                                           threshold=threshold, rng=rng)
     
     # Если это не первая фрод транзакция в серии частых транзакций для правила trans_freq_increase
     # Для первой транзакции в серии (lag==True) время будет создано прибавлением интервала к последней транзакции клиента
     elif rule == "trans_freq_increase" and not lag:
-        return gen_time_for_frequent_trans(last_txn_unix=last_txn_unix, configs=configs)
+        return gen_time_for_frequent_trans(last_txn_unix=last_txn_unix, configs=configs, rng=rng)
     
     # Генерация времени на основе времени предыдущей транзакции, но с учетом гео.
     # Обеспечивает НЕпопадание под правила резкой смены гео.
     elif rule in ["new_ip_and_device_high_amount", "new_device_and_high_amount", "trans_freq_increase"]:
         # Случайный lag_interval от 30 до 60 минут для случаев где дистанция 0
         return derive_from_last_time(last_txn_unix=last_txn_unix, lag_interval=0, min=30, max=60, \
-                                     random_lag=True, geo_distance=geo_distance, threshold=threshold)
+                                     random_lag=True, geo_distance=geo_distance, threshold=threshold, \
+                                     rng=rng)
         
     # Время для остальных правил. Просто семплирование времени в соответсвии с весами
-    # берем случайный час передав веса часов для соответсвующейго временного паттерна
-    txn_hour = time_weights.hours.sample(n=1, weights=time_weights.proportion, replace=True).iloc[0]
+    # берем случайный час из alias таблицы соответсвующейго временного паттерна
+    txn_hour = samplers.draw(key=weights_key, rng=rng)
     
-    # фильтруем по этому часу timestamp-ы и семплируем timestamp уже с равной вероятностью
-    # Дальше будем обрабатывать этот timestamp в некоторых случаях
-    timestamps_subset = timestamps.loc[timestamps.hour == txn_hour]
-    timestamp_sample = timestamps_subset.sample(n=1, replace=True)
-    txn_time = timestamp_sample.timestamp.iloc[0]
+    # фильтруем по этому часу unix время timestamp-ов и семплируем его уже с равной вероятностью
+    unix_subset = timestamps.unix_time[timestamps.hour == txn_hour]
     
-    return txn_time, pd_timestamp_to_unix(txn_time)
+    return int(unix_subset.sample(n=1, replace=True, random_state=rng).iloc[0])
+
+
+# 4. Векторное время от последней транзакции с учетом гео. Для пакетной генерации
+
+def derive_times_from_geo(last_txn_unix, geo_distance, min=30, max=60, threshold=800, rng=None):
+    """
+    Векторный аналог derive_from_last_time со случайным лагом и гео дистанцией.
+    Время прибавляется к последней транзакции так, чтобы скорость перемещения
+    не превышала threshold и транзакции не попадали под правила резкой смены гео.
+    ---------------
+    last_txn_unix - np.ndarray. Unix время последних транзакций в секундах.
+    geo_distance - np.ndarray. Расстояния до последних транзакций в километрах.
+    min - int. Минуты. Минимальный случайный лаг для нулевой дистанции.
+    max - int. Минуты. Максимальный случайный лаг, не включается.
+    threshold - int. Максимальная допустимая скорость перемещения км/ч.
+    rng - np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию.
+    ---------------
+    Возвращает np.ndarray int64 с unix временем в секундах
+    """
+    rng = get_rng(rng)
+    last_txn_unix = np.asarray(last_txn_unix, dtype=np.int64)
+    geo_distance = np.asarray(geo_distance, dtype=np.float64)
+    size = geo_distance.shape[0]
+
+    # Случайный лаг используется там где дистанция 0
+    lag_interval = rng.integers(min, max, size=size) * 60
+
+    # Скорости для ближних и дальних перемещений как в derive_from_last_time
+    near_speed = get_values_from_truncnorm(low_bound=50, high_bound=120, mean=90, std=20, \
+                                           size=size, rng=rng).astype("int")
+    far_speed = get_values_from_truncnorm(low_bound=50, high_bound=threshold, mean=300, std=200, \
+                                          size=size, rng=rng).astype("int")
+    speed = np.where(geo_distance <= 500, near_speed, far_speed)
+    geo_lag = np.round(geo_distance / speed * 3600)
+
+    moved = (geo_distance > 0) & ~np.isnan(geo_distance)
+    return last_txn_unix + np.where(moved, geo_lag, lag_interval).astype(np.int64)
+
+
+# 5. Время всей серии частых транзакций для правила `trans_freq_increase`
+
+def gen_burst_times(first_unix, txns_total, configs, rng=None):
+    """
+    Время серии частых транзакций разом. Интервалы между соседними транзакциями
+    из freq_low..freq_high минут, как в gen_time_for_frequent_trans, время -
+    накопленная сумма интервалов от первой транзакции.
+    -------------------------------------------------
+    first_unix - int. Unix время первой транзакции серии в секундах.
+    txns_total - int. Кол-во транзакций в серии.
+    configs - ComprClientFraudCfg. Конфиги с rules_cfg.
+    rng - np.random.Generator. Генератор случайных чисел клиента. None - генератор по умолчанию.
+    --------------------------------------------------
+    Возвращает np.ndarray int64 с unix временем транзакций серии
+    """
+    time_cfg = configs.rules_cfg["freq_txn"]["time"]
+    steps = get_rng(rng).integers(time_cfg["freq_low"], time_cfg["freq_high"] + 1, size=txns_total - 1) * 60
+
+    return first_unix + np.concatenate(([0], np.cumsum(steps))).astype(np.int64)
@@ -5,6 +5,8 @@ import numpy as np
 
 from data_generator.utils import get_values_from_truncnorm, amt_rounding
 from data_generator.configs import ComprClientFraudCfg
+from data_generator.amounts import round_amounts
+from data_generator.rng import get_rng
     
 
 # 1.
@@ -17,29 +19,29 @@ class FraudTxnPartData:
     ------------------
     Атрибуты:
     --------
-    merchants_df - pd.DataFrame. Оффлайн мерчанты
+    other_city_index - MerchantIndex | MerchantBandIndex. Семплирование оффлайн мерчантов
+                       из других городов
     client_info - pd.DataFrame или namedtuple. Запись с информацией о клиенте
     online_merchant_ids- pd.Series. id онлайн мерчантов
-    fraud_ips - pd.DataFrame. ip для фрода с гео информацией
-    used_ips - pd.Series. Сюда записывать ip адреса использованные для фрода.
-    fraud_devices - pd.DataFrame. девайсы для фрода: платформа, id устройства.
-    used_devices - pd.Series. Сюда записывать id девайсов использованные для фрода.
+    ip_pool - CityIpPool. Неиспользованные ip для фрода с гео информацией, по городам.
+    device_pool - DrawPool. Неиспользованные id девайсов для фрода.
     last_txn - tuple. Предыдущая транзакция. Записывается при использовании некоторых 
                методов (пока только для freq_trans)
+    rng - np.random.Generator. Генератор случайных чисел текущего клиента.
+          None - генератор по умолчанию.
     """
     def __init__(self, configs: ComprClientFraudCfg):
         """
         configs: ComprClientFraudCfg. Содержит параметры и конфиги
                  для генерации транз-ций.
         """
-        self.merchants_df = configs.offline_merchants
+        self.other_city_index = configs.other_city_index
         self.client_info = None
         self.online_merchant_ids = configs.online_merchant_ids
-        self.fraud_ips = configs.fraud_ips
-        self.used_ips = pd.Series(name="ip_address")
-        self.fraud_devices = configs.fraud_devices
-        self.used_devices = pd.Series(name="device_id")
+        self.ip_pool = configs.ip_pool
+        self.device_pool = configs.device_pool
         self.last_txn = None
+        self.rng = None
     
     
     def another_city(self, online, category_name):
@@ -53,39 +55,26 @@ class FraudTxnPartData:
         category_name - str.
         """
         client_city = self.client_info.city
+        rng = get_rng(self.rng)
 
         if online:
-            merchant_id = self.online_merchant_ids.sample(n=1).iat[0]
+            merchant_id = self.online_merchant_ids.sample(n=1, random_state=rng).iat[0]
             
-            # Семпл IP которого нет в used_ips и который IP другого города
-            fraud_ips = self.fraud_ips.loc[~self.fraud_ips.fraud_ip.isin(self.used_ips)]
-            fraud_ip = fraud_ips.loc[fraud_ips["city"] != client_city].sample(1)
-            # Координаты города и название по IP адресу
-            trans_lat = fraud_ip.lat.iloc[0]
-            trans_lon = fraud_ip.lon.iloc[0]
-            trans_ip = fraud_ip.fraud_ip.iloc[0]
-            trans_city = fraud_ip["city"].iloc[0]
+            # Неиспользованный IP другого города. Вместе с координатами и названием города.
+            # Взятый из пула IP считается использованным
+            trans_ip, trans_lat, trans_lon, trans_city = self.ip_pool.another_city(city=client_city, rng=rng)
             channel = "ecom"
             
-            # Семпл девайса которого нет в used_devices
-            devices = self.fraud_devices.loc[~self.fraud_devices.device_id.isin(self.used_devices), \
-                                             "device_id"]
-            device_id = devices.sample(1).iloc[0]
-            
-            # Записываем IP и device_id как использованные
-            self.used_ips.loc[self.used_ips.shape[0]] = trans_ip
-            self.used_devices.loc[self.used_devices.shape[0]] = device_id
+            # Неиспользованный девайс
+            device_id = self.device_pool.pop()
 
         else:
             # Семплируется мерчант не из города клиента
-            merchants = self.merchants_df.loc[self.merchants_df["city"] != client_city]
-            merchant = merchants.loc[merchants.category == category_name].sample(1)
             # Берется его id, и координаты, как координаты транзакции
-            merchant_id = merchant["merchant_id"].iloc[0]
-            trans_lat = merchant["merchant_lat"].iloc[0]
-            trans_lon = merchant["merchant_lon"].iloc[0]
+            merchant_id, trans_lat, trans_lon, trans_city = \
+                    self.other_city_index.sample_other_city(city=client_city, category=category_name, \
+                                                            rng=rng)
             trans_ip = "not applicable"
-            trans_city = merchant["city"].iloc[0]
             device_id = np.nan
             channel = "POS"
 
@@ -102,32 +91,20 @@ class FraudTxnPartData:
         another_city - bool. Должен ли IP быть отличного от клиентского города.
         """
         client_city = self.client_info.city
+        rng = get_rng(self.rng)
 
-        merchant_id = self.online_merchant_ids.sample(n=1).iat[0]
+        merchant_id = self.online_merchant_ids.sample(n=1, random_state=rng).iat[0]
 
         # IP адрес другого города и остальная информация
         if another_city:
             return self.another_city(online=online, category_name=category_name)
             
         # Другой IP адрес, но город клиента - для new_device_and_high_amount
-        fraud_ips = self.fraud_ips.loc[~self.fraud_ips.fraud_ip.isin(self.used_ips)]
-        fraud_ip = fraud_ips.loc[fraud_ips["city"] == client_city].sample(1)
-        
-        # Координаты города и название по IP адресу
-        trans_lat = fraud_ip.lat.iloc[0]
-        trans_lon = fraud_ip.lon.iloc[0]
-        trans_ip = fraud_ip.fraud_ip.iloc[0]
-        trans_city = fraud_ip["city"].iloc[0]
-
-        # Записываем IP как использованный
-        self.used_ips.loc[self.used_ips.shape[0]] = trans_ip
-        
-        # Семпл девайса которого нет в used_devices
-        devices = self.fraud_devices.loc[~self.fraud_devices.device_id.isin(self.used_devices), "device_id"]
-        device_id = devices.sample(1).iloc[0]
+        # Неиспользованный IP вместе с координатами и названием города
+        trans_ip, trans_lat, trans_lon, trans_city = self.ip_pool.same_city(city=client_city)
         
-        # Записываем device_id как использованный
-        self.used_devices.loc[self.used_devices.shape[0]] = device_id
+        # Неиспользованный девайс
+        device_id = self.device_pool.pop()
 
         channel = "ecom"
         txn_type = "purchase"
@@ -146,16 +123,16 @@ class FraudTxnPartData:
 
     def reset_used(self, used_ips=False, used_devices=False):
         """
-        Сброс кэша использованных ip и/или девайсов
+        Сброс пулов использованных ip и/или девайсов. Все значения снова неиспользованные.
         Можно выбрать одно или оба сразу.
         ----------
         used_ips - bool
         used_devices - bool
         """
         if used_ips:
-            self.used_ips = pd.Series(name="ip_address")
+            self.ip_pool.reset()
         if used_devices:
-            self.used_devices = pd.Series(name="device_id")
+            self.device_pool.reset()
 
 
     def get_data(self, rule, online, category_name, txn_num):
@@ -205,7 +182,10 @@ class TransAmount:
     Генерация суммы транзакции для compromised client
     фрода.
     ------------------
-    categories: pd.DataFrame с категориями и характеристиками их сумм.
+    amount_engine: AmountEngine. Генератор фрод сумм по категориям.
+    freq_txn: dict. Конфиги сумм и времени для правила trans_freq_increase.
+    rng: np.random.Generator. Генератор случайных чисел текущего клиента.
+         None - генератор по умолчанию.
     """
 
     def __init__(self, configs):
@@ -213,24 +193,17 @@ class TransAmount:
         configs: ComprClientFraudCfg. Конфиги и данные для генерации 
                  фрод транзакци в категории compromised client fraud.
         """
-        self.categories = configs.fraud_amounts
+        self.amount_engine = configs.amount_engine
         self.freq_txn = configs.rules_cfg["freq_txn"]
+        self.rng = None
         
 
     def fraud_amount(self, category_name):
         """
         Фрод транзакции. Генерация суммы с выставленными минимумом, максимумом, средним и отклонением
         """
-        category = self.categories[self.categories.category == category_name]
-        low = category.fraud_low
-        high = category.fraud_high
-        mean = category.fraud_mean
-        std = category.fraud_std
-
-        # Генерация числа и случайное округление
-        amount =  round(get_values_from_truncnorm(low_bound=low, high_bound=high, \
-                                         mean=mean, std=std)[0], 2)
-        return amt_rounding(amount, rate=0.5)
+        # Обрезанное нормальное по параметрам категории и случайное округление
+        return self.amount_engine.amount(category_name=category_name, rng=self.rng)
 
 
     def freq_trans_amount(self):
@@ -244,30 +217,22 @@ class TransAmount:
         
         # Генерация числа и случайное округление
         amount =  round(get_values_from_truncnorm(low_bound=low, high_bound=high, \
-                                         mean=mean, std=std)[0], 2)
-        return amt_rounding(amount, rate=0.4)
-    
+                                         mean=mean, std=std, rng=self.rng)[0], 2)
+        return amt_rounding(amount, rate=0.4, rng=self.rng)
 
-# 3.
 
-def sample_category(categories, online=None, is_fraud=None, rule=None):
-    """
-    categories - pd.DataFrame с категориями и их характеристиками
-    online - bool. Онлайн или оффлайн категория нужна
-    is_fraud - bool. Фрод или не фрод. От этого зависит вероятность категории.
-    """
-
-    if is_fraud and online and rule != "trans_freq_increase":
-        online_categories = categories.loc[categories.online == True]
-        cat_sample = online_categories.sample(1, weights=online_categories.fraud_share)
-        return cat_sample
-
-    elif is_fraud and online and rule == "trans_freq_increase":
-        chosen_categories = categories.loc[categories.category.isin(["shopping_net", "misc_net"])]
-        cat_sample = chosen_categories.sample(1, weights=chosen_categories.fraud_share)
-        return cat_sample
+    def freq_burst_amounts(self, size):
+        """
+        Суммы всей серии транзакций правила trans_freq_increase разом.
+        Векторный аналог freq_trans_amount.
+        ---------
+        size: int. Кол-во транзакций в серии.
+        """
+        low = self.freq_txn["amount"]["min"]
+        high = self.freq_txn["amount"]["max"]
+        mean = self.freq_txn["amount"]["mean"]
+        std = self.freq_txn["amount"]["std"]
 
-    elif is_fraud and not online:
-        offline_categories = categories.loc[categories.online == False]
-        cat_sample = offline_categories.sample(1, weights=offline_categories.fraud_share)
-        return cat_sample
+        amounts = np.round(get_values_from_truncnorm(low_bound=low, high_bound=high, mean=mean, std=std, \
+                                                     size=size, rng=self.rng), 2)
+        return round_amounts(amounts, rate=0.4, rng=self.rng)
@@ -4,48 +4,51 @@
 import pandas as pd
 import numpy as np
 
-from data_generator.utils import sample_category, build_transaction, \
-                                 calc_distance, sample_rule
+from data_generator.utils import sample_category, build_transaction, sample_rule
 from data_generator.configs import ComprClientFraudCfg
 from data_generator.fraud.compr.txndata import FraudTxnPartData, TransAmount
-from data_generator.fraud.compr.time import get_time_fraud_txn
+from data_generator.fraud.compr.time import get_time_fraud_txn, gen_burst_times
 from data_generator.fraud.recorder import FraudTxnsRecorder
+from data_generator.history import ClientTxnHistory
+from data_generator.fraud.compr.batch import ComprBatchGenerator
+from data_generator.rng import client_rng, batch_rng
 
 
 # 1. Функция генерации одной фрод транзакции с типом "purchase"
 
-def gen_purchase_fraud_txn(rule, client_trans_df, configs: ComprClientFraudCfg, \
+def gen_purchase_fraud_txn(rule, history: ClientTxnHistory, configs: ComprClientFraudCfg, \
                            part_data: FraudTxnPartData, fraud_amts: TransAmount, \
-                           txn_num=0, lag=False):
+                           txn_num=0, lag=False, rng=None):
     """
     Генерация одной compromised client фрод транзакции для клиента.
     ------------------------------------------------
     rule - str.
-    client_trans_df - датафрейм с транзакциями клиента.
+    history - ClientTxnHistory. История транзакций клиента.
     configs - ComprClientFraudCfg. Конфиги и данные для генерации фрод транзакций.
-    client_device_ids - pd.Series. id девайсов клиента.
     part_data - FraudTxnPartData.
     fraud_amts - TransAmount class.
     txn_num - int. Какая по счету транзакция в данном фрод кейсе.
     lag - bool. Нужен ли лаг по времени от последней легальной транзакции.
           Используется для trans_freq_increase
+    rng - np.random.Generator. Генератор случайных чисел клиента. None - генератор по умолчанию.
     -------------------------------------------------
     Возвращает словарь с готовой транзакцией
     """
     client_info = part_data.client_info
     rules_cfg = configs.rules_cfg
     
-    # Запись о последней транзакции клиента
-    last_txn = client_trans_df.loc[client_trans_df.unix_time == client_trans_df.unix_time.max()]
+    # Данные последней транзакции клиента
+    last_txn = history.last_txn()
     
     # Записываем данные клиента в переменные
     client_id = client_info.client_id
 
     # Берем значение online флага для выбранного правила
-    online = configs.rules.loc[configs.rules.rule == rule, "online"].iat[0]
+    online = configs.rule_online[rule]
     
     # Семплирование категории. У категорий свой вес в разрезе вероятности быть фродом
-    category = sample_category(configs.categories, online=online, is_fraud=True)
+    category = sample_category(configs.categories, samplers=configs.samplers, online=online, \
+                               is_fraud=True, rng=rng)
     
     category_name = category["category"].iat[0]
     round_clock = category["round_clock"].iat[0]
@@ -63,12 +66,12 @@ def gen_purchase_fraud_txn(rule, client_trans_df, configs: ComprClientFraudCfg,
     merchant_id, trans_lat, trans_lon, trans_ip, trans_city, device_id, channel, txn_type = partial_data
     
     # Физическое расстояние между координатами последней транзакции и координатами текущей.
-    geo_distance = calc_distance(lat_01=last_txn.trans_lat.iat[0], lon_01=last_txn.trans_lon.iat[0], \
-                                 lat_02=trans_lat, lon_02=trans_lon)
+    geo_distance = configs.distance.distance(lat_01=last_txn["trans_lat"], lon_01=last_txn["trans_lon"], \
+                                             lat_02=trans_lat, lon_02=trans_lon)
     
-    txn_time, txn_unix = get_time_fraud_txn(trans_df=client_trans_df, configs=configs, online=online, \
+    txn_unix = get_time_fraud_txn(history=history, configs=configs, online=online, \
                                             round_clock=round_clock, rule=rule, geo_distance=geo_distance, \
-                                            lag=lag)
+                                            lag=lag, rng=rng)
     # Только для freq_trans статус может отличаться от declined и is_fraud быть False для части транз-ций
     # При кол-ве до freq_min - approved и False. Условно, детект по этому правилу начинается
     # с freq_min транз-ций
@@ -93,45 +96,73 @@ def gen_purchase_fraud_txn(rule, client_trans_df, configs: ComprClientFraudCfg,
     account = np.nan
     
     # Возвращаем словарь со всеми данными сгенерированной транзакции
-    return build_transaction(client_id=client_id, txn_time=txn_time, txn_unix=txn_unix, amount=amount, \
+    return build_transaction(client_id=client_id, txn_unix=txn_unix, amount=amount, \
                              txn_type=txn_type,  channel=channel, category_name=category_name, online=online, \
                              merchant_id=merchant_id, trans_city=trans_city, trans_lat=trans_lat, \
                              trans_lon=trans_lon, trans_ip=trans_ip, device_id=device_id, account=account, \
                              is_fraud=is_fraud, is_suspicious=is_suspicious, status=status, rule=rule_to_txn)
 
 
-# 2. Обертка для gen_purchase_fraud_txn под правило trans_freq_increase
+# 2. Серия частых транзакций под правило trans_freq_increase
 
-def trans_freq_wrapper(client_txns_temp, txns_total, configs: ComprClientFraudCfg, \
-                       part_data: FraudTxnPartData, fraud_amts: TransAmount):
+def gen_freq_burst(history, txns_total, configs: ComprClientFraudCfg, \
+                   part_data: FraudTxnPartData, fraud_amts: TransAmount, rng=None):
     """
-    Генерирует указанное число частых фрод транзакций под правило trans_freq_increase
+    Генерирует всю серию частых фрод транзакций под правило trans_freq_increase разом.
+    Мерчант, гео, IP и девайс создаются один раз и общие для всей серии.
+    Категории и суммы семплируются массивами. Время первой транзакции - с лагом
+    от последней транзакции клиента, остальных - накопленные частые интервалы.
+    Статусы по позиции в серии: до freq_min транз-ций - approved и не фрод.
     -----------------------------
-    Возвращает pd.DataFrame с фрод транзакциями
+    Возвращает pd.DataFrame с фрод транзакциями. Колонки как у build_transaction
     -----------------------------
-    client_info - namedtuple. Запись из датафрейма с информацией о клиенте, полученная при 
-                  итерировании при помощи .itertuples()
-    client_txns_temp - pd.DataFrame. Запись о последней транзакции клиента.
+    history - ClientTxnHistory. История транзакций клиента. Пополняется созданными
+              фрод транзакциями.
     txns_total - int. Сколько транзакций должно быть сгенерировано.
     configs - ComprClientFraudCfg. Конфиги для транзакций.
     part_data: FraudTxnPartData. Генератор части данных транзакций.
     fraud_amts: TransAmount. Генератор сумм транзакций.
-    all_time_weights - dict. Датафреймы с весами времени для всех временных паттернов.
+    rng - np.random.Generator. Генератор случайных чисел клиента. None - генератор по умолчанию.
     """
-    for txn_num in range(1, txns_total + 1):
-        if txn_num == 1:
-            lag = True
-        else:
-            lag = False
-
-        one_txn = gen_purchase_fraud_txn(rule="trans_freq_increase", client_trans_df=client_txns_temp, \
-                                         configs=configs, part_data=part_data, fraud_amts=fraud_amts, \
-                                         txn_num=txn_num, lag=lag)
-        
-        client_txns_temp = pd.concat([client_txns_temp, pd.DataFrame([one_txn])])
-
-    # Исключаем последню легальную транзакцию для добавления сгенеренных фрод транзакций в общий список
-    return client_txns_temp.loc[client_txns_temp.unix_time != client_txns_temp.unix_time.min()]
+    rule = "trans_freq_increase"
+    categories = configs.categories
+    freq_min = configs.rules_cfg["freq_txn"]["txn_num"]["min"]
+    last_txn = history.last_txn()
+
+    # Категории всех транзакций серии по fraud_share онлайн категорий
+    cat_idx = configs.samplers.draw(key="fraud_online", size=txns_total, rng=rng)
+    cat_names = categories["category"].to_numpy()[cat_idx]
+    round_clock = categories["round_clock"].to_numpy()[cat_idx]
+    amounts = fraud_amts.freq_burst_amounts(size=txns_total)
+
+    # Мерчант, гео, IP и девайс общие для всей серии
+    merchant_id, trans_lat, trans_lon, trans_ip, trans_city, device_id, channel, txn_type = \
+        part_data.freq_trans(category_name=cat_names[0], another_city=True)
+
+    # Время первой транзакции с лагом от последней транзакции клиента с учетом гео
+    geo_distance = configs.distance.distance(lat_01=last_txn["trans_lat"], lon_01=last_txn["trans_lon"], \
+                                             lat_02=trans_lat, lon_02=trans_lon)
+    first_unix = get_time_fraud_txn(history=history, configs=configs, online=True, round_clock=round_clock[0], \
+                                    rule=rule, geo_distance=geo_distance, lag=True, rng=rng)
+    unix_time = gen_burst_times(first_unix=first_unix, txns_total=txns_total, configs=configs, rng=rng)
+
+    # Условно детект по этому правилу начинается с freq_min транз-ций
+    detected = np.arange(1, txns_total + 1) >= freq_min
+
+    burst = pd.DataFrame({
+                "client_id": part_data.client_info.client_id, "unix_time": unix_time, "amount": amounts,
+                "type": txn_type, "channel": channel, "category": cat_names, "online": True,
+                "merchant_id": merchant_id, "trans_city": trans_city, "trans_lat": trans_lat,
+                "trans_lon": trans_lon, "trans_ip": trans_ip, "device_id": device_id, "account": np.nan,
+                "is_fraud": detected, "is_suspicious": False,
+                "status": np.where(detected, "declined", "approved").astype(object),
+                "rule": np.where(detected, rule, "not applicable").astype(object)
+                })
+
+    for txn in burst.to_dict("records"):
+        history.append(txn)
+
+    return burst
 
 
 # 3. Функция генерации нескольких фрод транзакций
@@ -146,29 +177,41 @@ def gen_multi_fraud_txns(configs: ComprClientFraudCfg, part_data: FraudTxnPartDa
     fraud_amts: TransAmount. Генератор сумм транзакций.
     txn_recorder: FraudTxnsRecorder. 
     """
+    # Пакетная генерация. Все клиенты разом группами по правилам, один поток случайных чисел этапа
+    if configs.engine == "batch":
+        batch_gen = ComprBatchGenerator(configs=configs)
+        txn_recorder.all_txns = batch_gen.generate(rng=batch_rng(seed=configs.seed, stage="compr"))
+        txn_recorder.write_to_file()
+        return
+
     all_fraud_txns = []
     # Конфиги кол-ва транз. для правила trans_freq_increase
     freq_cfg = configs.rules_cfg["freq_txn"]["txn_num"]
 
     for client in configs.clients.itertuples():
-        rule = sample_rule(configs.rules)
-
-        client_txns = configs.transactions.loc[configs.transactions.client_id == client.client_id]
+        # Свой поток случайных чисел у каждого клиента. Его же используют
+        # генераторы части данных и сумм транзакций
+        rng = client_rng(seed=configs.seed, stage="compr", client_id=client.client_id, buffered=True)
+        part_data.rng = rng
+        fraud_amts.rng = rng
+        rule = sample_rule(configs.samplers, rng=rng)
+
+        # Фрод транзакции опираются только на последнюю транзакцию клиента. Берем её из сводки
+        history = ClientTxnHistory.from_summary(summary_row=configs.client_summary.loc[client.client_id], \
+                                                client_id=client.client_id)
         # Записываем данные текущего клиента в атрибут client_info класса FraudTxnPartData
         part_data.client_info = client
         
         # Это правило отдельно т.к. такой случай имеет несколько транз-ций
         if rule == "trans_freq_increase":
-            client_txns_temp = client_txns.loc[[client_txns.unix_time.idxmax()]]
             # Сколько транз. будет создано под это правило
             low = freq_cfg["min"]
             high = freq_cfg["max"]
-            txns_total = np.random.randint(low, high + 1) 
+            txns_total = int(rng.integers(low, high + 1))
 
-            # Генерируем txns_total число фрод транзакций. Датафрейм с ними записываем в переменную
-            fraud_only = trans_freq_wrapper(client_txns_temp=client_txns_temp, \
-                                            txns_total=txns_total, configs=configs, \
-                                            part_data=part_data, fraud_amts=fraud_amts)
+            # Генерируем серию из txns_total фрод транзакций. Датафрейм с ними записываем в переменную
+            fraud_only = gen_freq_burst(history=history, txns_total=txns_total, configs=configs, \
+                                        part_data=part_data, fraud_amts=fraud_amts, rng=rng)
             
             # Добавляем созданные транзакции в общий список и сразу переводим цикл на следующую итерацию
             all_fraud_txns.append(fraud_only)
@@ -176,9 +219,9 @@ def gen_multi_fraud_txns(configs: ComprClientFraudCfg, part_data: FraudTxnPartDa
 
         # Остальные правила. Генерация одной транз-ции
         else:
-            one_txn = gen_purchase_fraud_txn(rule=rule, client_trans_df=client_txns, \
+            one_txn = gen_purchase_fraud_txn(rule=rule, history=history, \
                                              configs=configs, part_data=part_data, \
-                                             fraud_amts=fraud_amts)
+                                             fraud_amts=fraud_amts, rng=rng)
             
             all_fraud_txns.append(pd.DataFrame([one_txn]))
 
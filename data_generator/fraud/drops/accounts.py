@@ -0,0 +1,214 @@
+# Реестр счетов клиентов с индексом по client_id и набором счетов дропов
+
+import numpy as np
+
+from data_generator.rng import get_rng
+
+
+class AccountRegistry:
+    """
+    Счета клиентов с доступом по client_id за O(1) вместо фильтрации датафрейма.
+    Счета текущих дропов хранятся отдельным списком, который пополняется
+    при пометке клиента дропом. Случайный счет дропа кроме своего - за O(1).
+    Дропов этапа можно заранее поставить в расписание. Тогда дроп становится
+    доступным для переводов при своей пометке вместе со всеми дропами до него
+    в расписании - как при генерации по порядку, даже если дропы до него
+    генерируются в других процессах. Если в расписании указано время начала
+    дропов, то при переводе в момент времени доступны дропы начавшие активность
+    к этому моменту - независимо от порядка генерации.
+    ---------
+    Атрибуты:
+    ---------
+    accounts: pd.DataFrame. Исходная таблица счетов. Колонки: |client_id|account_id|is_drop|
+    positions: dict. client_id -> позиция строки в accounts.
+    account_ids: np.ndarray. Номера счетов по позициям строк.
+    is_drop: np.ndarray. Флаги дропов по позициям строк.
+    drop_accounts: list. Номера счетов дропов в порядке пометки или расписания.
+    drop_slots: dict. client_id дропа -> позиция его счета в drop_accounts.
+    visible: int. Кол-во первых счетов в drop_accounts доступных для переводов.
+    starts: np.ndarray. Время начала дропов расписания по возрастанию. Unix время.
+            None - расписание без времени.
+    starts_base: int. Позиция первого счета расписания со временем в drop_accounts.
+    """
+    def __init__(self, accounts):
+        """
+        accounts: pd.DataFrame. Счета клиентов. Колонки: |client_id|account_id|is_drop|
+        """
+        self.accounts = accounts
+        self.positions = dict(zip(accounts["client_id"].tolist(), range(accounts.shape[0])))
+        self.account_ids = accounts["account_id"].to_numpy().copy()
+        self.is_drop = accounts["is_drop"].to_numpy(dtype=bool).copy()
+
+        # Дропы прошлых этапов в порядке строк таблицы
+        drop_pos = np.flatnonzero(self.is_drop)
+        self.drop_accounts = self.account_ids[drop_pos].tolist()
+        client_ids = accounts["client_id"].to_numpy()
+        self.drop_slots = dict(zip(client_ids[drop_pos].tolist(), range(drop_pos.shape[0])))
+        self.visible = len(self.drop_accounts)
+        self.starts = None
+        self.starts_base = 0
+
+
+    def position(self, client_id):
+        """
+        Позиция строки клиента в accounts.
+        ---------------
+        client_id: int. id клиента.
+        """
+        pos = self.positions.get(client_id)
+        if pos is None:
+            raise KeyError(f"No account for client_id {client_id}")
+        return pos
+
+
+    def positions_of(self, client_ids):
+        """
+        Позиции строк клиентов в accounts массивом.
+        ---------------
+        client_ids: array-like. id клиентов.
+        """
+        return np.fromiter((self.position(client_id) for client_id in client_ids), dtype=np.int64)
+
+
+    def slots_of(self, client_ids):
+        """
+        Позиции счетов клиентов в drop_accounts массивом. -1 если клиент не дроп и не в расписании.
+        ---------------
+        client_ids: array-like. id клиентов.
+        """
+        return np.fromiter((self.drop_slots.get(client_id, -1) for client_id in client_ids), dtype=np.int64)
+
+
+    def account(self, client_id):
+        """
+        Номер счета клиента.
+        ---------------
+        client_id: int. id клиента.
+        """
+        return self.account_ids[self.position(client_id)]
+
+
+    def schedule(self, client_ids, starts=None):
+        """
+        Поставить будущих дропов в расписание в порядке генерации. Их счета
+        добавляются в drop_accounts, но недоступны для переводов до пометки.
+        ---------------
+        client_ids: array-like. id клиентов в порядке генерации.
+        starts: array-like. Время начала дропов в том же порядке, по возрастанию. Unix время.
+                Дроп доступен для переводов с этого времени. None - доступен с пометки.
+        """
+        if starts is not None:
+            starts = np.asarray(starts, dtype=np.int64)
+            if self.starts is not None or any(client_id in self.drop_slots for client_id in client_ids):
+                raise ValueError("Timed schedule must be the only schedule and contain new drops only")
+            if starts.shape[0] != len(client_ids) or np.any(np.diff(starts) < 0):
+                raise ValueError("Drop starts must match client_ids and be sorted ascending")
+            self.starts = starts
+            self.starts_base = len(self.drop_accounts)
+
+        for client_id in client_ids:
+            if client_id in self.drop_slots:
+                continue
+            self.drop_slots[client_id] = len(self.drop_accounts)
+            self.drop_accounts.append(self.account(client_id))
+
+
+    def label_drop(self, client_id):
+        """
+        Пометить клиента как дропа. Его счет добавляется в счета дропов.
+        Если клиент в расписании - доступными становятся все счета до его счета включительно.
+        ---------------
+        client_id: int. id клиента.
+        """
+        pos = self.position(client_id)
+        self.is_drop[pos] = True
+
+        slot = self.drop_slots.get(client_id)
+        if slot is None:
+            slot = len(self.drop_accounts)
+            self.drop_slots[client_id] = slot
+            self.drop_accounts.append(self.account_ids[pos])
+        self.visible = max(self.visible, slot + 1)
+
+
+    def visible_at(self, at=None):
+        """
+        Кол-во первых счетов в drop_accounts доступных для переводов.
+        ---------------
+        at: int. Unix время перевода. Учитывается если в расписании есть время начала дропов.
+        """
+        if at is None or self.starts is None:
+            return self.visible
+        started = int(np.searchsorted(self.starts, at, side="right"))
+        return max(self.visible, self.starts_base + started)
+
+
+    def drops_count(self, exclude=None, at=None):
+        """
+        Кол-во счетов дропов доступных для переводов.
+        ---------------
+        exclude: int. client_id дропа, чей счет не считать. Обычно текущий дроп.
+        at: int. Unix время перевода. None - без учета времени.
+        """
+        visible = self.visible_at(at=at)
+        own_slot = self.drop_slots.get(exclude)
+        return visible - (own_slot is not None and own_slot < visible)
+
+
+    def sample_drop_account(self, exclude=None, rng=None, at=None):
+        """
+        Случайный доступный счет дропа с равной вероятностью, кроме счета указанного клиента.
+        Позиция своего счета пропускается сдвигом, без фильтрации.
+        ---------------
+        exclude: int. client_id дропа, чей счет исключить. Обычно текущий дроп.
+        rng: np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию.
+        at: int. Unix время перевода. None - без учета времени.
+        """
+        available = self.drops_count(exclude=exclude, at=at)
+        if available <= 0:
+            raise ValueError(f"No drop accounts available except client_id {exclude}")
+
+        i = int(get_rng(rng).integers(0, available))
+        own_slot = self.drop_slots.get(exclude)
+        if own_slot is not None and i >= own_slot:
+            i += 1
+        return self.drop_accounts[i]
+
+
+    def sample_drop_accounts(self, own_slots, at, rng=None, min_drops=1):
+        """
+        sample_drop_account для массива переводов разом. Для каждого перевода
+        случайный доступный к его времени счет дропа кроме своего.
+        ---------------
+        own_slots: np.ndarray. Позиции своих счетов в drop_accounts, см. slots_of. -1 - нет своего.
+        at: np.ndarray. Unix время переводов.
+        rng: np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию.
+        min_drops: int. Мин. кол-во доступных счетов дропов. Если меньше - счета нет.
+        ---------------
+        Возвращает (номера счетов, маска переводов со счетом дропа)
+        """
+        at = np.asarray(at, dtype=np.int64)
+        visible = np.full(at.shape[0], self.visible, dtype=np.int64)
+        if self.starts is not None:
+            visible = np.maximum(visible, self.starts_base + np.searchsorted(self.starts, at, side="right"))
+        own = (own_slots >= 0) & (own_slots < visible)
+        available = visible - own
+        has_drop = available >= max(min_drops, 1)
+
+        i = (get_rng(rng).random(at.shape[0]) * available).astype(np.int64)
+        # Свой счет пропускается сдвигом, как в sample_drop_account
+        i += own & (i >= own_slots)
+        accounts = np.zeros(at.shape[0], dtype=self.account_ids.dtype)
+        if has_drop.any():
+            drop_accounts = np.asarray(self.drop_accounts, dtype=self.account_ids.dtype)
+            accounts[has_drop] = drop_accounts[i[has_drop]]
+        return accounts, has_drop
+
+
+    def to_frame(self):
+        """
+        Таблица счетов с текущими флагами дропов. Для записи в accounts.csv.
+        """
+        accounts = self.accounts.copy()
+        accounts["is_drop"] = self.is_drop
+        return accounts
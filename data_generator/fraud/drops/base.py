@@ -1,12 +1,13 @@
 # Основной инструментарий для дропов
 
 
-import pandas as pd
 import numpy as np
 from typing import Union
 
 from data_generator.utils import get_values_from_truncnorm
 from data_generator.configs import DropDistributorCfg, DropPurchaserCfg
+from data_generator.fraud.drops.accounts import AccountRegistry
+from data_generator.rng import get_rng
 
     
 # 1. Управление счетами для переводов.
@@ -21,45 +22,51 @@ class DropAccountHandler:
     configs: DropDistributorCfg | DropPurchaserCfg.
              Данные для создания транзакций: отсюда берем номера 
              счетов клиентов и внешних счетов.
-    accounts: pd.DataFrame. Счета клиентов. Колонки: |client_id|account_id|is_drop|
-    outer_accounts: pd.Series. Номера внешних счетов - вне нашего банка.
-                     Атрибут только для DropDistributorCfg
+    registry: AccountRegistry. Счета клиентов по client_id и счета дропов.
+    accounts: pd.DataFrame. Свойство. Счета клиентов с текущими флагами дропов.
+              Колонки: |client_id|account_id|is_drop|
+    outer_pool: DrawPool. Неиспользованные номера внешних счетов - вне нашего банка.
+                Атрибут только для DropDistributorCfg
     min_drops: int. Минимальное число дропов в accounts для возможности отправки
                переводов другим дропам. Атрибут только для DropDistributorCfg
     client_id: int. id текущего дропа. По умолчанию 0.
     account: int. Номер счета текущего дропа. По умолчанию 0.
-    used_accounts: pd.Series. Счета на которые дропы уже отправляли деньги.
-                    По умолчанию пустая. name="account_id"
+    rng: np.random.Generator. Генератор случайных чисел текущего дропа.
+         По умолчанию None - генератор по умолчанию.
     """
 
-    def __init__(self, configs: Union[DropDistributorCfg, DropPurchaserCfg]):
+    def __init__(self, configs: Union[DropDistributorCfg, DropPurchaserCfg], registry=None):
         """
         configs: DropDistributorCfg | DropPurchaserCfg.
                  Данные для создания транзакций: отсюда берем номера 
                  счетов клиентов и внешних счетов.
+        registry: AccountRegistry. Общий реестр счетов нескольких обработчиков.
+                  None - свой реестр из configs.accounts.
         """
         self.configs = configs
-        self.accounts = configs.accounts.copy()
+        self.registry = registry if registry is not None else AccountRegistry(accounts=configs.accounts)
         if isinstance(configs, DropDistributorCfg):
-            self.outer_accounts = configs.outer_accounts.copy()
+            self.outer_pool = configs.outer_pool
             self.min_drops = configs.to_drops["min_drops"]
         self.client_id = 0
         self.account = 0
-        self.used_accounts = pd.Series(name="account_id")
+        self.rng = None
         
 
-    def get_account(self, own=False, to_drop=False):
+    def get_account(self, own=False, to_drop=False, txn_unix=None):
         """
         Номер счета входящего/исходящего перевода
         ---------------------
         own - bool. Записать номер своего счета в self.account
         to_drop - bool. Перевод другому дропу в нашем банке или нет.
+        txn_unix - int. Время перевода. Для выбора дропов начавших активность к этому времени,
+                   если в реестре расписание со временем. None - без учета времени.
         """
         assert self.client_id != 0, \
             f"client_id is not passed. client_id is {self.client_id}"
 
         if own:
-            self.account = self.accounts.loc[self.accounts.client_id == self.client_id, "account_id"].iat[0]
+            self.account = self.registry.account(client_id=self.client_id)
             return
 
         assert isinstance(self.configs, DropDistributorCfg), \
@@ -67,43 +74,40 @@ class DropAccountHandler:
             But {type(self.configs)} was passed"""
         # Если отправляем/получаем из другого банка.  
         if not to_drop:
-            # Семплируем номер внешнего счета который еще не использовался
-            account = self.outer_accounts.loc[~(self.outer_accounts.isin(self.used_accounts))].sample(1).iat[0]
-            # Добавляем этот счет в использованные как последнюю запись в серии
-            self.used_accounts.loc[self.used_accounts.shape[0]] = account
-            return account
+            # Номер внешнего счета который еще не использовался. Взятый из пула считается использованным
+            return self.outer_pool.pop()
         
         # Если надо отправить другому дропу в нашем банке. При условии что есть другие дропы на текущий момент
-        # Фильтруем accounts исключая свой счет и выбирая дропов. Для случая если to_drop
-        drop_accounts = self.accounts.loc[(self.accounts.client_id != self.client_id) \
-                                          & (self.accounts.is_drop == True)]
-        
-        # Если счетов дропов ещё нет или меньше лимита. Берем внешний неиспользованный счет
-        if drop_accounts.shape[0] < self.min_drops:
-            account = self.outer_accounts.loc[~(self.outer_accounts.isin(self.used_accounts))].sample(1).iat[0]
-            self.used_accounts.loc[self.used_accounts.shape[0]] = account
-            return account
+        # Если счетов других дропов ещё нет или меньше лимита. Берем внешний неиспользованный счет
+        if self.registry.drops_count(exclude=self.client_id, at=txn_unix) < self.min_drops:
+            return self.outer_pool.pop()
 
-        # Дропы есть
-        account = drop_accounts.account_id.sample(1).iat[0]
-        # Добавляем этот счет в использованные как последнюю запись в серии
-        self.used_accounts.loc[self.used_accounts.shape[0]] = account
-        return account
+        # Дропы есть. Случайный счет другого дропа
+        return self.registry.sample_drop_account(exclude=self.client_id, rng=self.rng, at=txn_unix)
 
 
     def label_drop(self):
         """
         Обозначить клиента как дропа в self.accounts
         """
-        self.accounts.loc[self.accounts.client_id == self.client_id, "is_drop"] = True
+        self.registry.label_drop(client_id=self.client_id)
+
+
+    @property
+    def accounts(self):
+        """
+        Счета клиентов с текущими флагами дропов. Колонки: |client_id|account_id|is_drop|
+        """
+        return self.registry.to_frame()
 
 
     def reset_cache(self):
         """
         Сброс кэшированных значений.
-        Это только использованные номера счетов
+        Это только использованные номера внешних счетов - все снова неиспользованные
         """
-        self.used_accounts = pd.Series(name="account_id")
+        if isinstance(self.configs, DropDistributorCfg):
+            self.outer_pool.reset()
 
 
 # 2. Управление балансом и суммами транзакций дропа
@@ -144,6 +148,8 @@ class DropAmountHandler:
         mean: int
         std: int
     round: int. Округление целой части сумм транзакций. Напр. 500 значит что суммы будут кратны 500 - кончаться на 500 или 000                  
+    rng: np.random.Generator. Генератор случайных чисел текущего дропа.
+         По умолчанию None - генератор по умолчанию.
     """
 
     def __init__(self, configs: DropDistributorCfg | DropPurchaserCfg):
@@ -162,6 +168,7 @@ class DropAmountHandler:
         self.reduce_share = configs.reduce_share
         self.inbound_amt = configs.inbound_amt.copy()
         self.round = configs.round
+        self.rng = None
 
 
     def update_balance(self, amount, receive=False, declined=False):
@@ -195,7 +202,8 @@ class DropAmountHandler:
         std = self.inbound_amt["std"]
 
         # Генерация суммы. Округление целой части при необходимости
-        amount = get_values_from_truncnorm(low_bound=low, high_bound=high, mean=mean, std=std)[0] // self.round * self.round
+        amount = get_values_from_truncnorm(low_bound=low, high_bound=high, mean=mean, std=std, \
+                                           rng=self.rng)[0] // self.round * self.round
         
         # Обновляем баланс если транзакция не отклонена
         self.update_balance(amount=amount, receive=True, declined=declined)
@@ -211,7 +219,7 @@ class DropAmountHandler:
         """
         low = self.chunks["atm_share"]["min"]
         high = self.chunks["atm_share"]["max"]
-        return np.random.uniform(low, high)
+        return get_rng(self.rng).uniform(low, high)
 
 
     def handle_atm(self):
@@ -250,7 +258,7 @@ class DropAmountHandler:
         # Если это не первая транзакция в серии транзакции для одной полученной дропом суммы
         # И случайное число больше rand_rate, то просто возвращаем ранее созданный размер чанка
         rand_rate = self.chunks["rand_rate"]
-        if self.batch_txns != 0 and np.random.uniform(0,1) > rand_rate:
+        if self.batch_txns != 0 and get_rng(self.rng).uniform(0,1) > rand_rate:
             return self.chunk_size
 
         # Если снятие
@@ -287,7 +295,7 @@ class DropAmountHandler:
         # и не учитывать исключение значения stop в np.arange
         sampling_array = np.arange(low, high + step, step)
         # Если чанк больше бал
-        self.chunk_size = np.random.choice(sampling_array)
+        self.chunk_size = get_rng(self.rng).choice(sampling_array)
         return self.chunk_size
 
 
@@ -1,9 +1,9 @@
 # Управление поведением дропов
 
-import numpy as np
 
 from data_generator.configs import DropDistributorCfg, DropPurchaserCfg
 from data_generator.fraud.drops.base import DropAmountHandler
+from data_generator.rng import get_rng
 
 
 # 1. Управление поведением дропа распределителя
@@ -28,6 +28,8 @@ class DistBehaviorHandler:
     attempts: int. Сколько попыток совершить операцию будет сделано 
                дропом после первой отклоненной транзакции. По умолчанию 0.
     attempts_cfg: dict. Лимиты возможных попыток: для переводов и снятий.
+    rng: np.random.Generator. Генератор случайных чисел текущего дропа.
+         По умолчанию None - генератор по умолчанию.
     """
 
     def __init__(self, configs: DropDistributorCfg, amt_hand: DropAmountHandler):
@@ -48,6 +50,7 @@ class DistBehaviorHandler:
         self.in_chunks = None
         self.attempts = 0
         self.attempts_cfg = configs.attempts
+        self.rng = None
 
 
     def sample_scenario(self):
@@ -55,7 +58,7 @@ class DistBehaviorHandler:
         Выбор сценария поведения дропа с учётом текущего баланса и актуальных лимитов.
         """
         balance = self.amt_hand.balance
-        split = np.random.uniform(0,1) <= self.split_rate
+        split = get_rng(self.rng).uniform(0,1) <= self.split_rate
 
         # Минимальный баланс для переводов по частям будет самый маленький возможный размер чанка
         # self.trf_min умноженный на 2
@@ -74,7 +77,7 @@ class DistBehaviorHandler:
 
         for cond, scen_list in conditions:
             if cond:
-                self.scen = np.random.choice(scen_list)
+                self.scen = get_rng(self.rng).choice(scen_list)
                 return
         # Если ни одно из условий не сработало
         self.scen = "transfer"
@@ -126,7 +129,7 @@ class DistBehaviorHandler:
         
         drop_rate = self.to_drop_rate
         # Возвращаем True или False
-        return np.random.uniform(0,1) < drop_rate
+        return get_rng(self.rng).uniform(0,1) < drop_rate
 
 
     @property
@@ -141,7 +144,7 @@ class DistBehaviorHandler:
         
         to_crypto_rate = self.crypto_rate
         # Возвращаем True или False
-        return np.random.uniform(0,1) < to_crypto_rate
+        return get_rng(self.rng).uniform(0,1) < to_crypto_rate
 
 
     def stop_after_decline(self):
@@ -179,13 +182,13 @@ class DistBehaviorHandler:
         if online: # Для переводов
             trf_min = self.attempts_cfg["trf_min"]
             trf_max = self.attempts_cfg["trf_max"]
-            self.attempts = np.random.randint(trf_min, trf_max + 1)
+            self.attempts = get_rng(self.rng).integers(trf_min, trf_max + 1)
             return
         
         # Для снятий.
         atm_min = self.attempts_cfg["atm_min"]
         atm_max = self.attempts_cfg["atm_max"]
-        self.attempts = np.random.randint(atm_min, atm_max + 1)
+        self.attempts = get_rng(self.rng).integers(atm_min, atm_max + 1)
             
 
     def deduct_attempts(self):
@@ -240,6 +243,8 @@ class PurchBehaviorHandler:
     attempts: int. Сколько попыток совершить операцию будет сделано 
                дропом после первой отклоненной транзакции. По умолчанию 0.
     attempts_cfg: dict. Лимиты возможных попыток
+    rng: np.random.Generator. Генератор случайных чисел текущего дропа.
+         По умолчанию None - генератор по умолчанию.
     """
 
     def __init__(self, configs: DropPurchaserCfg, amt_hand: DropAmountHandler):
@@ -257,6 +262,7 @@ class PurchBehaviorHandler:
         self.in_chunks = None
         self.attempts = 0
         self.attempts_cfg = configs.attempts
+        self.rng = None
 
 
     def sample_scenario(self):
@@ -265,7 +271,7 @@ class PurchBehaviorHandler:
         и актуальных лимитов.
         """
         balance = self.amt_hand.balance
-        split = np.random.uniform(0,1) <= self.split_rate
+        split = get_rng(self.rng).uniform(0,1) <= self.split_rate
 
         # Минимальный баланс для переводов по частям будет самый маленький возможный размер чанка
         # self.amt_min умноженный на 2
@@ -330,7 +336,7 @@ class PurchBehaviorHandler:
         
         att_min = self.attempts_cfg["min"]
         att_max = self.attempts_cfg["max"]
-        self.attempts = np.random.randint(att_min, att_max + 1)
+        self.attempts = get_rng(self.rng).integers(att_min, att_max + 1)
             
             
     def deduct_attempts(self):
@@ -28,15 +28,19 @@ class DropBaseClasses:
                 Управление поведением дропа: распределителя или покупателя.
     part_data: DropTxnPartData.
                Генерация части данных о транзакции дропа.
+    registry: AccountRegistry. Общий реестр счетов для acc_hand. None - свой реестр.
     """
-    def __init__(self, drop_type, configs):
+    def __init__(self, drop_type, configs, registry=None):
         """
         drop_type: str. 'distributor' или 'purchaser'
         configs: DropDistributorCfg | DropPurchaserCfg.
                  Параметры и конфиги для генерации фрода.
+        registry: AccountRegistry. Общий реестр счетов нескольких наборов обработчиков.
+                  None - у acc_hand свой реестр из configs.accounts.
         """
         self.drop_type = drop_type
         self.configs = configs
+        self.registry = registry
         self.acc_hand = None
         self.amt_hand = None
         self.time_hand = None
@@ -49,7 +53,7 @@ class DropBaseClasses:
         Создать объект DropAccountHandler.
         Объект пишется в атрибут acc_hand.
         """
-        self.acc_hand = DropAccountHandler(self.configs)
+        self.acc_hand = DropAccountHandler(self.configs, registry=self.registry)
 
 
     def build_amt_hand(self):
@@ -102,4 +106,16 @@ class DropBaseClasses:
         self.build_amt_hand()
         self.build_time_hand()
         self.build_behav_hand()
-        self.build_part_data()
\ No newline at end of file
+        self.build_part_data()
+
+
+    def set_rng(self, rng):
+        """
+        Передать генератор случайных чисел текущего дропа
+        в созданные объекты основных классов.
+        ---------
+        rng: np.random.Generator. Генератор случайных чисел дропа.
+        """
+        for handler in [self.acc_hand, self.amt_hand, self.time_hand, self.behav_hand, self.part_data]:
+            if handler is not None:
+                handler.rng = rng
\ No newline at end of file
@@ -1,12 +1,15 @@
 import pandas as pd
-import geopandas as gpd
 import pyarrow
 import os
 from pathlib import Path
 
 from data_generator.utils import create_txns_df
 from data_generator.configs import DropDistributorCfg, DropPurchaserCfg
-from data_generator.general_time import create_timestamps_range_df
+from data_generator.rng import resolve_seed, stage_rng
+from data_generator.context import RunDataContext
+from data_generator.sampler import SamplerRegistry
+from data_generator.fraud.pools import DrawPool
+from data_generator.parquet_meta import parquet_num_rows
 
 # 1. Конструктор объектов конфиг датаклассов
 class DropConfigBuilder:
@@ -21,9 +24,16 @@ class DropConfigBuilder:
     drop_cfg: dict. Конфиги дропов из drops.yaml
     drops: pd.DataFrame. Семплированные клиенты для дроп фрода.
     run_dir: str. Путь к директории под текущую генерацию.
+    context: RunDataContext. Общие данные запуска: файлы и таблицы читаются один раз.
+    seed: int. Seed запуска. Из base_cfg["seed"], либо случайный если его нет.
     """
+    # Способы генерации из drops.yaml
+    engines = ("lifecycle", "event", "lockstep")
+    # Движки генерации только в одном процессе
+    single_process = ("event", "lockstep")
+
     def __init__(self, base_cfg: dict, legit_cfg: dict, time_cfg: dict, fraud_cfg: dict, \
-                 drop_cfg: dict, run_dir: str):
+                 drop_cfg: dict, run_dir: str, context: RunDataContext = None):
         """
         base_cfg: dict. Общие конфиги из base.yaml
         legit_cfg: dict.
@@ -31,6 +41,7 @@ class DropConfigBuilder:
         fraud_cfg: dict. Общие конфиги фрода из fraud.yaml
         drop_cfg: dict. Конфиги дропов из drops.yaml
         run_dir: str. Путь к директории под текущую генерацию.
+        context: RunDataContext. Общие данные запуска. None - свой контекст у билдера.
         """
         self.base_cfg = base_cfg
         self.legit_cfg = legit_cfg
@@ -38,7 +49,10 @@ class DropConfigBuilder:
         self.fraud_cfg = fraud_cfg
         self.drop_cfg = drop_cfg
         self.run_dir = run_dir
+        self.context = context if context is not None else RunDataContext()
         self.drops = None
+        self.seed = resolve_seed(base_cfg.get("seed"))
+        self.rng = None
 
 
     def make_dir(self, drop_type):
@@ -66,21 +80,9 @@ class DropConfigBuilder:
         path: str. Путь к директории или файлу.
         file: str. Название файла с расширением
               в path если path это директория.
+        Файл читается через self.context - один раз за запуск.
         """
-        if os.path.isdir(path) and file != "":
-            file_type = file.split(".")[-1]
-            path = os.path.join(path, file)
-        if os.path.isfile(path) and file == "":
-            file_type = path.split(".")[-1]
-
-        if file_type == "csv":
-            return pd.read_csv(path)
-        
-        if file_type == "gpkg":
-            return gpd.read_file(path)
-        
-        if file_type == "parquet":
-            return pd.read_parquet(path, engine="pyarrow")
+        return self.context.read_file(path=path, file=file)
 
 
     def estimate_drops_count(self, drop_type):
@@ -91,8 +93,8 @@ class DropConfigBuilder:
         drop_cfg = self.drop_cfg
         legit_storage = self.legit_cfg["data_storage"]
         leg_folder = legit_storage["folder_name"]
-        leg_txn_file = legit_storage["files"]["txns"]
-        legit_txns_path = os.path.join(self.run_dir, leg_folder, leg_txn_file)
+        txns_file = legit_storage["files"]["txns"]
+        txns_path = os.path.join(self.run_dir, leg_folder, txns_file)
 
         fraud_rate = fraud_cfg["fraud_rates"]["total"] # доля всего фрода от всех транзакций
         drop_share = fraud_cfg["fraud_rates"]["drops"][drop_type] # Доля дропов указанного типа от всего фрода
@@ -100,8 +102,8 @@ class DropConfigBuilder:
         out_lim = drop_cfg[drop_type]["out_lim"]
 
         # отсюда посчитаем количество клиентов для дроп фрода с распределением денег
-        legit_txns = self.read_file(path=legit_txns_path)
-        legit_count = legit_txns.shape[0]
+        # Кол-во легальных транзакций из метаданных parquet файла, без чтения данных
+        legit_count = parquet_num_rows(path=txns_path)
         # подсчет количества транзакций равных 1% от всех транзакций
         # т.к. не все транзакции еще созданные, то считаем основываясь на количестве легальных транзакций и fraud rate
         one_perc = round(legit_count / ((1 - fraud_rate) * 100))
@@ -153,7 +155,10 @@ class DropConfigBuilder:
                                             ~(all_clients.client_id.isin(other_drops.client_id))].copy()
         
         drops_count = self.estimate_drops_count(drop_type=drop_type)
-        drops_samp = not_used_clients.sample(n=drops_count, replace=False).reset_index(drop=True)
+        # Генератор этапа дропов этого типа. Используется и дальше при сборке конфига
+        self.rng = stage_rng(seed=self.seed, stage=drop_type)
+        drops_samp = not_used_clients.sample(n=drops_count, replace=False, random_state=self.rng) \
+                                     .reset_index(drop=True)
 
         data_storage = drops_cfg[drop_type]["data_storage"]
         file_name = data_storage["files"]["clients"]
@@ -165,30 +170,47 @@ class DropConfigBuilder:
         return drops_samp
 
 
-    def read_by_precedence(self, path_01, path_02, file_type):
+    def read_by_precedence(self, path_01, path_02):
         """
         Чтение файла по приоритету и наличию.
         Проверить наличие файла по пути path_01, если он есть, то загрузить его.
         Если его нет то проверить начличие файла по пути path_02 и загрузить его 
-        если он есть.
+        если он есть. Файл читается через self.context.
         ------------------
         path_01: str. Путь к файлу у которого приоритет.
         path_02: str. Путь к альтернативному файлу.
-        file_type: str. Тип файла: 'csv' или 'parquet'.
         """
+        return self.context.read_by_precedence(path_01=path_01, path_02=path_02)
+
+
+    def check_generation(self, engine, workers):
+        """
+        Проверка настроек генерации из drops.yaml.
+        ---------------
+        engine: str. Способ генерации.
+        workers: int. Кол-во процессов.
+        """
+        if engine not in self.engines:
+            raise ValueError(f"Unknown drops engine '{engine}' in drops.yaml. Expected one of {self.engines}")
+        if engine in self.single_process and workers > 1:
+            raise ValueError(f"Drops engine '{engine}' runs in one process only, but generation.workers "
+                             f"is {workers} in drops.yaml. Set workers to 1")
 
-        if os.path.exists(path_01) and file_type == "csv":
-            return pd.read_csv(path_01)
-        elif os.path.exists(path_01) and file_type == "parquet":
-            return pd.read_parquet(path_01, engine="pyarrow")
-        
-        elif os.path.exists(path_02) and file_type == "csv":
-            return pd.read_csv(path_02)
-        elif os.path.exists(path_02) and file_type == "parquet":
-            return pd.read_parquet(path_02, engine="pyarrow")
-        
-        raise ValueError(f"""No files in paths: {path_01}
-            or {path_02}""")
+
+    @staticmethod
+    def check_outer_pool(outer_pool, drops_count, outer_per_drop):
+        """
+        Проверка что внешних счетов хватит на части пула всех дропов распределителей.
+        ---------------
+        outer_pool: DrawPool. Перемешанные внешние счета.
+        drops_count: int. Кол-во дропов распределителей.
+        outer_per_drop: int. Размер части пула одного дропа.
+        """
+        needed = drops_count * outer_per_drop
+        if outer_pool.remaining < needed:
+            raise ValueError(f"outer_accounts has {outer_pool.remaining} accounts, but {drops_count} distributor "
+                             f"drops need up to {outer_per_drop} each ({needed} total). Add outer accounts "
+                             f"or lower distributor out_lim / attempts.trf_max in drops.yaml")
 
 
     def build_dist_cfg(self):
@@ -204,13 +226,19 @@ class DropConfigBuilder:
         base_files = base_cfg["data_paths"]["base"]
         acc_path_01 = Path(self.run_dir) / "accounts.csv"
         acc_path_02 = base_files["accounts_default"]
-        
+        engine = drop_cfg["generation"]["engine"]
+        workers = drop_cfg["generation"]["workers"]
+        self.check_generation(engine=engine, workers=workers)
+
         clients = self.get_clients_for_drops(drop_type="distributor")
-        timestamps = create_timestamps_range_df(stamps_cfg=stamps_cfg)
+        timestamps = self.context.timestamps(stamps_cfg=stamps_cfg)
         txns = create_txns_df(base_cfg["txns_df"])
-        accounts = self.read_by_precedence(path_01=acc_path_01, path_02=acc_path_02, file_type="csv")
+        accounts = self.read_by_precedence(path_01=acc_path_01, path_02=acc_path_02)
         outer_accounts = self.read_file(path=base_files["outer_accounts"]).iloc[:,0] # нужны в виде серии
+        # Внешние счета без возвращения. Перемешиваются один раз на этап
+        outer_pool = DrawPool(values=outer_accounts, rng=self.rng)
         client_devices = self.read_file(path=base_files["client_devices"])
+        device_index = self.context.device_index(path=base_files["client_devices"])
         online_merchant_ids = self.read_file(path=base_files["online_merchant_ids"]) \
                                   .iloc[:,0] # нужны в виде серии
         cities = self.read_file(path=base_files["cities"])
@@ -238,6 +266,11 @@ class DropConfigBuilder:
         run_dir = self.run_dir
         directory = self.make_dir(drop_type="distributor")
         txns_file_name = dist_cfg["data_storage"]["files"]["txns"]
+        # Худший случай внешних счетов на дропа: все исходящие и попытки переводов после отклонения
+        outer_per_drop = out_lim + attempts["trf_max"] + 1
+        # Пул всегда делится на части по дропам. Проверка что частей хватит всем дропам
+        self.check_outer_pool(outer_pool=outer_pool, drops_count=clients.shape[0], \
+                              outer_per_drop=outer_per_drop)
 
         return DropDistributorCfg(clients=clients, timestamps=timestamps, transactions=txns, accounts=accounts, \
                                   outer_accounts=outer_accounts, client_devices=client_devices, \
@@ -248,7 +281,9 @@ class DropConfigBuilder:
                                   trf_max=trf_max, reduce_share=reduce_share, attempts=attempts, to_drops=to_drops, \
                                   crypto_rate=crypto_rate, data_paths=data_paths, dir_category=dir_category, \
                                   folder_name=folder_name, key_latest=key_latest, key_history=key_history, \
-                                  run_dir=run_dir, directory=directory, txns_file_name=txns_file_name
+                                  run_dir=run_dir, directory=directory, txns_file_name=txns_file_name, \
+                                  seed=self.seed, device_index=device_index, outer_pool=outer_pool, \
+                                  outer_per_drop=outer_per_drop, engine=engine, workers=workers
                                   )
 
 
@@ -266,15 +301,21 @@ class DropConfigBuilder:
         base_fraud_files = base_cfg["data_paths"]["base_fraud"]
         acc_path_01 = Path(self.run_dir) / "accounts.csv"
         acc_path_02 = base_files["accounts_default"]
+        engine = drop_cfg["generation"]["engine"]
+        workers = drop_cfg["generation"]["workers"]
+        self.check_generation(engine=engine, workers=workers)
 
         clients = self.get_clients_for_drops(drop_type="purchaser")
-        timestamps = create_timestamps_range_df(stamps_cfg=stamps_cfg)
+        timestamps = self.context.timestamps(stamps_cfg=stamps_cfg)
         txns = create_txns_df(base_cfg["txns_df"])
-        accounts = self.read_by_precedence(path_01=acc_path_01, path_02=acc_path_02, file_type="csv")
+        accounts = self.read_by_precedence(path_01=acc_path_01, path_02=acc_path_02)
         client_devices = self.read_file(path=base_files["client_devices"])
+        device_index = self.context.device_index(path=base_files["client_devices"])
         online_merchant_ids = self.read_file(path=base_files["online_merchant_ids"]) \
                                   .iloc[:,0] # нужны в виде серии
         categories = self.read_file(path=base_fraud_files["drop_purch_cats"])
+        samplers = SamplerRegistry() # Alias таблица категорий по weight
+        samplers.add(key="categories", weights=categories.weight, values=categories.category)
         cities = self.read_file(path=base_files["cities"])
         in_lim = purch_cfg["in_lim"]
         out_lim = purch_cfg["out_lim"]
@@ -309,5 +350,7 @@ class DropConfigBuilder:
                                 amt_max=amt_max, reduce_share=reduce_share, attempts=attempts, \
                                 data_paths=data_paths, dir_category=dir_category, folder_name=folder_name, \
                                 key_latest=key_latest, key_history=key_history, run_dir=run_dir, \
-                                directory=directory, txns_file_name=txns_file_name
+                                directory=directory, txns_file_name=txns_file_name, seed=self.seed, \
+                                device_index=device_index, samplers=samplers, engine=engine, \
+                                workers=workers
                                 )
\ No newline at end of file
@@ -0,0 +1,151 @@
+# Генерация транзакций дропов по общим часам: очередь событий всех дропов по времени
+import heapq
+import numpy as np
+
+from data_generator.fraud.drops.accounts import AccountRegistry
+from data_generator.fraud.drops.build.builder import DropBaseClasses
+from data_generator.fraud.drops.txns import CreateDropTxn
+from data_generator.fraud.drops.simulator import DropLifecycleManager
+from data_generator.rng import batch_rng, client_rng
+
+
+# 1. Движок событий
+
+class DropEventEngine:
+    """
+    Активность всех дропов этапа на общих часах. Время начала дропов семплируется
+    заранее. Следующие транзакции активных дропов лежат в одной куче по unix времени,
+    транзакции отдаются по возрастанию времени без сортировки в конце.
+    Состояние есть только у активных дропов: набор обработчиков берется из пула
+    при начале активности дропа и возвращается в пул при её окончании.
+    Дроп доступен для переводов другим дропам с времени своего начала, поэтому
+    выбор счетов не зависит от порядка обработки дропов.
+    ---------
+    Атрибуты:
+    ---------
+    configs: DropDistributorCfg | DropPurchaserCfg. Конфиги и данные для генерации транзакций дропов.
+    drop_type: str. 'distributor' или 'purchaser'
+    seed: int. Seed запуска.
+    clients: list. Дропы этапа - namedtuple из configs.clients.
+    starts: np.ndarray. Время начала дропов по порядку clients. Unix время.
+    order: np.ndarray. Позиции дропов в clients по возрастанию времени начала.
+    registry: AccountRegistry. Общий реестр счетов всех наборов обработчиков.
+              Дропы в расписании по времени начала.
+    outer_pools: list. Части пула внешних счетов по дропам. None для покупателей.
+    idle: list. Свободные наборы обработчиков: (DropBaseClasses, CreateDropTxn, DropLifecycleManager).
+    peak_active: int. Максимальное кол-во одновременно активных дропов.
+    """
+    def __init__(self, configs, drop_type, outer_pools=None):
+        """
+        configs: DropDistributorCfg | DropPurchaserCfg. Конфиги и данные для генерации транзакций дропов.
+        drop_type: str. 'distributor' или 'purchaser'
+        outer_pools: list. Части пула внешних счетов по дропам, например DropSimulator.outer_pools.
+        """
+        self.configs = configs
+        self.drop_type = drop_type
+        self.seed = configs.seed
+        self.clients = list(configs.clients.itertuples())
+        self.outer_pools = outer_pools
+
+        # Время начала всех дропов одной выборкой из диапазона timestamps
+        stamps_unix = configs.timestamps.unix_time.to_numpy(dtype=np.int64)
+        rng = batch_rng(seed=self.seed, stage=drop_type)
+        self.starts = stamps_unix[rng.integers(0, stamps_unix.shape[0], size=len(self.clients))]
+        self.order = np.argsort(self.starts, kind="stable")
+
+        client_ids = configs.clients.client_id.to_numpy()
+        self.registry = AccountRegistry(accounts=configs.accounts)
+        self.registry.schedule(client_ids=client_ids[self.order].tolist(), starts=self.starts[self.order])
+        self.idle = []
+        self.peak_active = 0
+
+
+    def acquire(self):
+        """
+        Свободный набор обработчиков из пула. Если пул пуст - создается новый набор.
+        """
+        if self.idle:
+            return self.idle.pop()
+
+        base = DropBaseClasses(drop_type=self.drop_type, configs=self.configs, registry=self.registry)
+        base.build_all()
+        create_txn = CreateDropTxn(configs=self.configs, base=base)
+        return base, create_txn, DropLifecycleManager(base=base, create_txn=create_txn)
+
+
+    def start_drop(self, drop_num, agent):
+        """
+        Начать активность дропа на наборе обработчиков.
+        ---------------
+        drop_num: int. Позиция дропа в clients.
+        agent: tuple. Набор обработчиков из self.acquire().
+        ---------------
+        Возвращает генератор транзакций дропа
+        """
+        base, create_txn, life_manager = agent
+        client = self.clients[drop_num]
+        base.part_data.client_info = client
+        base.acc_hand.client_id = client.client_id
+        if self.outer_pools is not None:
+            base.acc_hand.outer_pool = self.outer_pools[drop_num]
+        base.time_hand.first_unix = self.starts[drop_num]
+        # Свой поток случайных чисел у каждого дропа
+        rng = client_rng(seed=self.seed, stage=self.drop_type, client_id=client.client_id, buffered=True)
+        base.set_rng(rng)
+        create_txn.rng = rng
+
+        return life_manager.iter_drop_lifecycle()
+
+
+    def stream(self):
+        """
+        Транзакции всех дропов этапа по возрастанию unix времени.
+        При равном времени - по позиции дропа в clients.
+        """
+        starts = self.starts
+        order = self.order
+        heap = []
+        next_start = 0 # Позиция следующего дропа в order
+        seq = 0 # Счетчик событий. Порядок событий дропа при равном времени
+
+        while True:
+            # Начать активность дропов, чье время начала не позже ближайшего события
+            while next_start < order.shape[0] and (not heap or starts[order[next_start]] <= heap[0][0]):
+                drop_num = int(order[next_start])
+                agent = self.acquire()
+                txns = self.start_drop(drop_num=drop_num, agent=agent)
+                heapq.heappush(heap, (int(starts[drop_num]), drop_num, seq, next(txns), txns, agent))
+                seq += 1
+                next_start += 1
+                self.peak_active = max(self.peak_active, len(heap))
+
+            if not heap:
+                return
+
+            _, drop_num, _, txn, txns, agent = heapq.heappop(heap)
+            yield txn
+
+            next_txn = next(txns, None)
+            # Активность дропа закончена. Набор обработчиков возвращается в пул
+            if next_txn is None:
+                agent[2].reset_all_caches()
+                self.idle.append(agent)
+                continue
+
+            heapq.heappush(heap, (next_txn["unix_time"], drop_num, seq, next_txn, txns, agent))
+            seq += 1
+
+
+# 2.
+
+def gen_drop_txns_events(configs, drop_sim):
+    """
+    Генерация транзакций дропов движком событий. Транзакции пишутся
+    в файлы как при генерации по одному дропу.
+    ---------------
+    configs: DropDistributorCfg | DropPurchaserCfg. Конфиги и данные для генерации транзакций дропов.
+    drop_sim: DropSimulator. Симулятор этапа. Части пула внешних счетов и запись файлов.
+    """
+    engine = DropEventEngine(configs=configs, drop_type=drop_sim.drop_type, outer_pools=drop_sim.outer_pools)
+    drop_sim.all_txns = list(engine.stream())
+    drop_sim.write()
@@ -0,0 +1,512 @@
+# Генерация транзакций дропов массивами NumPy: все дропы этапа делают шаг одновременно
+import numpy as np
+import pandas as pd
+
+from data_generator.configs import DropDistributorCfg
+from data_generator.fraud.drops.accounts import AccountRegistry
+from data_generator.utils import get_values_from_truncnorm
+from data_generator.rng import batch_rng
+
+
+# Сценарии дропа распределителя
+TRANSFER, ATM, SPLIT_TRANSFER, ATM_TRANSFER = 0, 1, 2, 3
+# Сценарии дропа покупателя
+ONE_PURCHASE, SPLIT_MONEY = 0, 1
+
+
+# 1. Движок шагов для всех дропов
+
+class DropLockstepEngine:
+    """
+    Те же правила поведения дропа, что у DropAmountHandler, DistBehaviorHandler,
+    PurchBehaviorHandler, DropTimeHandler и CreateDropTxn, но состояние всех
+    дропов этапа хранится массивами NumPy по дропам. За один шаг каждый живой
+    дроп делает одну транзакцию: входящую, если батч обработан, иначе следующую
+    исходящую операцию батча. Обновления состояния - по маскам. Дроп выбывает
+    после отклоненной входящей транзакции, как в DropLifecycleManager.
+    Случайные числа из одного потока этапа, поэтому по распределению результат
+    совпадает с другими движками, но не транзакция в транзакцию.
+    Время начала дропов и доступность дропов для переводов - как в DropEventEngine.
+    ---------
+    Атрибуты:
+    ---------
+    configs: DropDistributorCfg | DropPurchaserCfg. Конфиги и данные для генерации транзакций дропов.
+    drop_type: str. 'distributor' или 'purchaser'
+    dist: bool. Дропы распределители.
+    rng: np.random.Generator. Генератор случайных чисел этапа.
+    client_id, city, lat, lon, home_ip: np.ndarray. Данные дропов из configs.clients.
+    starts: np.ndarray. Время начала дропов. Unix время.
+    registry: AccountRegistry. Реестр счетов. Дропы в расписании по времени начала.
+    own_account: np.ndarray. Номера своих счетов дропов.
+    own_slot: np.ndarray. Позиции своих счетов в registry.drop_accounts.
+    outer_values: np.ndarray. Неиспользованные внешние счета. Только для распределителей.
+    outer_bounds: np.ndarray. Границы частей outer_values по дропам. Только для распределителей.
+    online_merchant_ids: np.ndarray. id онлайн мерчантов.
+    -----------
+    Состояние дропов, массивы длиной в кол-во дропов:
+    alive: bool. Дроп еще активен.
+    in_batch: bool. Дроп обрабатывает полученный батч - следующая транзакция исходящая.
+    in_txns, out_txns: int. Входящие и исходящие транзакции за всю активность. Для лимитов.
+    period_in, period_out: int. Входящие и исходящие транзакции за период активности.
+    start_unix, last_unix: int. Время первой транзакции периода и последней транзакции.
+    balance: float. Баланс.
+    batch_txns: int. Исходящие транзакции в текущем батче.
+    declined_txns: int. Отклоненные исходящие транзакции.
+    chunk_size: float. Последний размер части баланса.
+    last_amt: float. Последняя сумма исходящей транзакции.
+    first_decl: float. Сумма первой отклоненной транзакции.
+    attempts: int. Оставшиеся попытки после первой отклоненной транзакции.
+    scen: int. Сценарий текущего батча.
+    in_chunks: bool. Батч распределяется по частям.
+    outer_used: int. Использованные внешние счета из своей части.
+    last_crypto: bool. Последняя транзакция - перевод на криптобиржу.
+    crypto_merchant, crypto_device: float. Мерчант и девайс последнего перевода на криптобиржу.
+    """
+    # Колонки транзакций как у build_transaction
+    columns = ("client_id", "unix_time", "amount", "type", "channel", "category", "online", "merchant_id", \
+               "trans_city", "trans_lat", "trans_lon", "trans_ip", "device_id", "account", "is_fraud", \
+               "is_suspicious", "status", "rule")
+
+    def __init__(self, configs, drop_type):
+        """
+        configs: DropDistributorCfg | DropPurchaserCfg. Конфиги и данные для генерации транзакций дропов.
+        drop_type: str. 'distributor' или 'purchaser'
+        """
+        self.configs = configs
+        self.drop_type = drop_type
+        self.dist = isinstance(configs, DropDistributorCfg)
+        self.rng = batch_rng(seed=configs.seed, stage=drop_type)
+
+        clients = configs.clients
+        size = clients.shape[0]
+        self.client_id = clients["client_id"].to_numpy(dtype=np.int64)
+        self.city = clients["city"].to_numpy(dtype=object)
+        self.lat = clients["lat"].to_numpy(dtype=np.float64)
+        self.lon = clients["lon"].to_numpy(dtype=np.float64)
+        self.home_ip = clients["home_ip"].to_numpy(dtype=object)
+
+        # Время начала всех дропов одной выборкой, как в DropEventEngine
+        stamps_unix = configs.timestamps.unix_time.to_numpy(dtype=np.int64)
+        self.starts = stamps_unix[self.rng.integers(0, stamps_unix.shape[0], size=size)]
+        order = np.argsort(self.starts, kind="stable")
+        self.registry = AccountRegistry(accounts=configs.accounts)
+        self.registry.schedule(client_ids=self.client_id[order].tolist(), starts=self.starts[order])
+        self.own_account = self.registry.account_ids[self.registry.positions_of(self.client_id.tolist())]
+        self.own_slot = self.registry.slots_of(self.client_id.tolist())
+
+        # Своя часть внешних счетов у каждого дропа на худший случай, как DropSimulator.outer_pools
+        if self.dist:
+            pool = configs.outer_pool
+            self.outer_values = pool.values[pool.cursor:]
+            self.outer_bounds = pool.split_bounds(parts=size, size=configs.outer_per_drop)
+        self.online_merchant_ids = configs.online_merchant_ids.to_numpy()
+
+        self.alive = np.ones(size, dtype=bool)
+        self.in_batch = np.zeros(size, dtype=bool)
+        self.in_txns = np.zeros(size, dtype=np.int64)
+        self.out_txns = np.zeros(size, dtype=np.int64)
+        self.period_in = np.zeros(size, dtype=np.int64)
+        self.period_out = np.zeros(size, dtype=np.int64)
+        self.start_unix = np.zeros(size, dtype=np.int64)
+        self.last_unix = np.zeros(size, dtype=np.int64)
+        self.balance = np.zeros(size, dtype=np.float64)
+        self.batch_txns = np.zeros(size, dtype=np.int64)
+        self.declined_txns = np.zeros(size, dtype=np.int64)
+        self.chunk_size = np.zeros(size, dtype=np.float64)
+        self.last_amt = np.zeros(size, dtype=np.float64)
+        self.first_decl = np.zeros(size, dtype=np.float64)
+        self.attempts = np.zeros(size, dtype=np.int64)
+        self.scen = np.zeros(size, dtype=np.int64)
+        self.in_chunks = np.zeros(size, dtype=bool)
+        self.outer_used = np.zeros(size, dtype=np.int64)
+        self.last_crypto = np.zeros(size, dtype=bool)
+        self.crypto_merchant = np.full(size, np.nan)
+        self.crypto_device = np.full(size, np.nan)
+
+
+    def limit_reached(self, idx):
+        """
+        Достигнут ли лимит входящих или исходящих транзакций. Как CreateDropTxn.limit_reached.
+        ---------------
+        idx: np.ndarray. Позиции дропов.
+        """
+        configs = self.configs
+        return (self.in_txns[idx] >= configs.in_lim) | (self.out_txns[idx] >= configs.out_lim)
+
+
+    def txn_times(self, idx, receive):
+        """
+        Время транзакций дропов. Как DropTimeHandler.get_txn_time.
+        ---------------
+        idx: np.ndarray. Позиции дропов.
+        receive: bool. Транзакции входящие.
+        """
+        configs = self.configs
+        rng = self.rng
+        unix = np.empty(idx.shape[0], dtype=np.int64)
+
+        # Самая первая транзакция дропа - входящая во время начала дропа
+        first = np.zeros(idx.shape[0], dtype=bool)
+        if receive:
+            first = self.in_txns[idx] == 0
+        fst = idx[first]
+        self.start_unix[fst] = self.last_unix[fst] = self.starts[fst]
+        self.period_in[fst] += 1
+        unix[first] = self.starts[fst]
+
+        # Лимит периода достигнут - новый период от первой транзакции прошлого периода
+        rest = idx[~first]
+        new_period = (self.period_in[rest] == configs.period_in_lim) \
+                     | (self.period_out[rest] == configs.period_out_lim)
+        nxt = rest[new_period]
+        delta = np.round(rng.uniform(configs.two_way_delta["min"], configs.two_way_delta["max"], size=nxt.shape[0]))
+        self.last_unix[nxt] = self.start_unix[nxt] + (configs.lag_interval + delta.astype(np.int64)) * 60
+        self.start_unix[nxt] = self.last_unix[nxt]
+        self.period_in[nxt] = 1 if receive else 0
+        self.period_out[nxt] = 0 if receive else 1
+
+        # Тот же период - случайная положительная дельта от последней транзакции
+        same = rest[~new_period]
+        delta = np.round(rng.uniform(configs.pos_delta["min"], configs.pos_delta["max"], size=same.shape[0]))
+        self.last_unix[same] += delta.astype(np.int64) * 60
+        if receive:
+            self.period_in[same] += 1
+        else:
+            self.period_out[same] += 1
+
+        unix[~first] = self.last_unix[rest]
+        return unix
+
+
+    def sample_scenarios(self, idx):
+        """
+        Сценарии нового батча по балансу. Как sample_scenario и in_chunks_val обработчиков поведения.
+        ---------------
+        idx: np.ndarray. Позиции дропов.
+        """
+        configs = self.configs
+        rng = self.rng
+        chunks = configs.chunks
+        balance = self.balance[idx]
+        split = rng.uniform(0, 1, size=idx.shape[0]) <= configs.split_rate
+        split_eligible = balance >= chunks["rcvd_small"]["min"] * 2
+
+        if not self.dist:
+            scen = np.where((balance > configs.amt_max) | (split_eligible & split), SPLIT_MONEY, ONE_PURCHASE)
+            self.scen[idx] = scen
+            self.in_chunks[idx] = scen == SPLIT_MONEY
+            return
+
+        large_balance = balance > configs.trf_max
+        atm_eligible = balance >= chunks["atm_min"]
+        # Выбор из двух сценариев с равной вероятностью
+        pick = rng.random(idx.shape[0]) < 0.5
+        split_or_atm = np.where(pick, SPLIT_TRANSFER, ATM_TRANSFER)
+        # Условия по порядку как в DistBehaviorHandler.sample_scenario
+        scen = np.select([large_balance & split, large_balance, atm_eligible & split, atm_eligible, \
+                          split_eligible & split], \
+                         [split_or_atm, ATM, split_or_atm, np.where(pick, TRANSFER, ATM), SPLIT_TRANSFER], \
+                         default=TRANSFER)
+        self.scen[idx] = scen
+        self.in_chunks[idx] = (scen == SPLIT_TRANSFER) | (scen == ATM_TRANSFER)
+
+
+    def chunk_sizes(self, idx, online):
+        """
+        Размеры частей баланса. Как DropAmountHandler.get_chunk_size и handle_atm.
+        ---------------
+        idx: np.ndarray. Позиции дропов с распределением по частям.
+        online: np.ndarray. Перевод или снятие.
+        """
+        configs = self.configs
+        rng = self.rng
+        chunks = configs.chunks
+        rnd = configs.round
+
+        # Не первая транзакция батча - иногда прежний размер части
+        keep = (self.batch_txns[idx] != 0) & (rng.uniform(0, 1, size=idx.shape[0]) > chunks["rand_rate"])
+
+        atm = idx[~keep & ~online]
+        if atm.shape[0]:
+            atm_min = chunks["atm_min"]
+            if np.any(self.balance[atm] < atm_min):
+                raise ValueError(f"If atm withdrawal the balance must be >= atm_min. atm_min: {atm_min}")
+            share = rng.uniform(chunks["atm_share"]["min"], chunks["atm_share"]["max"], size=atm.shape[0])
+            self.chunk_size[atm] = np.maximum(atm_min, self.balance[atm] * share // rnd * rnd)
+
+        trf = idx[~keep & online]
+        balance = self.balance[trf]
+        tiers = [chunks["rcvd_small"], chunks["rcvd_medium"], chunks["rcvd_large"]]
+        tier = np.select([balance <= tiers[0]["limit"], balance <= tiers[1]["limit"]], [0, 1], default=2)
+        # Нижняя и верхняя границы части, но не больше баланса
+        low = np.minimum(balance, np.array([t["min"] for t in tiers])[tier])
+        high = np.minimum(balance, np.array([t["max"] for t in tiers])[tier])
+        # Равновероятный выбор из np.arange(low, high + step, step)
+        step = chunks["step"]
+        options = np.ceil((high + step - low) / step).astype(np.int64)
+        self.chunk_size[trf] = low + (rng.random(trf.shape[0]) * options).astype(np.int64) * step
+
+        return self.chunk_size[idx]
+
+
+    def amounts(self, idx, online, declined):
+        """
+        Суммы исходящих операций и обновление баланса и счетчиков.
+        Как DropAmountHandler.one_operation.
+        ---------------
+        idx: np.ndarray. Позиции дропов.
+        online: np.ndarray. Перевод или снятие.
+        declined: np.ndarray. Операции отклонены.
+        """
+        configs = self.configs
+        chunks = configs.chunks
+        rnd = configs.round
+        balance = self.balance[idx]
+        amount = balance.copy() # Не по частям - весь баланс
+
+        # После отклоненной транзакции сумма уменьшается от последней
+        reduce = self.declined_txns[idx] >= 1
+        trf_min = chunks["rcvd_small"]["min"]
+        atm_min = chunks.get("atm_min", 0)
+        reduce_by = self.first_decl[idx] * configs.reduce_share // rnd * rnd
+        floor = np.where(online, trf_min, atm_min)
+        eligible = np.where(online, balance >= trf_min * 2, balance >= atm_min)
+        reduced = np.maximum(floor, self.last_amt[idx] - reduce_by)
+        amount[reduce & eligible] = reduced[reduce & eligible]
+
+        # По частям. Если баланс меньше части - остаток баланса
+        part = ~reduce & self.in_chunks[idx]
+        if part.any():
+            sizes = self.chunk_sizes(idx=idx[part], online=online[part])
+            amount[part] = np.where(balance[part] // sizes > 0, sizes, balance[part])
+
+        self.balance[idx] = balance - np.where(declined, 0, amount)
+        self.batch_txns[idx] += 1
+        self.last_amt[idx] = amount
+        self.declined_txns[idx] += declined
+        first = declined & (self.declined_txns[idx] == 1)
+        self.first_decl[idx[first]] = amount[first]
+        return amount
+
+
+    def update_attempts(self, idx, online):
+        """
+        Попытки после первой отклоненной транзакции и решение об остановке батча.
+        Как attempts_after_decline, deduct_attempts и stop_after_decline обработчиков поведения.
+        ---------------
+        idx: np.ndarray. Позиции дропов.
+        online: np.ndarray. Перевод или снятие.
+        ---------------
+        Возвращает маску дропов, которые прекращают батч
+        """
+        attempts_cfg = self.configs.attempts
+        declined_txns = self.declined_txns[idx]
+
+        first = idx[declined_txns == 1]
+        if self.dist:
+            low = np.where(online, attempts_cfg["trf_min"], attempts_cfg["atm_min"])
+            high = np.where(online, attempts_cfg["trf_max"], attempts_cfg["atm_max"])
+        else:
+            low = np.full(idx.shape[0], attempts_cfg["min"])
+            high = np.full(idx.shape[0], attempts_cfg["max"])
+        first_mask = declined_txns == 1
+        self.attempts[first] = self.rng.integers(low[first_mask], high[first_mask] + 1)
+
+        deduct = idx[(declined_txns > 1) & (self.attempts[idx] > 0)]
+        self.attempts[deduct] -= 1
+
+        return (declined_txns > 0) & (self.attempts[idx] == 0)
+
+
+    def status_columns(self, declined):
+        """
+        Статус, is_fraud и правило. Как CreateDropTxn.status_and_rule.
+        ---------------
+        declined: np.ndarray. Транзакции отклонены.
+        """
+        rule = "drop_flow_cashout" if self.dist else "drop_purchaser"
+        return {"is_fraud": declined.copy(), "is_suspicious": np.zeros(declined.shape[0], dtype=bool), \
+                "status": np.where(declined, "declined", "approved").astype(object), \
+                "rule": np.where(declined, rule, "not applicable").astype(object)}
+
+
+    def receive_step(self, idx):
+        """
+        Входящие переводы дропов и выбор сценариев новых батчей.
+        Дропы с отклоненной входящей транзакцией выбывают.
+        ---------------
+        idx: np.ndarray. Позиции дропов.
+        ---------------
+        Возвращает dict колонок транзакций
+        """
+        configs = self.configs
+        inbound = configs.inbound_amt
+        size = idx.shape[0]
+        declined = self.limit_reached(idx)
+        unix = self.txn_times(idx=idx, receive=True)
+        self.in_txns[idx] += 1
+
+        amount = get_values_from_truncnorm(low_bound=inbound["low"], high_bound=inbound["high"], \
+                                           mean=inbound["mean"], std=inbound["std"], size=size, \
+                                           rng=self.rng) // configs.round * configs.round
+        self.balance[idx] += np.where(declined, 0, amount)
+        self.last_crypto[idx] = False
+
+        txns = {"client_id": self.client_id[idx], "unix_time": unix, "amount": amount, \
+                "type": np.full(size, "inbound", dtype=object), "channel": np.full(size, "transfer", dtype=object), \
+                "category": np.full(size, "not applicable", dtype=object), "online": np.ones(size, dtype=bool), \
+                "merchant_id": np.full(size, np.nan), "trans_city": np.full(size, "not applicable", dtype=object), \
+                "trans_lat": np.full(size, np.nan), "trans_lon": np.full(size, np.nan), \
+                "trans_ip": np.full(size, "not applicable", dtype=object), "device_id": np.full(size, np.nan), \
+                "account": self.own_account[idx].astype(np.float64), **self.status_columns(declined)}
+
+        # Отклоненная входящая - дропу больше не посылают деньги
+        self.alive[idx[declined]] = False
+        batch = idx[~declined]
+        self.sample_scenarios(batch)
+        self.in_batch[batch] = self.balance[batch] > 0
+        return txns
+
+
+    def outgoing_step(self, idx):
+        """
+        Следующая исходящая операция батча: перевод, снятие, перевод на криптобиржу или покупка.
+        ---------------
+        idx: np.ndarray. Позиции дропов.
+        ---------------
+        Возвращает dict колонок транзакций
+        """
+        configs = self.configs
+        rng = self.rng
+        size = idx.shape[0]
+        declined = self.limit_reached(idx)
+
+        # Онлайн или снятие. Как guide_scenario. В atm+transfer только первая операция батча - снятие
+        scen = self.scen[idx]
+        online = np.ones(size, dtype=bool)
+        crypto = np.zeros(size, dtype=bool)
+        to_drop = np.zeros(size, dtype=bool)
+        if self.dist:
+            online = ~((scen == ATM) | ((scen == ATM_TRANSFER) & (self.batch_txns[idx] == 0)))
+            crypto[online] = rng.uniform(0, 1, size=int(online.sum())) < configs.crypto_rate
+            trf = online & ~crypto
+            to_drop[trf] = rng.uniform(0, 1, size=int(trf.sum())) < configs.to_drops["rate"]
+
+        unix = self.txn_times(idx=idx, receive=False)
+        self.out_txns[idx] += 1
+        amount = self.amounts(idx=idx, online=online, declined=declined)
+
+        client_id = self.client_id[idx]
+        trans_ip = self.home_ip[idx].copy()
+        trans_ip[~online] = "not applicable"
+        merchant_id = np.full(size, np.nan)
+        device_id = np.full(size, np.nan)
+        account = np.full(size, np.nan)
+        category = np.full(size, "not applicable", dtype=object)
+
+        if self.dist:
+            txn_type = np.where(crypto, "purchase", np.where(online, "outbound", "withdrawal")).astype(object)
+            channel = np.where(crypto, "crypto_exchange", np.where(online, "transfer", "ATM")).astype(object)
+            category[crypto] = "balance_top_up"
+
+            # Перевод на криптобиржу подряд за прошлым - тот же мерчант и девайс
+            repeat = crypto & self.last_crypto[idx]
+            new = crypto & ~repeat
+            self.crypto_merchant[idx[new]] = self.online_merchant_ids[rng.integers(0, self.online_merchant_ids.shape[0], \
+                                                                                   size=int(new.sum()))]
+            self.crypto_device[idx[new]] = configs.device_index.sample_many(client_ids=client_id[new], rng=rng)
+            merchant_id[crypto] = self.crypto_merchant[idx[crypto]]
+            device_id[crypto] = self.crypto_device[idx[crypto]]
+            self.last_crypto[idx] = crypto
+
+            trf = online & ~crypto
+            device_id[trf] = configs.device_index.sample_many(client_ids=client_id[trf], rng=rng)
+            account[~online] = self.own_account[idx[~online]]
+            account[trf] = self.transfer_accounts(idx=idx[trf], to_drop=to_drop[trf], at=unix[trf])
+        else:
+            txn_type = np.full(size, "purchase", dtype=object)
+            channel = np.full(size, "ecom", dtype=object)
+            category[:] = configs.samplers.draw(key="categories", size=size, rng=rng)
+            merchant_id[:] = self.online_merchant_ids[rng.integers(0, self.online_merchant_ids.shape[0], size=size)]
+            device_id[:] = configs.device_index.sample_many(client_ids=client_id, rng=rng)
+
+        # Конец батча: попытки после отклонения закончились или баланс исчерпан
+        stop = self.update_attempts(idx=idx, online=online)
+        done = idx[stop | (self.balance[idx] <= 0)]
+        self.in_batch[done] = False
+        self.batch_txns[done] = 0
+        self.chunk_size[done] = 0
+
+        return {"client_id": client_id, "unix_time": unix, "amount": amount, "type": txn_type, \
+                "channel": channel, "category": category, "online": online, "merchant_id": merchant_id, \
+                "trans_city": self.city[idx], "trans_lat": self.lat[idx], "trans_lon": self.lon[idx], \
+                "trans_ip": trans_ip, "device_id": device_id, "account": account, **self.status_columns(declined)}
+
+
+    def transfer_accounts(self, idx, to_drop, at):
+        """
+        Счета получателей исходящих переводов. Как DropAccountHandler.get_account:
+        другой дроп если перевод дропу и доступных дропов не меньше min_drops, иначе
+        следующий внешний счет из части дропа.
+        ---------------
+        idx: np.ndarray. Позиции дропов.
+        to_drop: np.ndarray. Перевод другому дропу.
+        at: np.ndarray. Время переводов.
+        """
+        accounts = np.zeros(idx.shape[0], dtype=np.float64)
+        drop_accounts, has_drop = self.registry.sample_drop_accounts(own_slots=self.own_slot[idx[to_drop]], \
+                                                                     at=at[to_drop], rng=self.rng, \
+                                                                     min_drops=self.configs.to_drops["min_drops"])
+        use_drop = np.zeros(idx.shape[0], dtype=bool)
+        use_drop[np.flatnonzero(to_drop)[has_drop]] = True
+        accounts[use_drop] = drop_accounts[has_drop]
+
+        outer = idx[~use_drop]
+        cursor = self.outer_bounds[outer] + self.outer_used[outer]
+        if np.any(cursor >= self.outer_bounds[outer + 1]):
+            raise ValueError("Outer accounts part of a drop is exhausted")
+        accounts[~use_drop] = self.outer_values[cursor]
+        self.outer_used[outer] += 1
+        return accounts
+
+
+    def generate(self):
+        """
+        Транзакции всех дропов этапа. Шаги повторяются пока есть живые дропы.
+        ---------------
+        Возвращает pd.DataFrame с колонками как у build_transaction. Транзакции
+        по порядку дропов в configs.clients, транзакции дропа по времени.
+        """
+        steps = []
+        step = 0
+        while self.alive.any():
+            live = np.flatnonzero(self.alive)
+            receiving = live[~self.in_batch[live]]
+            sending = live[self.in_batch[live]]
+            for idx, step_fn in ((receiving, self.receive_step), (sending, self.outgoing_step)):
+                if idx.shape[0]:
+                    txns = step_fn(idx)
+                    txns["drop_num"] = idx
+                    txns["step"] = np.full(idx.shape[0], step)
+                    steps.append(txns)
+            step += 1
+
+        if not steps:
+            return pd.DataFrame(columns=list(self.columns))
+        columns = {col: np.concatenate([txns[col] for txns in steps]) for col in self.columns + ("drop_num", "step")}
+        order = np.lexsort((columns.pop("step"), columns.pop("drop_num")))
+        return pd.DataFrame({col: values[order] for col, values in columns.items()})
+
+
+# 2.
+
+def gen_drop_txns_lockstep(configs, drop_sim):
+    """
+    Генерация транзакций дропов движком шагов. Транзакции пишутся
+    в файлы как при генерации по одному дропу.
+    ---------------
+    configs: DropDistributorCfg | DropPurchaserCfg. Конфиги и данные для генерации транзакций дропов.
+    drop_sim: DropSimulator. Симулятор этапа. Запись файлов.
+    """
+    drop_sim.all_txns = DropLockstepEngine(configs=configs, drop_type=drop_sim.drop_type).generate()
+    drop_sim.write()
@@ -0,0 +1,88 @@
+# Генерация транзакций дропов в нескольких процессах с разбивкой дропов на шарды
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from data_generator.fraud.drops.build.builder import DropBaseClasses
+from data_generator.fraud.drops.txns import CreateDropTxn
+from data_generator.fraud.drops.simulator import DropSimulator
+from data_generator.refstore import ReferenceStore, attach
+
+
+# Таблицы конфигов дропов общие для всех процессов. Передаются через ReferenceStore.
+# Поля которых нет в конфигах типа дропа пропускаются
+SHARED_TABLES = ("timestamps", "accounts", "client_devices", "online_merchant_ids", "cities", \
+                 "categories", "outer_accounts")
+# Индексы и пулы конфигов дропов. В хранилище пишутся их массивы, объекты собираются в процессе
+SHARED_OBJECTS = ("device_index", "outer_pool", "samplers")
+
+
+# 1.
+
+def split_drops(drops_count, workers):
+    """
+    Разбить позиции дропов на непрерывные диапазоны примерно равного размера.
+    Пустые диапазоны отбрасываются.
+    ---------------
+    drops_count: int. Кол-во дропов.
+    workers: int. Кол-во процессов.
+    """
+    bounds = np.linspace(0, drops_count, workers + 1).astype(int)
+    return [(int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+# 2.
+
+def drop_shard_worker(configs, drop_type, start, end):
+    """
+    Генерация транзакций дропов с позициями от start до end в отдельном процессе.
+    Процесс видит всех дропов этапа: счета дропов до текущего доступны для переводов
+    по расписанию, у каждого дропа своя часть внешних счетов и свой поток случайных
+    чисел. Поэтому результат не зависит от разбивки на шарды.
+    ---------------
+    configs: DropDistributorCfg | DropPurchaserCfg. Конфиги со всеми дропами этапа.
+             Общие таблицы и объекты - ссылки TableRef и ObjectRef, подключаются
+             в процессе через memory map.
+    drop_type: str. 'distributor' или 'purchaser'
+    start: int. Позиция первого дропа шарда.
+    end: int. Позиция после последнего дропа шарда.
+    ---------------
+    Возвращает список транзакций дропов шарда
+    """
+    configs = attach(configs)
+    base = DropBaseClasses(drop_type=drop_type, configs=configs)
+    base.build_all()
+    create_txn = CreateDropTxn(configs=configs, base=base)
+    drop_sim = DropSimulator(base_cfg=None, configs=configs, base=base, \
+                             create_txn=create_txn, txn_recorder=None)
+
+    return drop_sim.simulate(start=start, end=end)
+
+
+# 3.
+
+def gen_drop_txns_parallel(configs, drop_sim):
+    """
+    Генерация транзакций дропов в configs.workers процессах.
+    Транзакции шардов собираются по порядку дропов, затем счета
+    и транзакции пишутся в файлы как при генерации в одном процессе.
+    ---------------
+    configs: DropDistributorCfg | DropPurchaserCfg. Конфиги и данные для генерации транзакций дропов.
+    drop_sim: DropSimulator. Симулятор этапа. Собирает транзакции всех шардов и пишет файлы.
+    """
+    shards = split_drops(drops_count=configs.clients.shape[0], workers=configs.workers)
+    store = ReferenceStore(directory=os.path.join(configs.directory, "refs"))
+    shared_cfg = store.detach(configs=configs, \
+                              names=tuple(name for name in SHARED_TABLES if hasattr(configs, name)), \
+                              objects=tuple(name for name in SHARED_OBJECTS if hasattr(configs, name)))
+
+    try:
+        with ProcessPoolExecutor(max_workers=max(len(shards), 1)) as executor:
+            futures = [executor.submit(drop_shard_worker, shared_cfg, drop_sim.drop_type, start, end) \
+                       for start, end in shards]
+            results = [future.result() for future in futures]
+    finally:
+        store.cleanup()
+
+    drop_sim.all_txns = [txn for shard_txns in results for txn in shard_txns]
+    drop_sim.write()
@@ -2,9 +2,11 @@
 
 import pandas as pd
 import os
+from data_generator.configs import DropDistributorCfg
 from data_generator.fraud.drops.build.builder import DropBaseClasses
 from data_generator.fraud.drops.txns import CreateDropTxn
 from data_generator.fraud.drops.processor import DropBatchHandler
+from data_generator.rng import client_rng
 from pathlib import Path
 
 
@@ -60,7 +62,12 @@ class DropLifecycleManager:
         self.drop_txns = []
         
 
-    def run_drop_lifecycle(self):
+    def iter_drop_lifecycle(self):
+        """
+        Полный жизненный цикл дропа по одной транзакции. Входящая транзакция
+        отдается до обработки батча, транзакции батча - после его обработки.
+        Транзакции одного дропа идут по возрастанию времени.
+        """
         # создать счет дропа, записать is_drop = True в таблице acc_hand.accounts
         acc_hand = self.acc_hand
         # получить номер счета дропа. Пишется в атрибут acc_hand.account
@@ -76,8 +83,7 @@ class DropLifecycleManager:
             # входящая транзакция. Новый батч денег.
             receive_txn = create_txn.trf_or_atm(declined=declined, \
                                                 to_drop=False, receive=True) 
-            drop_txns = self.drop_txns
-            drop_txns.append(receive_txn)
+            yield receive_txn
             # если у дропа достигнут лимит то транзакции отклоняются. 
             # Если входящая отклонена, дропу больше не пытаются послать деньги
             if declined: 
@@ -89,10 +95,16 @@ class DropLifecycleManager:
             batch_hand.process_batch() # обработка полученного батча
 
             txns_fm_batch = batch_hand.txns_fm_batch
-            drop_txns.extend(txns_fm_batch)
-            # сброс кэша после завершения обработки батча
+            # сброс кэша после завершения обработки батча. Список транзакций батча при этом новый
             batch_hand.reset_cache(all=False)
-            
+            yield from txns_fm_batch
+
+
+    def run_drop_lifecycle(self):
+        """
+        Полный жизненный цикл дропа. Транзакции пишутся в self.drop_txns
+        """
+        self.drop_txns.extend(self.iter_drop_lifecycle())
         # Кэш надо сбрасывать вне метода. После его исполнения. Т.к.
         # надо же транзакции записать во внешний список
 
@@ -105,14 +117,19 @@ class DropSimulator:
     ------------------------
     base_cfg: dict. Конфиги из base.yaml
     drop_type: str. 'distributor' или 'purchaser'
+    seed: int. Seed запуска. Ключ потоков случайных чисел дропов.
+    base: DropBaseClasses. Объекты основных классов для дропов.
+    create_txn: CreateDropTxn. Создание транзакций.
     drop_clients: pd.DataFrame. Клиенты которые будут дропами.
     part_data: DropTxnPartData. Генерация части данных транзакции.
     acc_hand: DropAccountHandler. Генератор номеров счетов входящих/исходящих 
               транзакций. Учет использованных счетов.
+    outer_pools: list. Части пула внешних счетов - своя у каждого дропа по порядку
+                 drop_clients. Только для дропов распределителей, иначе None.
     txn_recorder: FraudTxnsRecorder. Запись транзакций в файл.
     life_manager: DropLifecycleManager. Управление полным жизненный циклом
                   одного дропа.
-    all_txns: list. Список для записи всех созданных транзакций.
+    all_txns: list | pd.DataFrame. Все созданные транзакции. Датафрейм - от движка lockstep.
     txns_df: pd.DataFrame. Пустой датафрейм с колонками и проставленными типами
     """
 
@@ -123,9 +140,14 @@ class DropSimulator:
                  Конфиги и данные для создания дроп транзакций.
         base: Объекты основных классов для дропов. 
         create_txn: CreateDropTxn. Создание транзакций.
+        txn_recorder: FraudTxnsRecorder. None - если симулятор только генерирует
+                      транзакции части дропов, например в отдельном процессе.
         """
         self.base_cfg = base_cfg
         self.drop_type = base.drop_type
+        self.seed = configs.seed
+        self.base = base
+        self.create_txn = create_txn
         self.drop_clients = configs.clients
         self.part_data = base.part_data
         self.acc_hand = base.acc_hand
@@ -134,35 +156,68 @@ class DropSimulator:
         self.life_manager = DropLifecycleManager(base=base, create_txn=create_txn)
         self.run_dir = configs.run_dir
         self.all_txns = []
+
+        # Все дропы этапа в расписании по порядку. Дроп доступен для переводов другим дропам
+        # с начала своей генерации - результат одинаков при любой разбивке дропов на процессы
+        self.acc_hand.registry.schedule(client_ids=self.drop_clients.client_id.tolist())
+        # У каждого дропа своя часть внешних счетов на худший случай. Зависит только
+        # от его позиции в drop_clients - результат одинаков при любом кол-ве процессов
+        self.outer_pools = None
+        if isinstance(configs, DropDistributorCfg):
+            self.outer_pools = configs.outer_pool.split(parts=self.drop_clients.shape[0], \
+                                                        size=configs.outer_per_drop)
     
 
-    def run(self):
+    def simulate(self, start=0, end=None):
         """
-        Полная генерация активности дропов соответсвующего типа
+        Генерация активности дропов с позициями от start до end в drop_clients.
+        ---------------
+        start: int. Позиция первого дропа.
+        end: int. Позиция после последнего дропа. None - до конца.
+        ---------------
+        Возвращает список транзакций этих дропов
         """
-        drop_clients = self.drop_clients
         part_data = self.part_data
         acc_hand = self.acc_hand
         life_manager = self.life_manager
-        all_txns = self.all_txns
-        txn_recorder = self.txn_recorder
+        outer_pools = self.outer_pools
+        sim_txns = []
 
         # Итерируемся через семплированных клиентов под дроп
-        for client in drop_clients.itertuples():
+        for drop_num, client in enumerate(self.drop_clients.iloc[start:end].itertuples(), start=start):
             # Запись данных текущего клиента в атрибуты
             # некоторых классов
             part_data.client_info = client
             acc_hand.client_id = client.client_id
+            if outer_pools is not None:
+                acc_hand.outer_pool = outer_pools[drop_num]
+            # Свой поток случайных чисел у каждого дропа. Буферизованный - у дропа много скалярных выборок
+            rng = client_rng(seed=self.seed, stage=self.drop_type, client_id=client.client_id, buffered=True)
+            self.base.set_rng(rng)
+            self.create_txn.rng = rng
 
             # Генерация полного цикла активности одного дропа
             life_manager.run_drop_lifecycle()
             # Запись транзакций дропа в общий список
-            drop_txns = life_manager.drop_txns
-            all_txns.extend(drop_txns)
+            sim_txns.extend(life_manager.drop_txns)
 
             # Сброс кэша дропа для следующей итерации
             life_manager.reset_all_caches()
-        
+
+        return sim_txns
+
+
+    def write(self):
+        """
+        Запись счетов с отмеченными дропами и всех транзакций self.all_txns в файлы
+        """
+        acc_hand = self.acc_hand
+        txn_recorder = self.txn_recorder
+
+        # Все дропы этапа отмечены в accounts. В т.ч. сгенерированные в других процессах
+        for client_id in self.drop_clients.client_id.tolist():
+            acc_hand.registry.label_drop(client_id=client_id)
+
         # Запись измененного датафрейма accounts в csv файл в двух экземплярах
         # В папку data/generated/latest и в папку текущей генерации 
         accounts = acc_hand.accounts
@@ -175,4 +230,12 @@ class DropSimulator:
         # Запись всех созданных транзакций дропов в parquet файл
         txn_recorder.all_txns = pd.DataFrame(self.all_txns)
         
-        txn_recorder.write_to_file() # Это уже метод FraudTxnsRecorder
\ No newline at end of file
+        txn_recorder.write_to_file() # Это уже метод FraudTxnsRecorder
+
+
+    def run(self):
+        """
+        Полная генерация активности дропов соответсвующего типа в одном процессе
+        """
+        self.all_txns = self.simulate()
+        self.write()
@@ -5,6 +5,7 @@ from typing import Union
 
 from data_generator.fraud.time import derive_from_last_time
 from data_generator.configs import DropDistributorCfg, DropPurchaserCfg
+from data_generator.rng import get_rng
 
 
 class DropTimeHandler:
@@ -15,6 +16,7 @@ class DropTimeHandler:
     --------
     configs - DropDistributorCfg | DropPurchaserCfg. Датакласс с конфигами и данными для транзакций.
     timestamps - pd.DataFrame. Диапазон timestamp-ов с колонками: | timestamp | unix_time | hour |
+    stamps_unix - np.ndarray. unix время из timestamps. Для семплирования времени первой транзакции.
     start_unix - int. Во сколько была первая транзакция в периоде. Нужная для отсчета следующего периода
                  активности. Unix время в секундах. По умолчанию 0.
     last_unix - int. Время последней транзакции. Unix время в секундах. По умолчанию 0.
@@ -22,6 +24,10 @@ class DropTimeHandler:
     out_lim - int. Количество исходящих транзакций после которых дроп уходит на паузу.
     in_txns - int. Количество входящих транзакций в периоде активности. По умолчанию 0.
     out_txns - int. Количество исходящих транзакций в периоде активности. По умолчанию 0.
+    first_unix - int. Заданное заранее время первой транзакции дропа. Unix время в секундах.
+                 По умолчанию None - время семплируется из timestamps.
+    rng - np.random.Generator. Генератор случайных чисел текущего дропа.
+         По умолчанию None - генератор по умолчанию.
     """
     def __init__(self, configs: Union[DropDistributorCfg, DropPurchaserCfg]):
         """ 
@@ -34,12 +40,15 @@ class DropTimeHandler:
         """
         self.configs = configs
         self.timestamps = configs.timestamps
+        self.stamps_unix = configs.timestamps.unix_time.to_numpy(dtype=np.int64)
         self.start_unix = 0
         self.last_unix = 0
         self.in_lim = configs.period_in_lim
         self.out_lim = configs.period_out_lim
         self.in_txns = 0
         self.out_txns = 0
+        self.first_unix = None
+        self.rng = None
 
 
     def get_time_delta(self, two_way, minutes=True):
@@ -52,11 +61,11 @@ class DropTimeHandler:
         if two_way:
             two_way_min = self.configs.two_way_delta["min"]
             two_way_max = self.configs.two_way_delta["max"]
-            delta = np.random.uniform(two_way_min, two_way_max)
+            delta = get_rng(self.rng).uniform(two_way_min, two_way_max)
         else:
             pos_min = self.configs.pos_delta["min"]
             pos_max = self.configs.pos_delta["max"]
-            delta = np.random.uniform(pos_min, pos_max)
+            delta = get_rng(self.rng).uniform(pos_min, pos_max)
 
         if minutes:
             return round(delta)
@@ -102,16 +111,23 @@ class DropTimeHandler:
         receive: bool. Текущая транзакция будет входящей или исходящей.
         in_txns: int. Абсолютное количество входящих транзакций на текущий момент, 
                  не считая генерируемую.
+        ------------------
+        Возвращает unix время транзакции в секундах
         """
 
         # Если это самая первая транзакция. Т.к. активность дропа начинается с входящей транзакции
+        if receive and in_txns == 0 and self.first_unix is not None:
+            self.last_unix = int(self.first_unix)
+            self.start_unix = self.last_unix
+            self.in_txns += 1
+            return self.last_unix
+
         if receive and in_txns == 0:
-            time_sample = self.timestamps.sample(1)
-            txn_time = time_sample.timestamp.iat[0]
-            self.last_unix = time_sample.unix_time.iat[0]
+            stamps_unix = self.stamps_unix
+            self.last_unix = int(stamps_unix[get_rng(self.rng).integers(0, stamps_unix.shape[0])])
             self.start_unix = self.last_unix
             self.in_txns += 1
-            return txn_time, self.last_unix
+            return self.last_unix
 
         # Условия для не первых транзакций
 
@@ -127,9 +143,9 @@ class DropTimeHandler:
             self.txns_count(receive=receive, reset=True)
             # Создаем время и записываем его как время последней транзакции в целом
             # и как время первой транзакции в новом периоде
-            last_time, self.last_unix = derive_from_last_time(last_txn_unix=self.start_unix, lag_interval=lag_interval)
+            self.last_unix = derive_from_last_time(last_txn_unix=self.start_unix, lag_interval=lag_interval)
             self.start_unix = self.last_unix
-            return last_time, self.last_unix
+            return self.last_unix
 
         # Если достигнут лимит исходящих транзакций для периода активности
         elif self.out_txns == self.out_lim:
@@ -139,19 +155,19 @@ class DropTimeHandler:
             self.txns_count(receive=receive, reset=True)
             # Создаем время и записываем его как время последней транзакции в целом
             # и как время первой транзакции в новом периоде
-            last_time, self.last_unix = derive_from_last_time(last_txn_unix=self.start_unix, lag_interval=lag_interval)
+            self.last_unix = derive_from_last_time(last_txn_unix=self.start_unix, lag_interval=lag_interval)
             self.start_unix = self.last_unix
-            return last_time, self.last_unix
+            return self.last_unix
 
         # Тоже дельта, но не может быть <= 0 т.к. тут мы ее используем как lag_interval
         # Это для случаев когда транзакция совершается в тот же период активности что и последняя
         time_delta = self.get_time_delta(two_way=False)
         # print(time_delta)
-        last_time, self.last_unix = derive_from_last_time(last_txn_unix=self.last_unix, lag_interval=time_delta)
+        self.last_unix = derive_from_last_time(last_txn_unix=self.last_unix, lag_interval=time_delta)
         # +1 к счетчику соответствующего типа
         self.txns_count(receive=receive, reset=False)
 
-        return last_time, self.last_unix
+        return self.last_unix
     
 
     def reset_cache(self):
@@ -163,4 +179,4 @@ class DropTimeHandler:
         self.last_unix = 0
         self.in_txns = 0
         self.out_txns = 0
-        
\ No newline at end of file
+        self.first_unix = None
\ No newline at end of file
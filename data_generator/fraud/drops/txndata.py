@@ -4,6 +4,7 @@ import numpy as np
 from typing import Union
 
 from data_generator.configs import DropDistributorCfg, DropPurchaserCfg
+from data_generator.rng import get_rng
 
 
 class DropTxnPartData:
@@ -15,8 +16,10 @@ class DropTxnPartData:
     --------
     client_info - pd.DataFrame или namedtuple. Запись с информацией о клиенте
     online_merchant_ids- pd.Series. id онлайн мерчантов
-    client_devices - pd.DataFrame. Девайсы клиентов.
+    device_index - ClientDeviceIndex. Индекс девайсов клиентов по client_id.
     last_txn - tuple. Для кэширования данных любой последней транзакции.
+    rng - np.random.Generator. Генератор случайных чисел текущего дропа.
+         По умолчанию None - генератор по умолчанию.
     """
     def __init__(self, configs: Union[DropDistributorCfg, DropPurchaserCfg]):
         """
@@ -25,8 +28,9 @@ class DropTxnPartData:
         """
         self.client_info = None
         self.online_merchant_ids = configs.online_merchant_ids
-        self.client_devices = configs.client_devices
+        self.device_index = configs.device_index
         self.last_txn = None
+        self.rng = None
 
 
     def assert_client_info(self):
@@ -53,15 +57,14 @@ class DropTxnPartData:
             return self.last_txn
 
         if online:
-            merchant_id = self.online_merchant_ids.sample(n=1).iat[0]
+            merchant_id = self.online_merchant_ids.sample(n=1, random_state=get_rng(self.rng)).iat[0]
             # Координаты города и название
             trans_lat = self.client_info.lat
             trans_lon = self.client_info.lon
             trans_ip = self.client_info.home_ip
             trans_city = self.client_info.city        
             # Семпл девайса клиента
-            devices = self.client_devices.loc[self.client_devices.client_id == self.client_info.client_id]
-            device_id = devices.device_id.sample(1).iloc[0]
+            device_id = self.device_index.sample(client_id=self.client_info.client_id, rng=get_rng(self.rng))
             txn_type = "purchase"
             # Не генерируем channel. Он должен быть определен вовне
             channel = None
@@ -98,13 +101,11 @@ class DropTxnPartData:
             return self.last_txn
         
         client_info = self.client_info
-        client_devices = self.client_devices
         # Исходящий перевод
         if online:
             # Для онлайна просто берется home_ip и device_id из данных клиента.
             trans_ip = client_info.home_ip
-            devices = client_devices.loc[client_devices.client_id == client_info.client_id]
-            device_id = devices.device_id.sample(1).iloc[0]
+            device_id = self.device_index.sample(client_id=client_info.client_id, rng=get_rng(self.rng))
             channel = "transfer"
             txn_type = "outbound"  
 
@@ -5,6 +5,7 @@ from typing import Union
 from data_generator.configs import DropDistributorCfg, DropPurchaserCfg
 from data_generator.fraud.drops.build.builder import DropBaseClasses
 from data_generator.utils import build_transaction
+from data_generator.rng import get_rng
 
 
 class CreateDropTxn:
@@ -22,6 +23,7 @@ class CreateDropTxn:
     time_hand: DropTimeHandler. Управление временем транзакций дропа
     behav_hand: DistBehaviorHandler. Управление поведением дропа.
     categories: pd.DataFrame. Категории товаров с весами. Для дропов покупателей.
+    samplers: SamplerRegistry. Alias таблица категорий по весам. Для дропов покупателей.
     in_txns: int. Количество входящих транзакций.
     out_txns: int. Количество исходящих транзакций.
     in_lim: int. Лимит входящих транзакций. Транзакции клиента совершенные после 
@@ -29,6 +31,8 @@ class CreateDropTxn:
     out_lim: int. Лимит исходящих транзакций. Транзакции клиента совершенные 
                 после достижения этого лимита отклоняются.
     last_txn: dict. Полные данные последней транзакции. По умолчанию None
+    rng: np.random.Generator. Генератор случайных чисел текущего дропа.
+         По умолчанию None - генератор по умолчанию.
     """
     def __init__(self, configs: Union[DropDistributorCfg, DropPurchaserCfg], base: DropBaseClasses):
         """
@@ -49,7 +53,9 @@ class CreateDropTxn:
         self.out_lim = configs.out_lim
         if isinstance(self.configs, DropPurchaserCfg):
             self.categories = configs.categories
+            self.samplers = configs.samplers
         self.last_txn = None
+        self.rng = None
 
 
     def category_and_channel(self):
@@ -71,8 +77,7 @@ class CreateDropTxn:
         
         # Покупка в интернете
         channel = "ecom"
-        category_name = self.categories.category \
-                            .sample(1, replace=True, weights=self.categories.weight).iat[0]
+        category_name = self.samplers.draw(key="categories", rng=get_rng(self.rng))
         return channel, category_name
 
 
@@ -121,7 +126,7 @@ class CreateDropTxn:
         client_id = self.txn_part_data.client_info.client_id # берем из namedtuple
         
         # Время транзакции. Оно должно быть создано до увеличения счетчика self.in_txns
-        txn_time, txn_unix = self.time_hand.get_txn_time(receive=receive, in_txns=self.in_txns)
+        txn_unix = self.time_hand.get_txn_time(receive=receive, in_txns=self.in_txns)
 
         online = self.behav_hand.online
         in_chunks = self.behav_hand.in_chunks
@@ -135,7 +140,7 @@ class CreateDropTxn:
         # перевод от дропа    
         elif not receive and online:
             self.out_txns += 1
-            account = self.acc_hand.get_account(to_drop=to_drop)
+            account = self.acc_hand.get_account(to_drop=to_drop, txn_unix=txn_unix)
         # снятие дропом
         elif not receive and not online:
             account = self.acc_hand.account
@@ -158,7 +163,7 @@ class CreateDropTxn:
         category_name="not applicable"
 
         # Сборка всех данных в транзакцию и запись как последней транзакции
-        self.last_txn = build_transaction(client_id=client_id, txn_time=txn_time, txn_unix=txn_unix, amount=amount, \
+        self.last_txn = build_transaction(client_id=client_id, txn_unix=txn_unix, amount=amount, \
                                           txn_type=txn_type, channel=channel, category_name=category_name, online=online, \
                                           merchant_id=merchant_id, trans_city=trans_city, trans_lat=trans_lat, \
                                           trans_lon=trans_lon, trans_ip=trans_ip, device_id=device_id, account=account, \
@@ -179,7 +184,7 @@ class CreateDropTxn:
         receive = False
 
         # Время транзакции
-        txn_time, txn_unix = self.time_hand.get_txn_time(receive=receive, in_txns=self.in_txns)
+        txn_unix = self.time_hand.get_txn_time(receive=receive, in_txns=self.in_txns)
         online = self.behav_hand.online
         # self.behav_hand.in_chunks_val() вызывается вовне. До захода в цикл while balance > 0
         in_chunks = self.behav_hand.in_chunks
@@ -206,7 +211,7 @@ class CreateDropTxn:
         account = np.nan
 
         # Сборка всех данных в транзакцию и запись как послдней транзакции
-        self.last_txn = build_transaction(client_id=client_id, txn_time=txn_time, txn_unix=txn_unix, amount=amount, \
+        self.last_txn = build_transaction(client_id=client_id, txn_unix=txn_unix, amount=amount, \
                                           txn_type=txn_type, channel=channel, category_name=category_name, online=online, \
                                           merchant_id=merchant_id, trans_city=trans_city, trans_lat=trans_lat, \
                                           trans_lon=trans_lon, trans_ip=trans_ip, device_id=device_id, account=account, \
@@ -0,0 +1,223 @@
+# Пулы фрод IP адресов и девайсов для выборки без возвращения
+import numpy as np
+
+from data_generator.rng import get_rng
+
+
+# 1. Пул значений без возвращения
+
+class DrawPool:
+    """
+    Перемешанный один раз пул значений. Выборка без возвращения - это
+    сдвиг курсора, сброс - курсор в начало. Обе операции O(1).
+    ---------
+    Атрибуты:
+    ---------
+    values: np.ndarray. Перемешанные значения пула.
+    cursor: int. Позиция следующего неиспользованного значения.
+    """
+    def __init__(self, values, rng=None, shuffle=True):
+        """
+        values: array-like. Значения пула.
+        rng: np.random.Generator. Генератор для перемешивания. None - генератор по умолчанию.
+        shuffle: bool. Перемешать значения. False - значения уже перемешаны, например часть другого пула.
+        """
+        values = np.asarray(values)
+        self.values = values[get_rng(rng).permutation(values.shape[0])] if shuffle else values
+        self.cursor = 0
+
+
+    def to_arrays(self):
+        """
+        Значения пула для ReferenceStore.
+        ---------------
+        Возвращает (массивы, скалярные параметры)
+        """
+        return {"values": self.values}, {"cursor": self.cursor}
+
+
+    @classmethod
+    def from_arrays(cls, values, cursor=0):
+        """
+        Пул из уже перемешанных значений to_arrays.
+        ---------------
+        values: np.ndarray. Перемешанные значения пула.
+        cursor: int. Позиция следующего неиспользованного значения.
+        """
+        pool = cls(values=values, shuffle=False)
+        pool.cursor = cursor
+        return pool
+
+
+    @property
+    def remaining(self):
+        """
+        Кол-во неиспользованных значений.
+        """
+        return self.values.shape[0] - self.cursor
+
+
+    def pop(self):
+        """
+        Взять следующее неиспользованное значение.
+        """
+        if self.cursor == self.values.shape[0]:
+            raise ValueError(f"Pool of {self.values.shape[0]} values is exhausted")
+        value = self.values[self.cursor]
+        self.cursor += 1
+        return value
+
+
+    def take(self, size):
+        """
+        Взять size следующих неиспользованных значений одним срезом.
+        ---------------
+        size: int. Кол-во значений.
+        """
+        if size > self.remaining:
+            raise ValueError(f"Pool has {self.remaining} unused values, {size} requested")
+        values = self.values[self.cursor:self.cursor + size]
+        self.cursor += size
+        return values
+
+
+    def split_bounds(self, parts, size=None):
+        """
+        Границы parts непрерывных частей неиспользованных значений почти равного размера.
+        Первые части на одно значение больше, если значения не делятся поровну.
+        ---------------
+        parts: int. Кол-во частей.
+        size: int. Размер каждой части. None - все значения делятся поровну.
+        ---------------
+        Возвращает np.ndarray из parts + 1 смещений от курсора
+        """
+        if size is not None:
+            if parts * size > self.remaining:
+                raise ValueError(f"Pool has {self.remaining} unused values, "
+                                 f"{parts} parts of {size} requested")
+            return np.arange(parts + 1, dtype=np.int64) * size
+        if parts < 1:
+            raise ValueError(f"Pool can't be split into {parts} parts")
+        size, extra = divmod(self.remaining, parts)
+        sizes = np.full(parts, size, dtype=np.int64)
+        sizes[:extra] += 1
+        return np.concatenate(([0], np.cumsum(sizes)))
+
+
+    def split(self, parts, size=None):
+        """
+        Разбить неиспользованные значения на parts непрерывных пулов почти равного размера.
+        Каждая часть - свой пул со своим курсором. Разбиение зависит только от parts и size.
+        ---------------
+        parts: int. Кол-во частей.
+        size: int. Размер каждой части. None - все значения делятся поровну.
+        """
+        values = self.values[self.cursor:]
+        bounds = self.split_bounds(parts=parts, size=size)
+        return [DrawPool(values=values[start:end], shuffle=False) \
+                for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+    def reset(self):
+        """
+        Все значения снова неиспользованные.
+        """
+        self.cursor = 0
+
+
+# 2. Пул фрод IP адресов с разбиением по городам
+
+class CityIpPool:
+    """
+    Фрод IP адреса перемешанные и разбитые по городам. У каждого города
+    свой непрерывный диапазон в массивах и свой курсор. IP в городе клиента -
+    сдвиг курсора города. IP в другом городе - выбор города пропорционально
+    кол-ву оставшихся в нем IP (O(кол-во городов)), затем сдвиг его курсора.
+    Так IP выбирается с равной вероятностью среди всех неиспользованных IP
+    других городов, как при семплировании из отфильтрованного датафрейма.
+    ---------
+    Атрибуты:
+    ---------
+    fraud_ip: np.ndarray. IP адреса, сгруппированные по городам.
+    lat: np.ndarray. Широта города IP.
+    lon: np.ndarray. Долгота города IP.
+    city: np.ndarray. Город IP.
+    cities: np.ndarray. Уникальные города.
+    starts: np.ndarray. Начала диапазонов городов.
+    ends: np.ndarray. Концы диапазонов городов.
+    cursors: np.ndarray. Позиции следующего неиспользованного IP каждого города.
+    positions: dict. Город -> позиция города в cities.
+    """
+    def __init__(self, fraud_ips, rng=None):
+        """
+        fraud_ips: pd.DataFrame. Фрод IP с колонками city, lat, lon, fraud_ip.
+        rng: np.random.Generator. Генератор для перемешивания. None - генератор по умолчанию.
+        """
+        shuffled = fraud_ips.iloc[get_rng(rng).permutation(fraud_ips.shape[0])]
+        # Стабильная сортировка по городу сохраняет перемешанный порядок внутри города
+        ips = shuffled.sort_values("city", kind="stable")
+
+        self.fraud_ip = ips["fraud_ip"].to_numpy()
+        self.lat = ips["lat"].to_numpy(dtype=np.float64)
+        self.lon = ips["lon"].to_numpy(dtype=np.float64)
+        self.city = ips["city"].to_numpy()
+        self.cities, starts = np.unique(self.city, return_index=True)
+        self.starts = starts.astype(np.int64)
+        self.ends = np.append(self.starts[1:], self.city.shape[0]).astype(np.int64)
+        self.cursors = self.starts.copy()
+        self.positions = dict(zip(self.cities.tolist(), range(self.cities.shape[0])))
+
+
+    def pop_at(self, city_pos):
+        """
+        Взять следующий неиспользованный IP города.
+        ---------------
+        city_pos: int. Позиция города в cities.
+        ---------------
+        Возвращает (fraud_ip, lat, lon, city)
+        """
+        i = self.cursors[city_pos]
+        if i == self.ends[city_pos]:
+            raise ValueError(f"No unused fraud IPs left in city {self.cities[city_pos]}")
+        self.cursors[city_pos] += 1
+        return self.fraud_ip[i], self.lat[i], self.lon[i], self.city[i]
+
+
+    def same_city(self, city):
+        """
+        Неиспользованный IP в указанном городе.
+        ---------------
+        city: str. Город.
+        """
+        city_pos = self.positions.get(city)
+        if city_pos is None:
+            raise ValueError(f"No fraud IPs for city {city}")
+        return self.pop_at(city_pos)
+
+
+    def another_city(self, city, rng=None):
+        """
+        Неиспользованный IP в любом городе кроме указанного.
+        ---------------
+        city: str. Город который нужно исключить.
+        rng: np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию.
+        """
+        remaining = self.ends - self.cursors
+        city_pos = self.positions.get(city)
+        if city_pos is not None:
+            remaining[city_pos] = 0
+
+        total = remaining.sum()
+        if total == 0:
+            raise ValueError(f"No unused fraud IPs left outside city {city}")
+
+        # Город с вероятностью пропорциональной кол-ву оставшихся в нем IP
+        draw = get_rng(rng).integers(0, total)
+        return self.pop_at(int(np.searchsorted(np.cumsum(remaining), draw, side="right")))
+
+
+    def reset(self):
+        """
+        Все IP снова неиспользованные.
+        """
+        self.cursors[:] = self.starts
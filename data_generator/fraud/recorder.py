@@ -2,6 +2,8 @@
 
 import os
 
+from data_generator.general_time import add_txn_time
+
 class FraudTxnsRecorder:
     """
     Запись фрод транзакций в файл.
@@ -47,11 +49,12 @@ class FraudTxnsRecorder:
         Пишем в две директории:
         data/generated/history/<текущий_запуск>/<тип_фрода>
         и data/generated/latest/ 
+        Колонка txn_time создается из unix_time перед записью.
         """
         # Создаем полный путь для записи в папку текущей генерации
         file_name = self.txns_file_name
         path_history = os.path.join(self.directory, f"{file_name}")
-        all_txns = self.all_txns
+        all_txns = add_txn_time(self.all_txns)
         all_txns.to_parquet(path_history, engine="pyarrow")
         
         # Берем полный путь из категории "generated" и по ключу latest
@@ -1,15 +1,13 @@
 # Общие функции времени для фрода
 
-import pandas as pd
-import numpy as np
-
 from data_generator.utils import get_values_from_truncnorm
+from data_generator.rng import get_rng
 
 
 # 1. Подфункция генерации времени c прибавлением к времени последней транзакции derive_from_last_time
 
 def derive_from_last_time(last_txn_unix, lag_interval=0, min=0, max=0, random_lag=False, \
-                          geo_distance=0, threshold=800):
+                          geo_distance=0, threshold=800, rng=None):
     """
     Создать время основываясь на времени последней транзакции.
     Либо на основании гео дистанции между транзакциями либо на основании заданного лага по времени.
@@ -24,25 +22,25 @@ def derive_from_last_time(last_txn_unix, lag_interval=0, min=0, max=0, random_la
     geo_distance - int. Расстояние между координатами текущей и последней транзакции в километрах.
     threshold - int. Максимальная допустимая скорость перемещения км/ч между совершением транзакций,
                      для случаев когда расстояние больше 500 километров.
+    rng - np.random.Generator. Генератор случайных чисел клиента. None - генератор по умолчанию.
     ---------------
     Возвращает unix время в секундах
     """
     # Перевод в секунды для расчетов
     lag_interval = lag_interval * 60
+    rng = get_rng(rng)
 
     if random_lag:
-        lag_interval = np.random.randint(min, max) * 60
+        lag_interval = int(rng.integers(min, max)) * 60
 
     if geo_distance == 0:
-        txn_unix = last_txn_unix + lag_interval
-        txn_time = pd.to_datetime(txn_unix, unit="s")
-        return txn_time, txn_unix
+        return last_txn_unix + lag_interval
     
     if geo_distance <= 500:
         mean = 90
         std = 20
         speed = get_values_from_truncnorm(low_bound=50, high_bound=120, \
-                                          mean=mean, std=std).astype("int")[0]
+                                          mean=mean, std=std, rng=rng).astype("int")[0]
         # Расчет добавления времени и перевод в секунды
         lag_interval = round((geo_distance / speed) * 3600)
 
@@ -50,11 +48,8 @@ def derive_from_last_time(last_txn_unix, lag_interval=0, min=0, max=0, random_la
         mean = 300
         std = 200
         speed = get_values_from_truncnorm(low_bound=50, high_bound=threshold, \
-                                          mean=mean, std=std).astype("int")[0]
+                                          mean=mean, std=std, rng=rng).astype("int")[0]
         # Расчет добавления времени и перевод в секунды
         lag_interval = round((geo_distance / speed) * 3600)
 
-    txn_unix = last_txn_unix + lag_interval
-    txn_time = pd.to_datetime(txn_unix, unit="s")
-        
-    return txn_time, txn_unix
\ No newline at end of file
+    return last_txn_unix + lag_interval
\ No newline at end of file
@@ -8,11 +8,15 @@ from scipy.stats import truncnorm
 from collections import defaultdict
 import math
 
+from data_generator.rng import get_rng
+
 
 # 1. Круглосуточные оффлайн legit транзакции offline_24h_legit_time_dist
 # - Распределение времени для легитимных транзакций в круглосуточных оффлайн категориях
 
-def offline_24h_legit_time_dist():
+def offline_24h_legit_time_dist(rng=None):
+    # Генератор случайных чисел. None - генератор по умолчанию
+    rng = get_rng(rng)
     # Время в минутах с начала суток
     start, end = 0, 1439  # 00:00 до 23:59
     
@@ -26,7 +30,7 @@ def offline_24h_legit_time_dist():
     
     # Truncated normal - пик утро
     dist_morn = truncnorm((morn_start - mean_morn)/ std_morn, (end - mean_morn) / std_morn, loc=mean_morn, scale=std_morn)
-    minutes_morn = dist_morn.rvs(3000).astype(int)
+    minutes_morn = dist_morn.rvs(3000, random_state=rng).astype(int)
     
     # небольшой пик обед в районе 13. Обрезанный по 16-и часам справа
     mean_noon = 14 * 60
@@ -35,7 +39,7 @@ def offline_24h_legit_time_dist():
     
     # Truncated normal - пик обед
     dist_noon = truncnorm((start - mean_noon)/ std_noon, (noon_end - mean_noon) / std_noon, loc=mean_noon, scale=std_noon)
-    minutes_noon = dist_noon.rvs(5000).astype(int)
+    minutes_noon = dist_noon.rvs(5000, random_state=rng).astype(int)
     
     
     # Вечерний пик. В районе 19 часов
@@ -46,10 +50,10 @@ def offline_24h_legit_time_dist():
     
     # Truncated normal - пик вечером
     dist_evn = truncnorm((evn_start - mean_evn) / std_evn, (evn_end - mean_evn) / std_evn, loc=mean_evn, scale=std_evn)
-    minutes_evn = dist_evn.rvs(9000).astype(int)
+    minutes_evn = dist_evn.rvs(9000, random_state=rng).astype(int)
     
     # ночная равномерная небольшая активность с 0 до 6:50 утра включительно
-    night_hours_add =  np.array([np.random.uniform(0, 710) for _ in range(300)]).astype(int)
+    night_hours_add =  np.array([rng.uniform(0, 710) for _ in range(300)]).astype(int)
     
     # соединяем все созданные массивы в один
     minutes = np.concatenate((minutes_morn, minutes_noon, minutes_evn, night_hours_add), axis=0) #  
@@ -66,16 +70,18 @@ def offline_24h_legit_time_dist():
 # 2. Круглосуточные оффлайн категории - фрод.
 # - фрод транзакции в круглосуточных оффлайн категориях
 
-def offline_24h_fraud_time_dist():
+def offline_24h_fraud_time_dist(rng=None):
+    # Генератор случайных чисел. None - генератор по умолчанию
+    rng = get_rng(rng)
     
     # название паттерна. Пригодится если нужно построить график распределения
     title = "Offline. 24h. Fraud"
     
     # равномерная активность с 8 до 23
-    day_time =  np.array([np.random.uniform(8, 23.9) for _ in range(500)]).astype(int)
+    day_time =  np.array([rng.uniform(8, 23.9) for _ in range(500)]).astype(int)
     
     # равномерная сниженная активность с 0 до 8
-    night_time = np.array([np.random.uniform(0, 7.9) for _ in range(120)]).astype(int)
+    night_time = np.array([rng.uniform(0, 7.9) for _ in range(120)]).astype(int)
     
     # соединяем все созданные массивы в один и делаем серией
     time_hours = pd.Series(np.concatenate((day_time, night_time), axis=0), name="hours")
@@ -85,13 +91,15 @@ def offline_24h_fraud_time_dist():
 
 # 3. Онлайн категории, НЕ фрод online_legit_time_dist
 
-def online_legit_time_dist():
+def online_legit_time_dist(rng=None):
+    # Генератор случайных чисел. None - генератор по умолчанию
+    rng = get_rng(rng)
     
     # название паттерна. Пригодится если нужно построить график распределения
     title = "Online. Legit"
     
     # Первый слой. равномерно с утра до вечера. с 8:00 до 16:59
-    day_time = np.array([np.random.uniform(8*60, 16.9*60) for _ in range(500)]).astype(int)
+    day_time = np.array([rng.uniform(8*60, 16.9*60) for _ in range(500)]).astype(int)
     
     
     # небольшой пик обед в районе 13. Обрезанный по 12 и 17 часам
@@ -102,7 +110,7 @@ def online_legit_time_dist():
     
     # пик обед. Распределение
     dist_noon = truncnorm((noon_start - mean_noon)/ std_noon, (noon_end - mean_noon) / std_noon, loc=mean_noon, scale=std_noon)
-    minutes_noon = dist_noon.rvs(400).astype(int)
+    minutes_noon = dist_noon.rvs(400, random_state=rng).astype(int)
     
     
     # Вечерний пик. От 17 до 23 часов.
@@ -113,10 +121,10 @@ def online_legit_time_dist():
     
     # пик вечером. Распределение
     dist_evn = truncnorm((evn_start - mean_evn) / std_evn, (evn_end - mean_evn) / std_evn, loc=mean_evn, scale=std_evn)
-    minutes_evn = dist_evn.rvs(2000).astype(int)
+    minutes_evn = dist_evn.rvs(2000, random_state=rng).astype(int)
     
     # ночная равномерная низкая активность с 0 до 7:59 утра
-    night_hours_add = np.array([np.random.uniform(0, 7.9*60) for _ in range(200)]).astype(int)
+    night_hours_add = np.array([rng.uniform(0, 7.9*60) for _ in range(200)]).astype(int)
     
     # соединяем все созданные массивы в один
     minutes = np.concatenate((day_time, minutes_noon, minutes_evn, night_hours_add), axis=0) #  
@@ -129,7 +137,9 @@ def online_legit_time_dist():
 
 # 4. Онлайн фрод
 
-def online_fraud_time_dist():
+def online_fraud_time_dist(rng=None):
+    # Генератор случайных чисел. None - генератор по умолчанию
+    rng = get_rng(rng)
     # Время в минутах с начала суток. В данном случае нужно для ограничения распределения в рамках 24 часов.
     start, end = 0, 1439  # 00:00 до 23:59
 
@@ -143,7 +153,7 @@ def online_fraud_time_dist():
     # распределение ночного пика с максимумом примерно в первом часу суток: 00:00-00:59.
     # Обрезка распределения слева по 00:00
     dist = truncnorm((start - mean) / std, (end - mean) / std, loc=mean, scale=std)
-    minutes = dist.rvs(2000).astype(int)
+    minutes = dist.rvs(2000, random_state=rng).astype(int)
     
     # Добавляем вечернюю активность - обрезка справа в 0 часов. Ограничиваем значения 00:00 часами справа
     mean_evn = 23.9*60
@@ -151,12 +161,12 @@ def online_fraud_time_dist():
     evn_end = 23.9*60
     
     dist_evn = truncnorm((start - mean_evn) / std_evn, (evn_end - mean_evn) / std_evn, loc=mean_evn, scale=std_evn)
-    minutes_evn = dist_evn.rvs(2000).astype(int)
+    minutes_evn = dist_evn.rvs(2000, random_state=rng).astype(int)
     
     # добавим небольшое количество равномерных значений на протяжении дня, с 4 до 20 включительно
     mid_start = 4 * 60
     mid_end = 20.9 * 60
-    midday_add =  np.array([np.random.uniform(mid_start, mid_end) for _ in range(4250)]).astype(int)
+    midday_add =  np.array([rng.uniform(mid_start, mid_end) for _ in range(4250)]).astype(int)
     
     # соединяем все три массива
     total_minutes = np.concatenate((minutes, midday_add, minutes_evn)) # 
@@ -169,13 +179,15 @@ def online_fraud_time_dist():
 
 # 5. Дневной оффлайн, легитимные транзакции.
 
-def offline_day_legit_time_dist():
+def offline_day_legit_time_dist(rng=None):
+    # Генератор случайных чисел. None - генератор по умолчанию
+    rng = get_rng(rng)
 
     # название паттерна. Пригодится если нужно построить график распределения
     title = "Offline. Day-only. Legit"
     
     # равномерное распределение с 8:00 до 17:00
-    day_time = np.array([np.random.uniform(8*60, 16.9*60) for _ in range(2000)]).astype(int)
+    day_time = np.array([rng.uniform(8*60, 16.9*60) for _ in range(2000)]).astype(int)
     
     # слабый пик обед в районе 13. Интервал с 12 до 17:00
     mean_noon = 14 * 60
@@ -185,7 +197,7 @@ def offline_day_legit_time_dist():
     
     # пик обед
     dist_noon = truncnorm((noon_start - mean_noon)/ std_noon, (noon_end - mean_noon) / std_noon, loc=mean_noon, scale=std_noon)
-    minutes_noon = dist_noon.rvs(1000).astype(int)
+    minutes_noon = dist_noon.rvs(1000, random_state=rng).astype(int)
     
     
     # Вечерний пик. С 17:00 до 22:00
@@ -196,7 +208,7 @@ def offline_day_legit_time_dist():
     
     # пик вечером
     dist_evn = truncnorm((evn_start - mean_evn) / std_evn, (evn_end - mean_evn) / std_evn, loc=mean_evn, scale=std_evn)
-    minutes_evn = dist_evn.rvs(9000).astype(int)
+    minutes_evn = dist_evn.rvs(9000, random_state=rng).astype(int)
     
     
     # соединяем все созданные массивы в один
@@ -213,12 +225,14 @@ def offline_day_legit_time_dist():
 
 # 6. Дневной оффлайн. Фрод
 
-def offline_day_fraud_time_dist():
+def offline_day_fraud_time_dist(rng=None):
+    # Генератор случайных чисел. None - генератор по умолчанию
+    rng = get_rng(rng)
     # название паттерна. Пригодится если нужно построить график распределения
     title = "Offline. Day-only. Fraud"
 
     # равномерная активность с 8:00 до 22:00
-    day_time =  np.array([np.random.uniform(8, 21.9) for _ in range(500)]).astype(int)
+    day_time =  np.array([rng.uniform(8, 21.9) for _ in range(500)]).astype(int)
     
     # переведем массив в серию
     time_hours = pd.Series(day_time, name="hours")
@@ -230,7 +244,7 @@ def offline_day_fraud_time_dist():
 # На основании созданных функций распределений времени для соответсвующих временных паттернов, выдает веса(доли) для каждого часа в распределении.
 # Которые будут в использоваться в рандомизации времени генерируемой транзакции
 
-def gen_weights_for_time(is_fraud=False, round_clock=False, online=False):
+def gen_weights_for_time(is_fraud=False, round_clock=False, online=False, rng=None):
     """
     возвращает датафрейм с часами от 0 до 23 и их весами,
     название паттерна в виде строки и цвет для возможного графика - в зависимости от фрод не фрод
@@ -238,33 +252,34 @@ def gen_weights_for_time(is_fraud=False, round_clock=False, online=False):
     is_fraud - True или False. По умолчанию False
     round_clock - Круглосуточная категория или нет. True или False. По умолчанию False
     online - None, True или False. По умолчанию False
+    rng - np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию
     """
     
     #  Далее в зависимости от условий генерация распределения времени для транзакций
 
     # 1. Категория - круглосуточные, оффлайн, НЕ фрод 
     if not is_fraud and round_clock and not online:
-        time_hours, title = offline_24h_legit_time_dist()
+        time_hours, title = offline_24h_legit_time_dist(rng=rng)
         
     # 2. Оффлайн фрод. круглосуточные категории
     elif is_fraud and round_clock and not online:
-        time_hours, title = offline_24h_fraud_time_dist()
+        time_hours, title = offline_24h_fraud_time_dist(rng=rng)
 
     # 3. НЕ фрод. Онлайн покупки
     elif not is_fraud and round_clock and online:
-        time_hours, title = online_legit_time_dist()
+        time_hours, title = online_legit_time_dist(rng=rng)
         
     # 4. онлайн фрод
     elif is_fraud and round_clock and online:
-        time_hours, title = online_fraud_time_dist()
+        time_hours, title = online_fraud_time_dist(rng=rng)
 
     # 5. Не круглосуточный. Не фрод. Оффлайн
     elif not is_fraud and not round_clock and not online:
-        time_hours, title = offline_day_legit_time_dist()
+        time_hours, title = offline_day_legit_time_dist(rng=rng)
 
     # 6. Фрод. Не круглосуточный. Оффлайн. 
     elif is_fraud and not round_clock and not online:
-        time_hours, title = offline_day_fraud_time_dist()
+        time_hours, title = offline_day_fraud_time_dist(rng=rng)
         
     
     # посчитаем долю каждого часа. Это и будут веса 
@@ -291,17 +306,18 @@ def gen_weights_for_time(is_fraud=False, round_clock=False, online=False):
 # Нужна для генерации всех паттернов один раз, чтобы дальше не вызывать функцию генерации каждого паттерна 
 # каждый раз для транзакции либо по отдельности записывать в переменные
 
-def get_all_time_patterns(pattern_args):
+def get_all_time_patterns(pattern_args, rng=None):
     """
     pattern_args: dict с названием паттерна в ключе и словарем 
                 из аргументов для функции gen_weights_for_time,
                 соответствующим паттерну.
+    rng: np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию.
     """
 
     time_weights = defaultdict(dict)
     
     for key in pattern_args.keys():
-        weights, title, color = gen_weights_for_time(**pattern_args[key])
+        weights, title, color = gen_weights_for_time(**pattern_args[key], rng=rng)
         time_weights[key]["weights"] = weights
         time_weights[key]["title"] = title
         time_weights[key]["color"] = color
@@ -410,23 +426,60 @@ def pd_timestamp_to_unix(timestamp):
 
 # 14. Подфункция для генерации времени когда нет предыдущих транзакций `sample_time_for_trans`
 
-def sample_time_for_trans(timestamps, time_weights):
+def sample_time_for_trans(timestamps, hour_sampler, rng=None):
     """
     Семплирует время из данных timestamps согласно переданным весам
     ------------------------------
     timestamps - pd.DataFrame. С колонками: | timestamp | unix_time | hour |  - pd.Timestamp, int, int.
-    time_weights - pd.DataFrame. С колонками: | hours | proportion | - int, float.
+    hour_sampler - AliasTable. Alias таблица часов по весам паттерна времени.
+    rng - np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию
     ------------------------------
-    Возвращает pd.Timestamp и int unix время в секундах
+    Возвращает int unix время в секундах
     """
-    # семплируем час из весов времени, указав веса для семплирования
-    txn_hour = time_weights.hours.sample(n=1, weights=time_weights.proportion, replace=True).iloc[0]
+    rng = get_rng(rng)
+    # семплируем час из весов времени
+    txn_hour = hour_sampler.draw(rng=rng)
     
-    # фильтруем основной датафрейм с диапазоном таймстемпов по этому часу
-    timestamps_subset = timestamps.loc[timestamps.hour == txn_hour]
+    # фильтруем unix время таймстемпов по этому часу
+    unix_subset = timestamps.unix_time[timestamps.hour == txn_hour]
     
-    # из отфильтрованного датафрейма таймстемпов семплируем один таймстемп с равной вероятностью
-    txn_time = timestamps_subset.timestamp.sample(n=1, replace=True).iloc[0]
-    txn_unix = pd_timestamp_to_unix(txn_time)
+    # из отфильтрованного unix времени семплируем одно значение с равной вероятностью
+    return int(unix_subset.sample(n=1, replace=True, random_state=rng).iloc[0])
+
+# 15. Индекс unix времени timestamp-ов по часам суток
+
+def timestamps_by_hour(timestamps):
+    """
+    Разбивает unix время из timestamps по часам суток.
+    Нужно, чтобы семплировать время в часе без фильтрации датафрейма.
+    ------------------------------
+    timestamps - pd.DataFrame. С колонками: | timestamp | unix_time | hour |  - pd.Timestamp, int, int.
+    ------------------------------
+    Возвращает dict: час -> np.ndarray int64 с unix временем в этом часе
+    """
+    unix_time = timestamps.unix_time.to_numpy(dtype=np.int64)
+    hours = timestamps.hour.to_numpy()
+
+    return {int(hour): unix_time[hours == hour] for hour in np.unique(hours)}
+
+
+# 16. Колонка txn_time из unix времени
+
+def add_txn_time(txns):
+    """
+    Добавляет колонку txn_time (datetime64) рассчитанную из unix_time одним
+    векторным преобразованием. Генераторы работают только с unix временем,
+    а txn_time создается при записи транзакций в файл.
+    Колонка вставляется после client_id, как в схеме txns_df из base.yaml.
+    ------------------------------
+    txns - pd.DataFrame. Транзакции с колонкой unix_time в секундах.
+    ------------------------------
+    Возвращает тот же датафрейм
+    """
+    txn_time = pd.to_datetime(txns["unix_time"].to_numpy(dtype=np.int64), unit="s")
+    if "txn_time" in txns.columns:
+        txns["txn_time"] = txn_time
+    else:
+        txns.insert(txns.columns.get_loc("client_id") + 1, "txn_time", txn_time)
 
-    return txn_time, txn_unix
\ No newline at end of file
+    return txns
@@ -0,0 +1,147 @@
+# История транзакций клиента в процессе генерации. Общая для легальных и фрод транзакций.
+import numpy as np
+
+from data_generator.timeline import ClientTimeline
+
+
+class ClientTxnHistory:
+    """
+    Буфер транзакций одного клиента только на добавление.
+    Хранит в типизированных массивах только те поля, которые нужны
+    функциям времени и локации: unix время, online флаг и координаты.
+    Заменяет наращивание датафрейма клиента через pd.concat.
+    ---------
+    Атрибуты:
+    ---------
+    client_id: int. id клиента. По умолчанию None.
+    size: int. Кол-во транзакций в буфере.
+    last_idx: int. Индекс последней по времени транзакции. По умолчанию None.
+    timeline: ClientTimeline. Хронология для поиска ближайших по времени
+              транзакций. None если не запрошена при создании.
+    """
+    # Начальная емкость массивов. Дальше емкость удваивается
+    init_capacity = 32
+
+    def __init__(self, client_id=None, timeline=False):
+        """
+        client_id: int. id клиента.
+        timeline: bool. Вести ли хронологию ClientTimeline. Нужна для
+                  легальных транзакций.
+        """
+        self.client_id = client_id
+        self.size = 0
+        self.last_idx = None
+        self._unix_time = np.empty(self.init_capacity, dtype=np.int64)
+        self._online = np.empty(self.init_capacity, dtype=bool)
+        self._trans_lat = np.empty(self.init_capacity, dtype=np.float64)
+        self._trans_lon = np.empty(self.init_capacity, dtype=np.float64)
+        self.timeline = ClientTimeline(client_id=client_id) if timeline else None
+
+
+    @classmethod
+    def from_txns(cls, txns_df, client_id=None, timeline=False):
+        """
+        Буфер из уже существующих транзакций клиента.
+        ---------------
+        txns_df: pd.DataFrame. Транзакции клиента с колонками unix_time, online,
+                 trans_lat, trans_lon.
+        client_id: int. id клиента.
+        timeline: bool. Вести ли хронологию ClientTimeline.
+        """
+        history = cls(client_id=client_id, timeline=timeline)
+        for txn in txns_df[["unix_time", "online", "trans_lat", "trans_lon"]].to_dict("records"):
+            history.append(txn)
+        return history
+
+
+    @classmethod
+    def from_summary(cls, summary_row, client_id=None):
+        """
+        Буфер только с последней транзакцией клиента из сводки легальной генерации.
+        ---------------
+        summary_row: pd.Series. Строка сводки клиента с полями last_unix, last_online,
+                     last_lat, last_lon.
+        client_id: int. id клиента.
+        """
+        history = cls(client_id=client_id)
+        history.append({"unix_time": int(summary_row["last_unix"]), "online": bool(summary_row["last_online"]), \
+                        "trans_lat": float(summary_row["last_lat"]), "trans_lon": float(summary_row["last_lon"])})
+        return history
+
+
+    def __len__(self):
+        return self.size
+
+
+    def _grow(self):
+        """
+        Удвоить емкость массивов.
+        """
+        capacity = self._unix_time.shape[0] * 2
+        for name in ["_unix_time", "_online", "_trans_lat", "_trans_lon"]:
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+
+    def append(self, txn):
+        """
+        Добавить транзакцию в буфер.
+        При равном времени последней остается транзакция добавленная раньше.
+        ---------------
+        txn: dict. Транзакция. Нужны ключи unix_time, online, trans_lat, trans_lon.
+        """
+        if self.size == self._unix_time.shape[0]:
+            self._grow()
+
+        i = self.size
+        self._unix_time[i] = txn["unix_time"]
+        self._online[i] = txn["online"]
+        self._trans_lat[i] = txn["trans_lat"]
+        self._trans_lon[i] = txn["trans_lon"]
+        self.size += 1
+
+        if self.last_idx is None or self._unix_time[i] > self._unix_time[self.last_idx]:
+            self.last_idx = i
+
+        if self.timeline is not None:
+            self.timeline.add(unix_time=txn["unix_time"], online=txn["online"])
+
+
+    @property
+    def unix_time(self):
+        """
+        Unix время транзакций в порядке добавления. Представление массива без копии.
+        """
+        return self._unix_time[:self.size]
+
+
+    @property
+    def online(self):
+        """
+        Online флаги транзакций в порядке добавления. Представление массива без копии.
+        """
+        return self._online[:self.size]
+
+
+    @property
+    def last_unix(self):
+        """
+        Unix время последней транзакции. None если буфер пуст.
+        """
+        if self.last_idx is None:
+            return None
+        return int(self._unix_time[self.last_idx])
+
+
+    def last_txn(self):
+        """
+        Данные последней по времени транзакции. None если буфер пуст.
+        Возвращает dict с ключами unix_time, online, trans_lat, trans_lon.
+        """
+        i = self.last_idx
+        if i is None:
+            return None
+        return {"unix_time": int(self._unix_time[i]), "online": bool(self._online[i]), \
+                "trans_lat": float(self._trans_lat[i]), "trans_lon": float(self._trans_lon[i])}
@@ -0,0 +1,217 @@
+# Пакетная генерация легальных транзакций клиента массивами NumPy
+import numpy as np
+import pandas as pd
+
+from data_generator.rng import get_rng
+from data_generator.general_time import timestamps_by_hour
+from data_generator.legit.time.time import apply_min_interval, fit_day_hours
+from data_generator.timeline import ClientTimeline
+
+
+class LegitBatchGenerator:
+    """
+    Генерация всех легальных транзакций одного клиента за один вызов.
+    Категории, суммы, мерчанты и часы семплируются векторами сразу
+    на все транзакции клиента. Затем правила минимальных интервалов
+    из check_min_interval_from_near_txn применяются за один упорядоченный
+    проход по транзакциям. По распределению результат совпадает с
+    построчной генерацией generate_one_legit_txn.
+    ---------
+    Атрибуты:
+    ---------
+    min_inter: dict. Мин. интервалы между транз-ми из legit.yaml
+    cat_names: np.ndarray. Названия категорий.
+    cat_online: np.ndarray. Онлайн флаги категорий.
+    cat_round_clock: np.ndarray. Флаги круглосуточных категорий.
+    cat_weights_keys: np.ndarray. Ключ весов времени для каждой категории.
+    samplers: SamplerRegistry. Alias таблицы категорий и часов паттернов времени.
+    stamps_by_hour: dict. Час -> unix время из timestamps в этом часе.
+    stamps_1st_by_hour: dict. Час -> unix время из timestamps_1st в этом часе.
+                        Для первой транзакции клиента.
+    online_merchant_ids: np.ndarray. id онлайн мерчантов.
+    merchant_index: MerchantIndex. Индекс оффлайн мерчантов по (город, категория).
+    device_index: ClientDeviceIndex. Индекс девайсов клиентов по client_id.
+    amount_engine: AmountEngine. Генератор сумм по категориям.
+    """
+    def __init__(self, configs):
+        """
+        configs: LegitCfg. Конфиги и данные для генерации легальных транзакций.
+        """
+        categories = configs.categories
+
+        self.min_inter = configs.min_intervals
+        self.cat_names = categories["category"].to_numpy()
+        self.cat_online = categories["online"].to_numpy(dtype=bool)
+        self.cat_round_clock = categories["round_clock"].to_numpy(dtype=bool)
+
+        # Ключи весов времени по тем же условиям, что и в generate_one_legit_txn
+        self.cat_weights_keys = np.where(self.cat_online, "Online_Legit", \
+                                         np.where(self.cat_round_clock, "Offline_24h_Legit", "Offline_Day_Legit"))
+        self.samplers = configs.samplers
+
+        self.stamps_by_hour = timestamps_by_hour(configs.timestamps)
+        self.stamps_1st_by_hour = timestamps_by_hour(configs.timestamps_1st)
+        self.online_merchant_ids = configs.online_merchant_ids.to_numpy()
+        self.merchant_index = configs.merchant_index
+        self.device_index = configs.device_index
+        self.amount_engine = configs.amount_engine
+
+
+    def sample_hours(self, cat_idx, rng):
+        """
+        Семплирование часа транзакции для каждой категории
+        по весам соответствующего паттерна времени.
+        ---------------
+        cat_idx: np.ndarray. Индексы категорий транзакций.
+        rng: np.random.Generator. Генератор случайных чисел клиента.
+        """
+        keys = self.cat_weights_keys[cat_idx]
+        hours = np.empty(cat_idx.shape[0], dtype=np.int64)
+
+        for key in np.unique(keys):
+            mask = keys == key
+            hours[mask] = self.samplers.draw(key=key, size=mask.sum(), rng=rng)
+
+        return hours
+
+
+    def sample_unix_in_hours(self, hours, rng, first_month=True):
+        """
+        Семплирование unix времени с равной вероятностью внутри
+        каждого часа. Первая транзакция берется из первого месяца.
+        ---------------
+        hours: np.ndarray. Часы транзакций.
+        rng: np.random.Generator. Генератор случайных чисел клиента.
+        first_month: bool. Брать ли первую транзакцию из первого месяца.
+                     False - у клиента уже есть транзакции, как в get_legit_txn_time.
+        """
+        unix_time = np.empty(hours.shape[0], dtype=np.int64)
+        start = 0
+
+        if first_month:
+            first_stamps = self.stamps_1st_by_hour[hours[0]]
+            unix_time[0] = first_stamps[rng.integers(0, first_stamps.shape[0])]
+            start = 1
+
+        rest = hours[start:]
+        for hour in np.unique(rest):
+            positions = np.flatnonzero(rest == hour) + start
+            stamps = self.stamps_by_hour[hour]
+            unix_time[positions] = stamps[rng.integers(0, stamps.shape[0], size=positions.shape[0])]
+
+        return unix_time
+
+
+    def apply_min_intervals(self, candidates, online, day_only, rng, client_id=None, timeline=None):
+        """
+        Упорядоченный проход по семплированному времени с применением
+        минимальных интервалов до ближайших предыдущих транзакций клиента.
+        Если у клиента нет транзакций, первая не корректируется, как и в get_legit_txn_time.
+        ---------------
+        candidates: np.ndarray. Семплированное unix время транзакций.
+        online: np.ndarray. Онлайн флаги транзакций.
+        day_only: np.ndarray. Флаги оффлайн транзакций в дневных категориях.
+        rng: np.random.Generator. Генератор случайных чисел клиента.
+        client_id: int. id клиента.
+        timeline: ClientTimeline. Хронология уже существующих транзакций клиента.
+                  Пополняется созданными транзакциями. None - транзакций нет.
+        """
+        min_inter = self.min_inter
+        # Значения по умолчанию если нет предыдущих оффлайн/онлайн транз-ций
+        offline_time_diff = min_inter["offline_time_diff"] * 60
+        general_diff = min_inter["general_diff"] * 60
+
+        unix_time = candidates.copy()
+        start = 0
+        if not timeline:
+            timeline = ClientTimeline(client_id=client_id)
+            timeline.add(unix_time=unix_time[0], online=online[0])
+            start = 1
+
+        for i in range(start, unix_time.shape[0]):
+            timestamp_unix = int(candidates[i])
+            closest_offline_unix = timeline.closest(unix_time=timestamp_unix, online=False)
+            closest_online_unix = timeline.closest(unix_time=timestamp_unix, online=True)
+            closest_offline_diff = offline_time_diff if closest_offline_unix is None \
+                                   else abs(closest_offline_unix - timestamp_unix)
+            closest_online_diff = general_diff if closest_online_unix is None \
+                                  else abs(closest_online_unix - timestamp_unix)
+
+            txn_unix, _ = apply_min_interval(timestamp_unix=timestamp_unix, online=online[i], \
+                                             closest_offline_diff=closest_offline_diff, \
+                                             closest_online_diff=closest_online_diff, \
+                                             last_txn_unix=timeline.last_unix, \
+                                             last_online_flag=timeline.last_online, min_inter=min_inter, \
+                                             rng=rng)
+            if day_only[i]:
+                txn_unix = fit_day_hours(txn_unix)
+            unix_time[i] = txn_unix
+            timeline.add(unix_time=txn_unix, online=online[i])
+
+        return unix_time
+
+
+    def client_txns(self, client_info, txns_num, rng=None, timeline=None):
+        """
+        Генерация всех транзакций клиента.
+        ---------------
+        client_info: namedtuple, полученная в результате итерации с помощью
+                     .itertuples() через датафрейм с информацией о клиентах.
+        txns_num: int. Кол-во транзакций клиента.
+        rng: np.random.Generator. Генератор случайных чисел клиента. None - генератор по умолчанию.
+        timeline: ClientTimeline. Хронология уже существующих транзакций клиента.
+                  Учитывается в минимальных интервалах. None - транзакций нет.
+        ---------------
+        Возвращает pd.DataFrame с колонками как у build_transaction. Без txn_time
+        """
+        rng = get_rng(rng)
+        cat_idx = self.samplers.draw(key="categories", size=txns_num, rng=rng)
+        online = self.cat_online[cat_idx]
+        round_clock = self.cat_round_clock[cat_idx]
+        category = self.cat_names[cat_idx]
+
+        # Суммы не менее 1 и случайное целочисленное округление
+        amounts = self.amount_engine.generate(cat_idx=cat_idx, rng=rng)
+
+        # Время
+        hours = self.sample_hours(cat_idx=cat_idx, rng=rng)
+        candidates = self.sample_unix_in_hours(hours=hours, rng=rng, first_month=not timeline)
+        unix_time = self.apply_min_intervals(candidates=candidates, online=online, \
+                                             day_only=~online & ~round_clock, rng=rng, \
+                                             client_id=client_info.client_id, timeline=timeline)
+
+        # Мерчанты, гео, IP и девайсы
+        merchant_id = np.full(txns_num, np.nan)
+        trans_lat = np.full(txns_num, np.nan)
+        trans_lon = np.full(txns_num, np.nan)
+        device_id = np.full(txns_num, np.nan)
+        trans_city = np.full(txns_num, client_info.city, dtype=object)
+        trans_ip = np.full(txns_num, "not applicable", dtype=object)
+
+        # Онлайн: координаты, город и IP клиента т.к. это не фрод
+        online_pos = np.flatnonzero(online)
+        if online_pos.shape[0]:
+            online_ids = self.online_merchant_ids
+            merchant_id[online_pos] = online_ids[rng.integers(0, online_ids.shape[0], size=online_pos.shape[0])]
+            trans_lat[online_pos] = client_info.lat
+            trans_lon[online_pos] = client_info.lon
+            trans_ip[online_pos] = client_info.home_ip
+            device_id[online_pos] = self.device_index.sample(client_id=client_info.client_id, \
+                                                             size=online_pos.shape[0], rng=rng)
+
+        # Оффлайн: мерчант семплируется из мерчантов категории в городе клиента
+        offline_pos = np.flatnonzero(~online)
+        offline_cats = category[offline_pos]
+        for category_name in np.unique(offline_cats):
+            positions = offline_pos[offline_cats == category_name]
+            merchant_id[positions], trans_lat[positions], trans_lon[positions], trans_city[positions] = \
+                    self.merchant_index.sample(city=client_info.city, category=category_name, size=positions.shape[0], \
+                                               rng=rng)
+
+        return pd.DataFrame({
+                "client_id": np.full(txns_num, client_info.client_id), "unix_time": unix_time, "amount": amounts, "type": "purchase",
+                "channel": np.where(online, "ecom", "POS").astype(object), "category": category.astype(object),
+                "online": online, "merchant_id": merchant_id, "trans_city": trans_city, "trans_lat": trans_lat,
+                "trans_lon": trans_lon, "trans_ip": trans_ip, "device_id": device_id, "account": np.nan,
+                "is_fraud": False, "is_suspicious": False, "status": "approved", "rule": "not applicable"
+                })
@@ -1,12 +1,15 @@
 # Конструктор класса с конфигами  и данными для генарации легальных транзакций
 import pandas as pd
-import geopandas as gpd
 import pyarrow
 import os
 
-from data_generator.general_time import create_timestamps_range_df, get_all_time_patterns
+from data_generator.general_time import get_all_time_patterns
 from data_generator.utils import create_txns_df
 from data_generator.configs import LegitCfg
+from data_generator.sampler import SamplerRegistry
+from data_generator.amounts import AmountEngine
+from data_generator.rng import resolve_seed, stage_rng
+from data_generator.context import RunDataContext
 
 
 # 1.
@@ -22,22 +25,32 @@ class LegitConfigBuilder:
     legit_cfg: dict.
     time_cfg: dict. Общие конфиги времени из time.yaml
     run_dir: str. Путь к директории под текущую генерацию.
+    context: RunDataContext. Общие данные запуска: файлы и таблицы читаются один раз.
     clients: pd.DataFrame. Семпл клиентов для генерации
              транзакций.
+    seed: int. Seed запуска. Из base_cfg["seed"], либо случайный если его нет.
+    rng: np.random.Generator. Генератор этапа. Для выборки клиентов и весов времени.
     """
+    # Способы генерации из legit.yaml
+    engines = ("batch", "row")
+
     def __init__(self, base_cfg: dict, legit_cfg: dict, time_cfg: dict, \
-                 run_dir: str):
+                 run_dir: str, context: RunDataContext = None):
         """
         base_cfg: dict. Общие конфиги из base.yaml
         legit_cfg: dict. Конфиги легальныз транз. из legit.yaml
         time_cfg: dict. Общие конфиги времени из time.yaml
         run_dir: str. Путь к директории под текущую генерацию.
+        context: RunDataContext. Общие данные запуска. None - свой контекст у билдера.
         """
         self.base_cfg = base_cfg
         self.legit_cfg = legit_cfg
         self.time_cfg = time_cfg
         self.run_dir = run_dir
+        self.context = context if context is not None else RunDataContext()
         self.clients = None
+        self.seed = resolve_seed(base_cfg.get("seed"))
+        self.rng = stage_rng(seed=self.seed, stage="legit")
 
 
     def make_dir(self):
@@ -62,21 +75,9 @@ class LegitConfigBuilder:
         path: str. Путь к директории или файлу.
         file: str. Название файла с расширением
               в path если path это директория.
+        Файл читается через self.context - один раз за запуск.
         """
-        if os.path.isdir(path) and file != "":
-            file_type = file.split(".")[-1]
-            path = os.path.join(path, file)
-        if os.path.isfile(path) and file == "":
-            file_type = path.split(".")[-1]
-
-        if file_type == "csv":
-            return pd.read_csv(path)
-        
-        if file_type == "gpkg":
-            return gpd.read_file(path)
-        
-        if file_type == "parquet":
-            return pd.read_parquet(path, engine="pyarrow")
+        return self.context.read_file(path=path, file=file)
         
 
     def sample_clients(self):
@@ -93,7 +94,7 @@ class LegitConfigBuilder:
         all_clients = self.read_file(path=all_cl_path)
 
         # Семплируем клиентов и записываем в файл.
-        clients_samp = all_clients.sample(n=n_clients, replace=False).reset_index(drop=True)
+        clients_samp = all_clients.sample(n=n_clients, replace=False, random_state=self.rng).reset_index(drop=True)
         legit_dir = self.make_dir() # создать папку под генерацию legit
         file_name = self.legit_cfg["data_storage"]["files"]["clients"]
         clients_path = os.path.join(legit_dir, file_name)
@@ -116,17 +117,29 @@ class LegitConfigBuilder:
         weight_args = self.time_cfg["time_weights_args"]
         legit_cfg = self.legit_cfg
         base_files = base_cfg["data_paths"]["base"]
+        engine = legit_cfg["generation"]["engine"]
+        if engine not in self.engines:
+            raise ValueError(f"Unknown legit engine '{engine}' in legit.yaml. Expected one of {self.engines}")
 
         clients = self.sample_clients()
-        timestamps = create_timestamps_range_df(stamps_cfg=stamps_cfg)
+        timestamps = self.context.timestamps(stamps_cfg=stamps_cfg)
         timestamps_1st = timestamps.loc[timestamps.timestamp.dt.month == timestamps.timestamp.dt.month.min()]
         txns = create_txns_df(base_cfg["txns_df"])
         client_devices = self.read_file(path=base_files["client_devices"])
+        device_index = self.context.device_index(path=base_files["client_devices"])
         offline_merchants = self.read_file(path=base_files["offline_merchants"])
+        merchant_index = self.context.merchant_index(path=base_files["offline_merchants"])
         categories = self.read_file(path=base_files["cat_stats_full"])
         online_merchant_ids = self.read_file(path=base_files["online_merchant_ids"]) \
                                   .iloc[:,0] # нужны в виде серии
-        all_time_weights = get_all_time_patterns(pattern_args=weight_args)
+        all_time_weights = get_all_time_patterns(pattern_args=weight_args, rng=self.rng)
+        # Alias таблицы: категории по share и часы по паттернам времени
+        samplers = SamplerRegistry()
+        samplers.add(key="categories", weights=categories.share)
+        samplers.add_time_weights(all_time_weights=all_time_weights)
+        # Суммы по категориям. Не менее 1
+        amount_engine = AmountEngine(categories=categories, mean_col="avg_amt", std_col="amt_std", \
+                                     floor=1, rate=0.6)
         cities = self.read_file(path=base_files["cities"])
         min_intervals = legit_cfg["time"]["min_intervals"]
         txn_num = legit_cfg["txn_num"]
@@ -139,7 +152,8 @@ class LegitConfigBuilder:
         directory = self.make_dir()
         txns_file_name = legit_cfg["data_storage"]["files"]["txns"]
         prefix = legit_cfg["data_storage"]["prefix"]
-        
+        summary_file = legit_cfg["data_storage"]["files"]["summary"]
+        workers = legit_cfg["generation"]["workers"]
 
         return LegitCfg(clients=clients, timestamps=timestamps, transactions=txns, \
                         timestamps_1st=timestamps_1st, client_devices=client_devices, \
@@ -149,5 +163,7 @@ class LegitConfigBuilder:
                         data_paths=data_paths, dir_category=dir_category, \
                         folder_name=folder_name, key_latest=key_latest, key_history=key_history, \
                         run_dir=run_dir, directory=directory, txns_file_name=txns_file_name, \
-                        prefix=prefix
+                        prefix=prefix, engine=engine, merchant_index=merchant_index, \
+                        workers=workers, seed=self.seed, device_index=device_index, \
+                        samplers=samplers, amount_engine=amount_engine, summary_file=summary_file
                         )
\ No newline at end of file
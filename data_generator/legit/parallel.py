@@ -0,0 +1,91 @@
+# Генерация легальных транзакций в нескольких процессах с разбивкой клиентов на шарды
+import os
+import numpy as np
+from dataclasses import replace
+from concurrent.futures import ProcessPoolExecutor
+
+from data_generator.legit.txns import gen_multiple_legit_txns
+from data_generator.legit.recorder import LegitTxnsRecorder
+from data_generator.refstore import ReferenceStore, attach
+
+
+# Таблицы LegitCfg общие для всех процессов. Передаются через ReferenceStore
+SHARED_TABLES = ("timestamps", "timestamps_1st", "transactions", "client_devices", \
+                 "offline_merchants", "categories", "online_merchant_ids", "cities")
+# Индексы и alias таблицы LegitCfg. В хранилище пишутся их массивы, объекты собираются в процессе
+SHARED_OBJECTS = ("device_index", "merchant_index", "samplers")
+
+
+# 1.
+
+def split_clients(clients, workers):
+    """
+    Разбить клиентов на непрерывные шарды примерно равного размера.
+    Пустые шарды отбрасываются.
+    ---------------
+    clients: pd.DataFrame. Клиенты для генерации транзакций.
+    workers: int. Кол-во процессов.
+    """
+    bounds = np.linspace(0, clients.shape[0], workers + 1).astype(int)
+    shards = [clients.iloc[start:end].reset_index(drop=True) \
+              for start, end in zip(bounds[:-1], bounds[1:])]
+    return [shard for shard in shards if not shard.empty]
+
+
+# 2.
+
+def legit_shard_worker(configs, shard_num):
+    """
+    Генерация легальных транзакций для одного шарда клиентов в отдельном процессе.
+    Чанки пишутся в общую папку chunks с префиксом шарда.
+    Случайные числа берутся из потоков клиентов по configs.seed, поэтому
+    результат не зависит от разбивки на шарды.
+    ---------------
+    configs: LegitCfg. Конфиги с клиентами только этого шарда. Общие таблицы и объекты - ссылки
+             TableRef и ObjectRef, подключаются в процессе через memory map.
+    shard_num: int. Номер шарда. Для префикса файлов с чанками.
+    ---------------
+    Возвращает кол-во созданных транзакций и чанков
+    """
+    shard_cfg = replace(attach(configs), prefix=f"{configs.prefix}{shard_num:03d}_")
+    txn_recorder = LegitTxnsRecorder(configs=shard_cfg)
+    gen_multiple_legit_txns(configs=shard_cfg, txn_recorder=txn_recorder, write=False)
+
+    return txn_recorder.txns_counter, txn_recorder.chunks_counter
+
+
+# 3.
+
+def gen_legit_txns_parallel(configs, txn_recorder):
+    """
+    Генерация легальных транзакций в configs.workers процессах.
+    Каждый процесс обрабатывает свой шард клиентов и пишет свои чанки.
+    Общие таблицы записываются один раз в хранилище в папке запуска,
+    процессы получают только ссылки на них.
+    Затем чанки собираются в один отсортированный датафрейм и пишутся в файлы.
+    ---------------
+    configs: LegitCfg. Конфиги и данные для генерации легальных транзакций.
+    txn_recorder: LegitTxnsRecorder. Сборка чанков всех шардов и запись в файлы.
+    """
+    shards = split_clients(clients=configs.clients, workers=configs.workers)
+    store = ReferenceStore(directory=os.path.join(configs.directory, "refs"))
+    shared_cfg = store.detach(configs=configs, names=SHARED_TABLES, objects=SHARED_OBJECTS)
+
+    try:
+        with ProcessPoolExecutor(max_workers=max(len(shards), 1)) as executor:
+            futures = [executor.submit(legit_shard_worker, replace(shared_cfg, clients=shard), shard_num) \
+                       for shard_num, shard in enumerate(shards, start=1)]
+            results = [future.result() for future in futures]
+    finally:
+        store.cleanup()
+
+    # Итоговые счетчики по всем шардам
+    txn_recorder.clients_counter = configs.clients.shape[0]
+    txn_recorder.txns_counter = sum(txns for txns, _ in results)
+    txn_recorder.chunks_counter = sum(chunks for _, chunks in results)
+
+    txn_recorder.build_from_chunks()
+
+    # Запись собранного датафрейма в два файла в разные директории: data/generated/lastest/
+    # И data/generated/history/<своя_папка_с_датой_временем>
+    txn_recorder.write_built_data()
@@ -1,6 +1,9 @@
 import os
 import pandas as pd
 
+from data_generator.general_time import add_txn_time
+from data_generator.legit.summary import build_client_summary
+
 class LegitTxnsRecorder:
     """
     Запись легальных транзакций в файл.
@@ -26,12 +29,17 @@ class LegitTxnsRecorder:
              генерации: легальных, compromised фрода, дроп фрода.
     prefix: str. Префикс для названия файлов с чанками транзакций, например
             'legit_'
+    clients: pd.DataFrame. Клиенты легальной генерации. Для сводки по клиентам.
+    summary_file: str. Название файла сводки по клиентам.
     data_paths: dict. Конфиги путей из base.yaml.
     directory: str. Путь к директории формата data/generated/history/generated_run_<дата время>
                куда записывать чанки и собранный из них файл.
     all_txns: pd.DataFrame. Все сгенерированные транзакции. По умолчанию None.
     client_txns: list. Транз-ции текущего клиента для которого идет генерация.
     txns_chunk: list. Транз-ции текущего чанка для последующей записи в файл.
+    txns_blocks: list. Блоки транз-ций клиентов текущего чанка. Для пакетной
+                 генерации.
+    blocks_rows: int. Кол-во транз-ций в txns_blocks.
     txns_counter: int. Общее кол-во всех транзакций сгенерированных на данный
                   момент.
     clients_counter: int. Общее кол-во клиентов которые были обработаны включая
@@ -51,9 +59,13 @@ class LegitTxnsRecorder:
         self.folder_name = configs.folder_name
         self.directory = configs.directory
         self.prefix = configs.prefix
+        self.clients = configs.clients
+        self.summary_file = configs.summary_file
         self.all_txns = None
         self.client_txns = []
         self.txns_chunk = []
+        self.txns_blocks = []
+        self.blocks_rows = 0
         self.txns_counter = 0
         self.clients_counter = 0
         self.chunks_counter = 0
@@ -117,31 +129,59 @@ class LegitTxnsRecorder:
         txn: dict. Созданная транзакция.
         txns_num: int. Кол-во созданных транз-ций текущего клиента.
         """
-        # Папка всей текущей генерации
-        directory = self.directory
-
         self.txns_chunk.append(txn)
 
         # Проверка по кол-ву. Если кол-во транз-ций равно размеру чанка
         # то пишем чанк в файл
         if self.to_chunk(txns_num=txns_num):
-            chunk = pd.DataFrame(self.txns_chunk)
-            chunk_name = self.name_the_chunk()
-            chunks_dir = self.make_dir(directory, "chunks")
-            full_path = os.path.join(chunks_dir, chunk_name)
-
-            chunk.to_parquet(full_path, engine="pyarrow")
+            self.write_chunk(chunk=pd.DataFrame(self.txns_chunk))
             self.txns_chunk.clear() # сброс чанка записанного в файл
 
 
+    def record_block(self, block):
+        """
+        Запись транзакций целым блоком клиента. Для пакетной генерации.
+        Блоки копятся пока в них не наберется chunk_size транз-ций
+        либо пока не будет обработан последний клиент. Поэтому
+        чанк может быть немного больше chunk_size.
+        --------
+        block: pd.DataFrame. Все созданные транзакции клиента.
+        """
+        self.txns_blocks.append(block)
+        self.blocks_rows += block.shape[0]
+
+        if self.blocks_rows < self.chunk_size and self.clients_counter != self.total_clients:
+            return
+
+        self.write_chunk(chunk=pd.concat(self.txns_blocks, ignore_index=True))
+        self.txns_blocks.clear() # сброс блоков записанных в файл
+        self.blocks_rows = 0
+
+
+    def write_chunk(self, chunk):
+        """
+        Запись чанка в parquet файл в папку chunks текущей генерации.
+        --------
+        chunk: pd.DataFrame. Транзакции чанка.
+        """
+        chunk_name = self.name_the_chunk()
+        chunks_dir = self.make_dir(self.directory, "chunks")
+        full_path = os.path.join(chunks_dir, chunk_name)
+
+        chunk.to_parquet(full_path, engine="pyarrow")
+
+
     def build_from_chunks(self):
         """
         Сборка цельного датафрейма из чанков записанных в
         файлы. Датафрейм сохраняется в атрибут all_txns.
+        Порядок чтения файлов и сортировка детерминированы, поэтому
+        результат не зависит от того, в скольких процессах писались чанки.
+        В чанках только unix_time. Колонка txn_time создается здесь.
         """
         directory = self.directory
         chunks_dir = self.make_dir(directory, "chunks")
-        chunks = os.listdir(chunks_dir)
+        chunks = sorted(os.listdir(chunks_dir))
 
         all_chunks = []
 
@@ -151,8 +191,9 @@ class LegitTxnsRecorder:
             all_chunks.append(chunks_df)
 
         self.all_txns = pd.concat(all_chunks, ignore_index=True) \
-                          .sort_values("unix_time") \
+                          .sort_values(["unix_time", "client_id"], kind="stable") \
                           .reset_index(drop=True)
+        add_txn_time(self.all_txns)
 
 
     def write_built_data(self):
@@ -173,6 +214,17 @@ class LegitTxnsRecorder:
         path_latest = data_paths[category][key_latest]
         all_txns.to_parquet(path_latest, engine="pyarrow")
 
+        self.write_summary()
+
+
+    def write_summary(self):
+        """
+        Запись сводки по клиентам в папку legit текущей генерации.
+        Этапы фрода читают её вместо всех легальных транзакций.
+        """
+        summary = build_client_summary(txns=self.all_txns, clients=self.clients)
+        summary.to_parquet(os.path.join(self.directory, self.summary_file), engine="pyarrow")
+
 
     def reset_counters(self):
         """
@@ -0,0 +1,34 @@
+# Сводка по клиентам из легальных транзакций для этапов фрода
+
+
+def build_client_summary(txns, clients):
+    """
+    Сводная таблица по клиентам: одна строка на клиента.
+    Нужна этапам фрода вместо полной истории легальных транзакций.
+    ------------------
+    txns: pd.DataFrame. Все легальные транзакции. Колонки как у build_transaction.
+    clients: pd.DataFrame. Клиенты легальной генерации с колонками client_id, city.
+    ------------------
+    Возвращает pd.DataFrame с колонками:
+    client_id, txn_count, online_count, first_unix, home_city_count, last_unix,
+    last_online, last_lat, last_lon, last_city, home_city_share
+    """
+    # Стабильная сортировка. При равном времени последней считается
+    # транзакция позже записанная в исходном порядке
+    ordered = txns.sort_values(["client_id", "unix_time"], kind="stable")
+    home_city = ordered["client_id"].map(clients.set_index("client_id")["city"])
+    ordered = ordered.assign(in_home_city=(ordered["trans_city"] == home_city))
+
+    grouped = ordered.groupby("client_id", sort=True)
+    summary = grouped.agg(txn_count=("unix_time", "size"), online_count=("online", "sum"), \
+                          first_unix=("unix_time", "min"), home_city_count=("in_home_city", "sum"))
+
+    # Данные последней транзакции клиента. Без пропуска NaN в отличие от groupby last
+    last_txns = ordered.drop_duplicates("client_id", keep="last").set_index("client_id")
+    last_txns = last_txns[["unix_time", "online", "trans_lat", "trans_lon", "trans_city"]] \
+                    .rename(columns={"unix_time": "last_unix", "online": "last_online", "trans_lat": "last_lat", \
+                                     "trans_lon": "last_lon", "trans_city": "last_city"})
+    summary = summary.join(last_txns)
+    summary["home_city_share"] = summary["home_city_count"] / summary["txn_count"]
+
+    return summary.reset_index()
@@ -3,34 +3,31 @@ import pandas as pd
 import os
 
 
-def log_check_min_time(client_id, txn_time, txn_unix, online, closest_txn_offline, \
-                       closest_txn_online, last_txn, close_flag):
+def log_check_min_time(client_id, txn_unix, online, closest_offline_unix, \
+                       closest_online_unix, last_txn_unix, last_online_flag, close_flag):
     """
     Логирует нужные данные для дебаггинга
     -------------------------------
-    closest_txn_offline - pd.DataFrame. Запись о ближайшей оффлайн транзакции - может быть пустым
-    closest_txn_online - pd.DataFrame. Запись о ближайшей онлайн транзакции - может быть пустым
-    last_txn - pd.DataFrame. Запись о последней транзакции
-    close_flag - bool. online значение ближайшей транзакции.
+    closest_offline_unix - int. Unix время ближайшей оффлайн транзакции - может быть None
+    closest_online_unix - int. Unix время ближайшей онлайн транзакции - может быть None
+    last_txn_unix - int. Unix время последней транзакции
+    last_online_flag - bool. online значение последней транзакции
+    close_flag - str. Отношение текущей транзакции с ближайшей в контексте online флага.
     """
-    if not closest_txn_offline.empty:
-        closest_offline_time = closest_txn_offline.txn_time.iloc[0]
-        closest_offline_unix = closest_txn_offline.unix_time.iloc[0]
+    if closest_offline_unix is not None:
+        closest_offline_time = pd.to_datetime(closest_offline_unix, unit="s")
     else:
         closest_offline_time = pd.NaT
         closest_offline_unix = np.nan
 
-    if not closest_txn_online.empty:
-        closest_online_time = closest_txn_online.txn_time.iloc[0]
-        closest_online_unix = closest_txn_online.unix_time.iloc[0]
+    if closest_online_unix is not None:
+        closest_online_time = pd.to_datetime(closest_online_unix, unit="s")
     else:
         closest_online_time = pd.NaT
         closest_online_unix = np.nan
 
-
-    last_txn_time = last_txn.txn_time.iloc[0]
-    last_txn_unix = last_txn.unix_time.iloc[0]
-    last_online_flag = last_txn.online.iloc[0]
+    txn_time = pd.to_datetime(txn_unix, unit="s")
+    last_txn_time = pd.to_datetime(last_txn_unix, unit="s")
     
     log_df = pd.DataFrame({"client_id":[client_id], "txn_time":[txn_time], "txn_unix":[txn_unix], "online":[online], \
                            "closest_offline_time":[closest_offline_time], "closest_offline_unix":[closest_offline_unix], \
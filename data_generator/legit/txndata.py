@@ -1,9 +1,11 @@
 # Генерация части данных транзакции
 
+from data_generator.rng import get_rng
+
 
 # 1.
 
-def get_txn_location_and_merchant(online, merchants_df, category_name, client_info, configs):
+def get_txn_location_and_merchant(online, category_name, client_info, configs, rng=None):
     """
     Возвращает id мерчанта, геолокацию транзакции: для оффлайна это координаты и город мерчанта, для онлайна координаты по IP и город по IP.
     Возвращает IP адрес с которого совершена транзакция если это онлайн покупка.
@@ -11,16 +13,15 @@ def get_txn_location_and_merchant(online, merchants_df, category_name, client_in
     client_info: namedtuple, полученная в результате итерации через датафрейм 
              с информацией о клиентах с помощью .itertuples()
     category_name: str. Название категории покупки
-    merchants_df: pd.DataFrame. Оффлайн мерчанты заранее отфильтрованные по городу клиента 
-                т.к. это легальные транзакции
-    online_merchant_ids: pd.Series. id для онлайн мерчантов
     configs: LegitCfg. Конфиги и данные для генерации легальных транзакций.
+    rng: np.random.Generator. Генератор случайных чисел клиента. None - генератор по умолчанию.
     """
     online_merchant_ids = configs.online_merchant_ids
+    rng = get_rng(rng)
 
     # Если онлайн покупка
     if online:
-        merchant_id = online_merchant_ids.sample(n=1).iloc[0]
+        merchant_id = online_merchant_ids.sample(n=1, random_state=rng).iloc[0]
         # локация клиента по IP. Т.к. это не фрод. Просто записываем координаты города клиента
         trans_lat = client_info.lat
         trans_lon = client_info.lon
@@ -30,13 +31,10 @@ def get_txn_location_and_merchant(online, merchants_df, category_name, client_in
         
     # Если оффлайн покупка    
     else:
-        # Семплируется мерчант
-        merchant = merchants_df.loc[merchants_df.category == category_name].sample(1, replace=True)
+        # Семплируется мерчант из города клиента т.к. это легальные транзакции
         # Берется его id, и координаты, как координаты транзакции
-        merchant_id = merchant["merchant_id"].iloc[0]
-        trans_lat = merchant["merchant_lat"].iloc[0]
-        trans_lon = merchant["merchant_lon"].iloc[0]
+        merchant_id, trans_lat, trans_lon, trans_city = \
+                configs.merchant_index.sample(city=client_info.city, category=category_name, rng=rng)
         trans_ip = "not applicable"
-        trans_city = merchant["city"].iloc[0]
 
     return merchant_id, trans_lat, trans_lon, trans_ip, trans_city
\ No newline at end of file
@@ -2,42 +2,38 @@
 import pandas as pd
 import numpy as np
 
-from data_generator.utils import build_transaction, gen_trans_number_norm, amt_rounding
+from data_generator.rng import get_rng, client_rng
+from data_generator.utils import build_transaction, gen_trans_number_norm
 from data_generator.legit.txndata import get_txn_location_and_merchant
 from data_generator.legit.time.time import get_legit_txn_time
+from data_generator.history import ClientTxnHistory
+from data_generator.timeline import ClientTimeline
+from data_generator.legit.batch import LegitBatchGenerator
 
 
 # 1. Генерация одной легальной транзакции покупки для клиента.
 
-def generate_one_legit_txn(client_info, client_trans_df, client_device_ids, category, \
-                           merchants_df, configs):
+def generate_one_legit_txn(client_info, timeline, category, configs, rng=None):
     """
     Генерация одной легальной транзакции покупки для клиента.
     ------------------------------------------------
     client_info: namedtuple, полученная в результате итерации с помощью
                  .itertuples() через датафрейм с информацией о клиентах.
-    client_trans_df: pd.DataFrame. Транзакции клиента.
-    client_device_ids: pd.Series. id девайсов клиента.
+    timeline: ClientTimeline. Хронология транзакций клиента.
     category: pd.DataFrame. Одна запись с категорией и её характеристиками.
-    merchants_df: pd.DataFrame. Оффлайн мерчанты заранее отфильтрованные по
-                  городу клиента т.к. это легальные транзакции.
     configs: LegitCfg. Конфиги и данные для генерации легальных транзакций.
+    rng: np.random.Generator. Генератор случайных чисел клиента. None - генератор по умолчанию.
     """
-    all_time_weights = configs.all_time_weights
+    rng = get_rng(rng)
 
     client_id = client_info.client_id
     
     category_name = category["category"].iloc[0]
     round_clock = category["round_clock"].iloc[0]
     online = category["online"].iloc[0]
-    # средняя сумма для этой категории
-    amt_mean = category["avg_amt"].iloc[0]
-    # стандартное отклонение сумм для этой категории
-    amt_std = category["amt_std"].iloc[0]
     
-    # случайно сгенерированная сумма транзакции, но не менее 1
-    amount = max(1, round(np.random.normal(amt_mean, amt_std), 2))
-    amount = amt_rounding(amount=amount, rate=0.6) # Случайное целочисленное округление
+    # случайно сгенерированная сумма транзакции, но не менее 1. Со случайным целочисленным округлением
+    amount = configs.amount_engine.amount(category_name=category_name, rng=rng)
 
     # 1. Offline_24h_Legit - круглосуточные оффлайн покупки
     if not online and round_clock:
@@ -50,7 +46,7 @@ def generate_one_legit_txn(client_info, client_trans_df, client_device_ids, cate
         weights_key = "Online_Legit"
         # локация клиента по IP. Т.к. это не фрод. Просто записываем координаты города клиента
         channel = "ecom"
-        device_id = client_device_ids.sample(n=1).iloc[0]
+        device_id = configs.device_index.sample(client_id=client_id, rng=rng)
         
     # 3. Offline_Day_Legit - Оффлайн покупки. Дневные категории.
     elif not online and not round_clock:
@@ -60,15 +56,16 @@ def generate_one_legit_txn(client_info, client_trans_df, client_device_ids, cate
         
     # Генерация мерчанта, координат транзакции. И если это онлайн, то IP адреса с которого сделана транзакция
     merchant_id, trans_lat, trans_lon, trans_ip, trans_city = \
-                                get_txn_location_and_merchant(online=online, merchants_df=merchants_df, \
+                                get_txn_location_and_merchant(online=online, \
                                                               category_name=category_name, client_info=client_info, \
-                                                              configs=configs)
+                                                              configs=configs, rng=rng)
     
-    time_weights = all_time_weights[weights_key]["weights"]
+    # Alias таблица часов для паттерна времени
+    hour_sampler = configs.samplers.get(key=weights_key)
     
     # Генерация времени транзакции
-    txn_time, txn_unix = get_legit_txn_time(trans_df=client_trans_df, time_weights=time_weights, \
-                                            configs=configs, round_clock=round_clock, online=online)
+    txn_unix = get_legit_txn_time(timeline=timeline, hour_sampler=hour_sampler, \
+                                            configs=configs, round_clock=round_clock, online=online, rng=rng)
     # Статичные значения для данной функции.
     status = "approved"
     txn_type = "purchase"
@@ -78,7 +75,7 @@ def generate_one_legit_txn(client_info, client_trans_df, client_device_ids, cate
     rule = "not applicable"
     
     # Возвращаем словарь со всеми данными сгенерированной транзакции
-    return build_transaction(client_id=client_id, txn_time=txn_time, txn_unix=txn_unix, amount=amount, txn_type=txn_type, \
+    return build_transaction(client_id=client_id, txn_unix=txn_unix, amount=amount, txn_type=txn_type, \
                              channel=channel, category_name=category_name, online=online, merchant_id=merchant_id, \
                              trans_city=trans_city, trans_lat=trans_lat, trans_lon=trans_lon, trans_ip=trans_ip, \
                              device_id=device_id, account=account, is_fraud=is_fraud, is_suspicious=is_suspicious, \
@@ -87,7 +84,7 @@ def generate_one_legit_txn(client_info, client_trans_df, client_device_ids, cate
 
 # 2. Функция генерации множества легальных транзакций для нескольких клиентов
 
-def gen_multiple_legit_txns(configs, txn_recorder, ignore_index=True):
+def gen_multiple_legit_txns(configs, txn_recorder, write=True):
     """
     Генерирует несколько транзакций для каждого клиента ориентируясь 
     на существующие транзакции если они есть.
@@ -97,13 +94,11 @@ def gen_multiple_legit_txns(configs, txn_recorder, ignore_index=True):
     ---------------------------------------------------
     configs: LegitCfg. Конфиги и данные для генерации легальных транзакций.
     txn_recorder: LegitTxnsRecorder. 
-    ignore_index: bool. Сбросить ли индекс при конкатенации датафреймов
-                  в финальный датафрейм с транзакциями всех клиентов
+    write: bool. Собрать ли чанки в целый датафрейм и записать его в файлы.
+           False - только запись чанков. Для генерации в нескольких процессах.
     """
     clients_df = configs.clients
     trans_df = configs.transactions
-    client_devices = configs.client_devices
-    offline_merchants = configs.offline_merchants
     categories = configs.categories
     avg_txn_num = configs.txn_num["avg_txn_num"]
     txn_num_std = configs.txn_num["txn_num_std"]
@@ -112,27 +107,48 @@ def gen_multiple_legit_txns(configs, txn_recorder, ignore_index=True):
     
     # Сюда будем собирать сгенрированные транзакции клиента в виде словарей.
     client_txns = txn_recorder.client_txns
+
+    # Пакетная генерация. Все транз-ции клиента создаются за один вызов
+    batch_gen = LegitBatchGenerator(configs=configs) if configs.engine == "batch" else None
+    # Уже существующие транзакции по клиентам. Группировка один раз вместо фильтра на клиента
+    existing_txns = dict(tuple(trans_df.groupby("client_id")))
     
     for client_info in clients_df.itertuples():
         txn_recorder.clients_counter += 1
+        # Свой поток случайных чисел у каждого клиента. Транзакции клиента не зависят
+        # от других клиентов и от кол-ва процессов генерации
+        rng = client_rng(seed=configs.seed, stage="legit", client_id=client_info.client_id)
 
         # случайное кол-во транзакций на клиента взятое из нормального распределения с мин. и макс. лимитами
         txns_num = gen_trans_number_norm(avg_num=avg_txn_num, num_std=txn_num_std, low_bound=low_bound, \
-                                             up_bound=up_bound)
-        merchants_from_city = offline_merchants[offline_merchants["city"] == client_info.city]
-        client_transactions = trans_df.loc[trans_df.client_id == client_info.client_id]
-        
-        # id девайсов клиента для онлайн транзакций
-        client_device_ids = client_devices.loc[client_devices.client_id == client_info.client_id, "device_id"]
+                                             up_bound=up_bound, rng=rng)
+        client_transactions = existing_txns.get(client_info.client_id)
+
+        if batch_gen is not None:
+            # Хронология существующих транзакций клиента для минимальных интервалов
+            timeline = None if client_transactions is None \
+                       else ClientTimeline.from_txns(txns_df=client_transactions, client_id=client_info.client_id)
+            client_block = batch_gen.client_txns(client_info=client_info, txns_num=txns_num, rng=rng, \
+                                                 timeline=timeline)
+            txn_recorder.txns_counter += txns_num # счетчик всех транз-ций
+            # Управление записью транзакций чанками в файлы.
+            txn_recorder.record_block(block=client_block)
+            continue
+
+        if client_transactions is None:
+            client_transactions = trans_df.iloc[:0]
+        # История транзакций клиента. Нужна т.к. иногда при генерации других транзакций 
+        # нужно знать уже созданные транзакции. С хронологией для поиска ближайших по времени
+        history = ClientTxnHistory.from_txns(txns_df=client_transactions, client_id=client_info.client_id, \
+                                             timeline=True)
         
         for _ in range(txns_num):
-            # семплирование категории для транзакции
-            category = categories.sample(1, replace=True, weights=categories.share)
+            # семплирование категории для транзакции по share через alias таблицу
+            category = categories.iloc[[configs.samplers.draw(key="categories", rng=rng)]]
 
             # генерация одной транзакции
-            one_txn = generate_one_legit_txn(client_info=client_info, client_trans_df=client_transactions, \
-                                             category=category, client_device_ids=client_device_ids, \
-                                             merchants_df=merchants_from_city, configs=configs)
+            one_txn = generate_one_legit_txn(client_info=client_info, timeline=history.timeline, \
+                                             category=category, configs=configs, rng=rng)
             # Запись транз-ции в список транз-ций текущего клиента.
             client_txns.append(one_txn)
             txn_recorder.txns_counter += 1 # счетчик всех транз-ций
@@ -140,13 +156,14 @@ def gen_multiple_legit_txns(configs, txn_recorder, ignore_index=True):
             # Управление записью транзакций чанками в файлы.
             txn_recorder.record_chunk(txn=one_txn, txns_num=txns_num)
             
-            # Добавляем созданную транзакцию к транзакциям клиента, т.к. иногда 
-            # при генерации других транзакций нужно знать уже созданные транзакции
-            one_txn_df = pd.DataFrame([one_txn])
-            client_transactions = pd.concat([client_transactions, one_txn_df], ignore_index=ignore_index)
+            # Добавляем созданную транзакцию в историю клиента
+            history.append(one_txn)
         
         client_txns.clear() # Конец генерации на клиента. Чистим список для текущего кл-та
 
+    if not write:
+        return
+
     txn_recorder.build_from_chunks()
 
     # Запись собранного датафрейма в два файла в разные директории: data/generated/lastest/
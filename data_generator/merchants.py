@@ -0,0 +1,265 @@
+# Индекс оффлайн мерчантов для быстрого семплирования по городу и категории
+import numpy as np
+
+from data_generator.rng import get_rng
+
+
+class MerchantIndex:
+    """
+    Индекс оффлайн мерчантов по (город, категория).
+    Мерчанты отсортированы по категории, а внутри категории по городу.
+    Поэтому мерчанты одной пары (город, категория) и мерчанты одной категории
+    лежат в непрерывных диапазонах массивов. Семплирование с равной
+    вероятностью за O(1) без фильтрации датафрейма.
+    ---------
+    Атрибуты:
+    ---------
+    merchant_id: np.ndarray. id мерчантов.
+    merchant_lat: np.ndarray. Широта мерчантов.
+    merchant_lon: np.ndarray. Долгота мерчантов.
+    city: np.ndarray. Города мерчантов.
+    category: np.ndarray. Категории мерчантов.
+    pair_bounds: dict. (город, категория) -> (начало, конец) диапазона в массивах.
+    cat_bounds: dict. категория -> (начало, конец) диапазона в массивах.
+    """
+    def __init__(self, merchants_df):
+        """
+        merchants_df: pd.DataFrame. Оффлайн мерчанты с колонками: city, category,
+                      merchant_id, merchant_lat, merchant_lon.
+        """
+        merchants = merchants_df.sort_values(["category", "city"], kind="stable")
+
+        self.merchant_id = merchants["merchant_id"].to_numpy()
+        self.merchant_lat = merchants["merchant_lat"].to_numpy(dtype=np.float64)
+        self.merchant_lon = merchants["merchant_lon"].to_numpy(dtype=np.float64)
+        self.city = merchants["city"].to_numpy(dtype=object)
+        self.category = merchants["category"].to_numpy(dtype=object)
+        self.set_bounds()
+
+
+    def set_bounds(self):
+        """
+        Границы диапазонов пар (город, категория) и категорий в отсортированных массивах.
+        """
+        categories = self.category
+        self.pair_bounds = {}
+        self.cat_bounds = {}
+        # Границы диапазонов там где меняется категория или город
+        changes = np.flatnonzero((categories[1:] != categories[:-1]) | (self.city[1:] != self.city[:-1])) + 1
+        starts = np.concatenate(([0], changes))
+        ends = np.concatenate((changes, [categories.shape[0]]))
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            category = categories[start]
+            self.pair_bounds[(self.city[start], category)] = (start, end)
+            cat_start, _ = self.cat_bounds.get(category, (start, end))
+            self.cat_bounds[category] = (cat_start, end)
+
+
+    def to_arrays(self):
+        """
+        Массивы индекса для ReferenceStore.
+        ---------------
+        Возвращает (массивы, скалярные параметры)
+        """
+        arrays = {"merchant_id": self.merchant_id, "merchant_lat": self.merchant_lat, \
+                  "merchant_lon": self.merchant_lon, "city": self.city, "category": self.category}
+        return arrays, {}
+
+
+    @classmethod
+    def from_arrays(cls, merchant_id, merchant_lat, merchant_lon, city, category):
+        """
+        Индекс из отсортированных массивов to_arrays без сортировки датафрейма.
+        Заново считаются только границы диапазонов.
+        ---------------
+        merchant_id: np.ndarray. id мерчантов.
+        merchant_lat: np.ndarray. Широта мерчантов.
+        merchant_lon: np.ndarray. Долгота мерчантов.
+        city: np.ndarray. Города мерчантов.
+        category: np.ndarray. Категории мерчантов.
+        """
+        index = cls.__new__(cls)
+        index.merchant_id = merchant_id
+        index.merchant_lat = merchant_lat
+        index.merchant_lon = merchant_lon
+        index.city = city
+        index.category = category
+        index.set_bounds()
+        return index
+
+
+    def take(self, idx):
+        """
+        Данные мерчантов по позициям в индексе.
+        ---------------
+        idx: int | np.ndarray. Позиции мерчантов.
+        ---------------
+        Возвращает merchant_id, широту, долготу и город. Скаляры или массивы как idx.
+        """
+        return self.merchant_id[idx], self.merchant_lat[idx], self.merchant_lon[idx], self.city[idx]
+
+
+    def sample(self, city, category, size=None, rng=None):
+        """
+        Случайный мерчант категории в городе. С равной вероятностью.
+        ---------------
+        city: str. Город.
+        category: str. Категория мерчанта.
+        size: int. Кол-во мерчантов с повторениями. None - один мерчант скалярами.
+        rng: np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию.
+        ---------------
+        Возвращает merchant_id, широту, долготу и город
+        """
+        bounds = self.pair_bounds.get((city, category))
+        if bounds is None:
+            raise ValueError(f"No offline merchants of category '{category}' in city '{city}'")
+
+        start, end = bounds
+        return self.take(get_rng(rng).integers(start, end, size=size))
+
+
+    def sample_other_city(self, city, category, size=None, rng=None):
+        """
+        Случайный мерчант категории из любого города кроме указанного.
+        С равной вероятностью среди всех таких мерчантов.
+        Диапазон города исключается сдвигом позиции, без фильтрации.
+        ---------------
+        city: str. Город который надо исключить. Обычно город клиента.
+        category: str. Категория мерчанта.
+        size: int. Кол-во мерчантов с повторениями. None - один мерчант скалярами.
+        rng: np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию.
+        ---------------
+        Возвращает merchant_id, широту, долготу и город
+        """
+        cat_start, cat_end = self.cat_bounds.get(category, (0, 0))
+        # Диапазон исключаемого города внутри диапазона категории. Может отсутствовать
+        city_start, city_end = self.pair_bounds.get((city, category), (cat_end, cat_end))
+        excluded = city_end - city_start
+        available = cat_end - cat_start - excluded
+        if available <= 0:
+            raise ValueError(f"No offline merchants of category '{category}' outside city '{city}'")
+
+        idx = cat_start + get_rng(rng).integers(0, available, size=size)
+        # Позиции начиная с диапазона города сдвигаем за него
+        idx = np.where(idx >= city_start, idx + excluded, idx)
+        if size is None:
+            idx = int(idx)
+        return self.take(idx)
+
+
+class MerchantBandIndex:
+    """
+    Семплирование оффлайн мерчанта категории из другого города с весами
+    по полосам расстояния от города клиента. Управляет распределением
+    дистанций гео скачков fast_geo_change. Расстояние между городами -
+    между центрами городов, средними координатами их мерчантов.
+    Сначала полоса по весу среди полос где есть мерчанты категории,
+    затем мерчант с равной вероятностью среди мерчантов категории
+    в городах полосы. Диапазоны городов полосы кэшируются по (город, категория).
+    Если ни в одной полосе нет мерчантов категории, то семплирование
+    как в MerchantIndex.sample_other_city.
+    Интерфейс sample_other_city как у MerchantIndex.
+    ---------
+    Атрибуты:
+    ---------
+    merchant_index: MerchantIndex. Индекс оффлайн мерчантов.
+    bands: list. Полосы расстояния: dict с ключами min, max (км, max не включается) и weight.
+    cities: np.ndarray. Города мерчантов.
+    city_pos: dict. Город -> позиция в cities.
+    city_bands: np.ndarray. Полоса для пары городов [откуда, куда]. -1 - вне полос или тот же город.
+    cache: dict. (город, категория) -> веса полос и диапазоны мерчантов в городах каждой полосы.
+    """
+    def __init__(self, merchant_index, bands, distance):
+        """
+        merchant_index: MerchantIndex. Индекс оффлайн мерчантов.
+        bands: list. Полосы расстояния: dict с ключами min, max (км) и weight.
+        distance: DistanceService. Расчет расстояний между центрами городов.
+        """
+        self.merchant_index = merchant_index
+        self.bands = bands
+
+        # Центры городов - средние координаты мерчантов
+        self.cities, city_codes = np.unique(merchant_index.city, return_inverse=True)
+        counts = np.bincount(city_codes)
+        center_lat = np.bincount(city_codes, weights=merchant_index.merchant_lat) / counts
+        center_lon = np.bincount(city_codes, weights=merchant_index.merchant_lon) / counts
+        self.city_pos = dict(zip(self.cities.tolist(), range(self.cities.shape[0])))
+
+        # Расстояния между всеми парами городов одним векторным вызовом
+        from_pos, to_pos = np.divmod(np.arange(self.cities.shape[0] ** 2), self.cities.shape[0])
+        city_dist = distance.distance(lat_01=center_lat[from_pos], lon_01=center_lon[from_pos], \
+                                      lat_02=center_lat[to_pos], lon_02=center_lon[to_pos]) \
+                            .reshape(self.cities.shape[0], self.cities.shape[0])
+
+        self.city_bands = np.full(city_dist.shape, -1, dtype=np.int64)
+        for band_num, band in enumerate(bands):
+            self.city_bands[(city_dist >= band["min"]) & (city_dist < band["max"])] = band_num
+        np.fill_diagonal(self.city_bands, -1)
+        self.cache = {}
+
+
+    def band_ranges(self, city, category):
+        """
+        Веса полос и диапазоны мерчантов категории в городах каждой полосы.
+        Считается один раз для пары (город, категория).
+        ---------------
+        city: str. Город клиента.
+        category: str. Категория мерчанта.
+        ---------------
+        Возвращает (weights, ranges) или None если ни в одной полосе нет мерчантов.
+        ranges - список по полосам: (начала диапазонов, накопленные длины диапазонов)
+        """
+        key = (city, category)
+        if key in self.cache:
+            return self.cache[key]
+
+        city_pos = self.city_pos.get(city)
+        pair_bounds = self.merchant_index.pair_bounds
+        weights = np.zeros(len(self.bands), dtype=np.float64)
+        ranges = []
+        for band_num, band in enumerate(self.bands):
+            band_cities = [] if city_pos is None else self.cities[self.city_bands[city_pos] == band_num]
+            bounds = [pair_bounds[(other, category)] for other in band_cities if (other, category) in pair_bounds]
+            starts = np.array([start for start, _ in bounds], dtype=np.int64)
+            cum_sizes = np.cumsum([end - start for start, end in bounds], dtype=np.int64)
+            ranges.append((starts, cum_sizes))
+            if cum_sizes.shape[0] > 0:
+                weights[band_num] = band["weight"]
+
+        self.cache[key] = (weights / weights.sum(), ranges) if weights.sum() > 0 else None
+        return self.cache[key]
+
+
+    def sample_other_city(self, city, category, size=None, rng=None):
+        """
+        Случайный мерчант категории из другого города с весами полос расстояния.
+        ---------------
+        city: str. Город который надо исключить. Обычно город клиента.
+        category: str. Категория мерчанта.
+        size: int. Кол-во мерчантов с повторениями. None - один мерчант скалярами.
+        rng: np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию.
+        ---------------
+        Возвращает merchant_id, широту, долготу и город
+        """
+        band_ranges = self.band_ranges(city=city, category=category)
+        if band_ranges is None:
+            return self.merchant_index.sample_other_city(city=city, category=category, size=size, rng=rng)
+
+        rng = get_rng(rng)
+        weights, ranges = band_ranges
+        draws = 1 if size is None else size
+        band_nums = rng.choice(weights.shape[0], size=draws, p=weights)
+        idx = np.empty(draws, dtype=np.int64)
+
+        for band_num in np.unique(band_nums):
+            positions = np.flatnonzero(band_nums == band_num)
+            starts, cum_sizes = ranges[band_num]
+            # Позиция среди всех мерчантов полосы, затем диапазон города и сдвиг внутри него
+            shift = rng.integers(0, cum_sizes[-1], size=positions.shape[0])
+            range_num = np.searchsorted(cum_sizes, shift, side="right")
+            offsets = cum_sizes - np.diff(cum_sizes, prepend=0)
+            idx[positions] = starts[range_num] + shift - offsets[range_num]
+
+        if size is None:
+            return self.merchant_index.take(int(idx[0]))
+        return self.merchant_index.take(idx)
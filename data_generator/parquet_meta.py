@@ -0,0 +1,14 @@
+# Сведения о parquet файлах из метаданных в конце файла (footer) без чтения самих данных
+import pyarrow.parquet as pq
+
+
+# 1.
+
+def parquet_num_rows(path):
+    """
+    Кол-во строк parquet файла. Читаются только метаданные файла,
+    время не зависит от размера данных.
+    ---------------
+    path: str. Путь к parquet файлу.
+    """
+    return pq.read_metadata(path).num_rows
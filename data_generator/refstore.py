@@ -0,0 +1,193 @@
+# Общие справочные таблицы для процессов генерации через memory-mapped файлы Arrow IPC
+import os
+import shutil
+import pandas as pd
+import geopandas as gpd
+import pyarrow as pa
+from dataclasses import dataclass, fields, replace
+
+
+# Таблицы уже открытые в текущем процессе. Путь -> DataFrame или Series.
+# Процесс открывает каждый файл один раз
+_attached = {}
+
+
+# 1. Ссылка на таблицу в хранилище
+
+@dataclass(frozen=True)
+class TableRef:
+    """
+    Ссылка на таблицу записанную в хранилище. Передается в процессы вместо
+    самой таблицы - при pickle это только путь к файлу.
+    ---------------------
+    path: str. Путь к файлу Arrow IPC.
+    series: bool. Таблица была pd.Series. Читается обратно как Series.
+    geometry: str. Колонка геометрии GeoDataFrame, записанная в WKB. None - обычная таблица.
+    crs: str. CRS GeoDataFrame в WKT. None - без CRS.
+    """
+    path: str
+    series: bool = False
+    geometry: str = None
+    crs: str = None
+
+
+    def load(self):
+        """
+        Открыть таблицу через memory map. Страницы файла общие для всех процессов
+        в кэше ОС. Числовые колонки без пропусков не копируются в память процесса,
+        строковые колонки собираются в объекты pandas в каждом процессе.
+        """
+        if self.path in _attached:
+            return _attached[self.path]
+
+        with pa.memory_map(self.path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        data = table.to_pandas(split_blocks=True)
+        if self.series:
+            data = data.iloc[:, 0]
+        if self.geometry is not None:
+            geometry = gpd.GeoSeries.from_wkb(data[self.geometry], index=data.index)
+            data = gpd.GeoDataFrame(data.assign(**{self.geometry: geometry}), \
+                                    geometry=self.geometry, crs=self.crs)
+
+        _attached[self.path] = data
+        return data
+
+
+# 2. Ссылка на объект из массивов в хранилище
+
+@dataclass(frozen=True)
+class ObjectRef:
+    """
+    Ссылка на объект, например индекс, массивы которого записаны в хранилище.
+    При pickle это класс, пути к файлам массивов и скалярные параметры.
+    Класс объекта реализует to_arrays и from_arrays.
+    ---------------------
+    cls: type. Класс объекта.
+    arrays: dict. Название массива -> TableRef.
+    state: dict. Скалярные параметры объекта для from_arrays.
+    """
+    cls: type
+    arrays: dict
+    state: dict
+
+
+    def load(self):
+        """
+        Собрать объект из массивов подключенных через memory map. Массивы открываются
+        один раз на процесс, объект собирается заново при каждом вызове - изменяемое
+        состояние, например курсор пула, не общее между вызовами.
+        """
+        arrays = {name: ref.load().to_numpy() for name, ref in self.arrays.items()}
+        return self.cls.from_arrays(**arrays, **self.state)
+
+
+# 3. Хранилище справочных таблиц запуска
+
+class ReferenceStore:
+    """
+    Хранилище справочных таблиц только для чтения. Таблицы из датаклассов
+    конфигов записываются один раз в файлы Arrow IPC без сжатия. В процессы
+    передаются конфиги со ссылками TableRef вместо таблиц. Процесс подключает
+    таблицы через memory map вместо распаковки своей копии из pickle.
+    ---------
+    Атрибуты:
+    ---------
+    directory: str. Папка с файлами таблиц.
+    refs: dict. Название таблицы -> TableRef или ObjectRef.
+    """
+    def __init__(self, directory):
+        """
+        directory: str. Папка с файлами таблиц. Создается если её нет.
+        """
+        self.directory = directory
+        self.refs = {}
+        os.makedirs(directory, exist_ok=True)
+
+
+    def put(self, name, data):
+        """
+        Записать таблицу в хранилище.
+        ---------------
+        name: str. Название таблицы. Имя файла.
+        data: pd.DataFrame | pd.Series | gpd.GeoDataFrame. Таблица. Геометрия пишется в WKB.
+        ---------------
+        Возвращает TableRef
+        """
+        if name in self.refs:
+            return self.refs[name]
+
+        series = isinstance(data, pd.Series)
+        if series:
+            data = data.to_frame()
+        geometry, crs = None, None
+        if isinstance(data, gpd.GeoDataFrame):
+            geometry = data.geometry.name
+            crs = None if data.crs is None else data.crs.to_wkt()
+            data = data.to_wkb()
+        if type(data) is not pd.DataFrame:
+            raise ValueError(f"Table '{name}' of type {type(data).__name__} can't be stored. " \
+                             "Expected pd.DataFrame, pd.Series or gpd.GeoDataFrame")
+
+        path = os.path.join(self.directory, f"{name}.arrow")
+        table = pa.Table.from_pandas(data)
+        with pa.OSFile(path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        self.refs[name] = TableRef(path=path, series=series, geometry=geometry, crs=crs)
+        return self.refs[name]
+
+
+    def put_object(self, name, obj):
+        """
+        Записать массивы объекта в хранилище. Каждый массив - отдельный файл.
+        ---------------
+        name: str. Название объекта. Префикс имен файлов.
+        obj: object. Объект с методом to_arrays, например ClientDeviceIndex.
+        ---------------
+        Возвращает ObjectRef
+        """
+        if name in self.refs:
+            return self.refs[name]
+
+        arrays, state = obj.to_arrays()
+        refs = {key: self.put(name=f"{name}.{key}", data=pd.Series(values, name=key)) \
+                for key, values in arrays.items()}
+        self.refs[name] = ObjectRef(cls=type(obj), arrays=refs, state=state)
+        return self.refs[name]
+
+
+    def detach(self, configs, names, objects=()):
+        """
+        Копия датакласса конфигов с таблицами и объектами замененными на ссылки.
+        ---------------
+        configs: dataclass. Датакласс конфигов, например LegitCfg.
+        names: tuple. Названия полей с таблицами.
+        objects: tuple. Названия полей с объектами из массивов, например индексами.
+        """
+        refs = {name: self.put(name=name, data=getattr(configs, name)) for name in names}
+        refs.update({name: self.put_object(name=name, obj=getattr(configs, name)) for name in objects})
+        return replace(configs, **refs)
+
+
+    def cleanup(self):
+        """
+        Удалить файлы хранилища. Вызывать после завершения всех процессов.
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.refs = {}
+
+
+# 4.
+
+def attach(configs):
+    """
+    Копия датакласса конфигов с подключенными таблицами и собранными объектами
+    вместо ссылок TableRef и ObjectRef. Вызывается в процессе перед генерацией.
+    ---------------
+    configs: dataclass. Датакласс конфигов после ReferenceStore.detach.
+    """
+    attached = {field.name: getattr(configs, field.name).load() for field in fields(configs) \
+                if isinstance(getattr(configs, field.name), (TableRef, ObjectRef))}
+    return replace(configs, **attached)
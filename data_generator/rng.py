@@ -0,0 +1,192 @@
+# Генераторы случайных чисел с ключом (seed запуска, этап, client_id)
+import numpy as np
+from scipy.stats import truncnorm
+
+
+# Коды этапов генерации. Часть ключа потока случайных чисел
+STAGES = {"legit": 1, "compr": 2, "distributor": 3, "purchaser": 4}
+
+# Генератор по умолчанию. Для функций вызванных без rng, например вне генератора
+default_rng = np.random.default_rng()
+
+
+# 1.
+
+def resolve_seed(seed=None):
+    """
+    Seed запуска. Если seed не задан в base.yaml, то создается случайный.
+    Вызывается один раз в начале запуска. Результат записывается в base_cfg["seed"].
+    ---------------
+    seed: int | None. Seed из base.yaml.
+    """
+    if seed is None:
+        return int(np.random.SeedSequence().entropy % 2**63)
+    return int(seed)
+
+
+# 2.
+
+def stage_rng(seed, stage):
+    """
+    Генератор этапа генерации. Для операций над всеми клиентами этапа:
+    выборки клиентов, весов времени.
+    ---------------
+    seed: int. Seed запуска.
+    stage: str. Этап: 'legit', 'compr', 'distributor' или 'purchaser'.
+    """
+    return np.random.Generator(np.random.Philox(np.random.SeedSequence([seed, STAGES[stage]])))
+
+
+# 3.
+
+def client_rng(seed, stage, client_id, buffered=False):
+    """
+    Генератор одного клиента на одном этапе. Counter-based Philox с ключом
+    (seed, этап, client_id). Поток клиента не зависит от порядка клиентов
+    и от того в каком процессе и с какими еще клиентами он генерируется.
+    ---------------
+    seed: int. Seed запуска.
+    stage: str. Этап: 'legit', 'compr', 'distributor' или 'purchaser'.
+    client_id: int. id клиента.
+    buffered: bool. Вернуть BufferedRng - для кода с множеством скалярных выборок.
+    """
+    # 1 отделяет ключ клиента от ключа этапа. SeedSequence не различает ключи
+    # отличающиеся только нулями в конце, поэтому client_id 0 без него совпал бы с этапом
+    bit_generator = np.random.Philox(np.random.SeedSequence([seed, STAGES[stage], 1, int(client_id)]))
+    if buffered:
+        return BufferedRng(bit_generator)
+    return np.random.Generator(bit_generator)
+
+
+# 4.
+
+def batch_rng(seed, stage):
+    """
+    Генератор пакетной генерации этапа. Один поток на все транзакции этапа,
+    когда они генерируются массивами сразу для всех клиентов.
+    ---------------
+    seed: int. Seed запуска.
+    stage: str. Этап: 'legit', 'compr', 'distributor' или 'purchaser'.
+    """
+    # 2 отделяет ключ пакетной генерации от ключа этапа и ключей клиентов
+    return np.random.Generator(np.random.Philox(np.random.SeedSequence([seed, STAGES[stage], 2])))
+
+
+# 5. Таблицы обратной функции распределения обрезанного нормального
+
+# (low_bound, high_bound, mean, std) -> значения ppf на равномерной сетке. Общие для всех генераторов
+_truncnorm_tables = {}
+# Кол-во интервалов сетки. Линейная интерполяция между узлами
+TRUNCNORM_GRID = 4096
+
+
+def truncnorm_table(low_bound, high_bound, mean, std):
+    """
+    Значения обратной функции распределения обрезанного нормального в узлах
+    равномерной сетки по [0, 1]. Считается один раз для набора параметров.
+    ---------------
+    low_bound: float. Нижняя граница значений.
+    high_bound: float. Верхняя граница значений.
+    mean: float. Среднее.
+    std: float. Стандартное отклонение.
+    ---------------
+    Возвращает list из TRUNCNORM_GRID + 1 значений
+    """
+    key = (float(low_bound), float(high_bound), float(mean), float(std))
+    table = _truncnorm_tables.get(key)
+    if table is None:
+        grid = np.linspace(0, 1, TRUNCNORM_GRID + 1)
+        table = truncnorm.ppf(grid, (low_bound - mean) / std, (high_bound - mean) / std, loc=mean, scale=std)
+        # Края сетки - точно границы, без погрешности ppf
+        table[0], table[-1] = low_bound, high_bound
+        table = table.tolist()
+        _truncnorm_tables[key] = table
+    return table
+
+
+# 6. Генератор с буфером равномерных чисел для скалярных выборок
+
+class BufferedRng(np.random.Generator):
+    """
+    np.random.Generator который отдает скалярные uniform, integers и random
+    из заранее взятого блока равномерных чисел, а скалярное обрезанное
+    нормальное - через кэшированную таблицу обратной функции распределения.
+    Скалярный truncnorm.rvs стоит сотни микросекунд, выборка из таблицы - около одной.
+    Выборки массивами и остальные методы работают как у np.random.Generator,
+    поэтому генератор можно передавать везде вместо обычного, в т.ч. в pandas.
+    Поток детерминирован seed-ом, но значения отличаются от обычного генератора
+    с тем же bit generator.
+    ---------
+    Атрибуты:
+    ---------
+    block: int. Размер блока равномерных чисел.
+    """
+    def __init__(self, bit_generator, block=64):
+        """
+        bit_generator: np.random.BitGenerator. Источник случайных бит.
+        block: int. Размер блока равномерных чисел.
+        """
+        super().__init__(bit_generator)
+        self.block = block
+        self._buffer = []
+        self._cursor = 0
+
+
+    def next_uniform(self):
+        """
+        Следующее равномерное число из [0, 1). Новый блок когда буфер закончился.
+        """
+        if self._cursor == len(self._buffer):
+            self._buffer = super().random(self.block).tolist()
+            self._cursor = 0
+        value = self._buffer[self._cursor]
+        self._cursor += 1
+        return value
+
+
+    def random(self, size=None, dtype=np.float64, out=None):
+        if size is None and out is None and dtype is np.float64:
+            return self.next_uniform()
+        return super().random(size=size, dtype=dtype, out=out)
+
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        if size is None and isinstance(low, (int, float)) and isinstance(high, (int, float)):
+            return low + (high - low) * self.next_uniform()
+        return super().uniform(low=low, high=high, size=size)
+
+
+    def integers(self, low, high=None, size=None, dtype=np.int64, endpoint=False):
+        if size is None and isinstance(low, (int, np.integer)) and isinstance(high, (int, np.integer)):
+            high = high + 1 if endpoint else high
+            if high <= low:
+                raise ValueError("low >= high")
+            return np.int64(low + int(self.next_uniform() * (high - low)))
+        return super().integers(low, high=high, size=size, dtype=dtype, endpoint=endpoint)
+
+
+    def truncnorm(self, low_bound, high_bound, mean, std):
+        """
+        Одно значение обрезанного нормального распределения.
+        Линейная интерполяция таблицы обратной функции распределения.
+        ---------------
+        low_bound: float. Нижняя граница значений.
+        high_bound: float. Верхняя граница значений.
+        mean: float. Среднее.
+        std: float. Стандартное отклонение.
+        """
+        table = truncnorm_table(low_bound=low_bound, high_bound=high_bound, mean=mean, std=std)
+        position = self.next_uniform() * TRUNCNORM_GRID
+        i = int(position)
+        return table[i] + (table[i + 1] - table[i]) * (position - i)
+
+
+# 7.
+
+def get_rng(rng=None):
+    """
+    Переданный генератор или генератор по умолчанию.
+    ---------------
+    rng: np.random.Generator | None.
+    """
+    return default_rng if rng is None else rng
@@ -21,7 +21,7 @@ class ComprRunner:
     txn_recorder: FraudTxnsRecorder. Запись транзакций в файл.
     text: str. Текст для вставки в спиннер.
     """
-    def __init__(self, base_cfg, legit_cfg, time_cfg, fraud_cfg, compr_cfg, run_dir):
+    def __init__(self, base_cfg, legit_cfg, time_cfg, fraud_cfg, compr_cfg, run_dir, context=None):
         """
         base_cfg: dict. Конфиги из base.yaml
         legit_cfg: dict. Конфиги из legit.yaml
@@ -30,10 +30,12 @@ class ComprRunner:
         compr_cfg: dict. Конфиги для compromised фрода из compr.yaml
         run_dir: str. Название директории для хранения сгенерированных
                  данных текущей генерации.
+        context: RunDataContext. Общие данные запуска. None - свой контекст у билдера.
         """
         self.cfg_builder = ComprConfigBuilder(base_cfg=base_cfg, legit_cfg=legit_cfg, \
                                               time_cfg=time_cfg, fraud_cfg=fraud_cfg, \
-                                              compr_cfg=compr_cfg, run_dir=run_dir)
+                                              compr_cfg=compr_cfg, run_dir=run_dir, \
+                                              context=context)
         self.configs = self.cfg_builder.build_cfg()
         self.part_data = FraudTxnPartData(configs=self.configs)
         self.fraud_amts = TransAmount(configs=self.configs)
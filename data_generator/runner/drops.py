@@ -5,6 +5,9 @@ from data_generator.fraud.drops.build.builder import DropBaseClasses
 from data_generator.fraud.recorder import FraudTxnsRecorder
 from data_generator.fraud.drops.txns import CreateDropTxn
 from data_generator.fraud.drops.simulator import DropSimulator
+from data_generator.fraud.drops.parallel import gen_drop_txns_parallel
+from data_generator.fraud.drops.events import gen_drop_txns_events
+from data_generator.fraud.drops.lockstep import gen_drop_txns_lockstep
 from data_generator.runner.utils import spinner_decorator
 
 
@@ -28,7 +31,8 @@ class DropsRunner:
     drop_sim: DropSimulator. Генератор дроп фрода. По умолчанию None. 
               Создается при вызове self.build_sim().
     """
-    def __init__(self, base_cfg, legit_cfg, time_cfg, fraud_cfg, drops_cfg, run_dir, drop_type):
+    def __init__(self, base_cfg, legit_cfg, time_cfg, fraud_cfg, drops_cfg, run_dir, drop_type, \
+                 context=None):
         """
         base_cfg: dict. Конфиги из base.yaml
         legit_cfg: dict. Конфиги из legit.yaml
@@ -37,10 +41,13 @@ class DropsRunner:
         drops_cfg: dict. Конфиги для дроп фрода из drops.yaml
         run_dir: str. Название директории для хранения сгенерированных
                  данных текущей генерации.
+        drop_type: str. Тип дропа: 'distributor' или 'purchaser'.
+        context: RunDataContext. Общие данные запуска. None - свой контекст у билдера.
         """
         self.base_cfg = base_cfg
         self.cfg_builder = DropConfigBuilder(base_cfg=base_cfg, legit_cfg=legit_cfg, time_cfg=time_cfg, \
-                                             fraud_cfg=fraud_cfg, drop_cfg=drops_cfg, run_dir=run_dir)
+                                             fraud_cfg=fraud_cfg, drop_cfg=drops_cfg, run_dir=run_dir, \
+                                             context=context)
         self.drop_type = drop_type
         self.text = f"{drop_type.capitalize()} drops generation"
         self.configs = None
@@ -77,5 +84,21 @@ class DropsRunner:
         для дропов указанного типа.
         """
         self.build_sim()
+
+        # Очередь событий всех дропов по времени если указано в drops.yaml
+        if self.configs.engine == "event":
+            gen_drop_txns_events(configs=self.configs, drop_sim=self.drop_sim)
+            return
+
+        # Шаг всех дропов разом массивами если указано в drops.yaml
+        if self.configs.engine == "lockstep":
+            gen_drop_txns_lockstep(configs=self.configs, drop_sim=self.drop_sim)
+            return
+
+        # Несколько процессов если указано в drops.yaml
+        if self.configs.workers > 1:
+            gen_drop_txns_parallel(configs=self.configs, drop_sim=self.drop_sim)
+            return
+
         self.drop_sim.run()
 
@@ -1,6 +1,7 @@
 # Запуск генерации легальных транзакций
 
 from data_generator.legit.txns import gen_multiple_legit_txns
+from data_generator.legit.parallel import gen_legit_txns_parallel
 from data_generator.legit.build.config import LegitConfigBuilder
 from data_generator.legit.recorder import LegitTxnsRecorder
 from data_generator.runner.utils import spinner_decorator
@@ -17,16 +18,17 @@ class LegitRunner:
     txn_recorder: LegitTxnsRecorder. Запись легальных транзакций в файл.
     text: str. Текст для вставки в спиннер.
     """
-    def __init__(self, base_cfg, legit_cfg, time_cfg, run_dir):
+    def __init__(self, base_cfg, legit_cfg, time_cfg, run_dir, context=None):
         """
         base_cfg: dict. Конфиги из base.yaml
         legit_cfg: dict. Конфиги из legit.yaml
         time_cfg: dict. Конфиги из time.yaml
         run_dir: str. Название директории для хранения сгенерированных
                  данных текущей генерации.
+        context: RunDataContext. Общие данные запуска. None - свой контекст у билдера.
         """
         self.cfg_builder = LegitConfigBuilder(base_cfg=base_cfg, legit_cfg=legit_cfg, \
-                                              time_cfg=time_cfg, run_dir=run_dir)
+                                              time_cfg=time_cfg, run_dir=run_dir, context=context)
         self.configs = self.cfg_builder.build_cfg()
         self.txn_recorder = LegitTxnsRecorder(configs=self.configs)
         self.text = "Legit txns generation"
@@ -40,6 +42,11 @@ class LegitRunner:
         configs = self.configs
         txn_recorder = self.txn_recorder
 
+        # Несколько процессов если указано в legit.yaml
+        if configs.workers > 1:
+            gen_legit_txns_parallel(configs=configs, txn_recorder=txn_recorder)
+            return
+
         gen_multiple_legit_txns(configs=configs, txn_recorder=txn_recorder)
 
 
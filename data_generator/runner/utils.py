@@ -24,6 +24,23 @@ def make_dir_for_run(base_cfg):
 
     return run_dir_path
 
+
+def write_run_seed(run_dir, seed, file_name="seed.yaml"):
+    """
+    Записать seed запуска в папку текущей генерации. В формате base.yaml,
+    чтобы повторить запуск со случайным seed.
+    Вернуть путь к файлу.
+    ---------------
+    run_dir: str. Путь к директории текущей генерации.
+    seed: int. Seed запуска после resolve_seed.
+    file_name: str. Название файла.
+    """
+    path = Path(run_dir) / file_name
+    with open(path, "w", encoding="utf8") as file:
+        file.write(f"seed: {seed}\n")
+
+    return path
+
 def spinner_decorator(func):
     def wrapper(self, *args, **kwargs):
         done = False
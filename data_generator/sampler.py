@@ -0,0 +1,174 @@
+# Взвешенное семплирование по alias таблицам (метод Уолкера)
+import numpy as np
+
+from data_generator.rng import get_rng
+
+
+# 1. Alias таблица одного распределения
+
+class AliasTable:
+    """
+    Alias таблица для семплирования по весам за O(1) на значение.
+    Таблица строится один раз. Каждое семплирование - случайная ячейка
+    и одно сравнение с её вероятностью, без перенормировки весов.
+    ---------
+    Атрибуты:
+    ---------
+    prob: np.ndarray. Вероятность оставить ячейку, а не взять её alias.
+    alias: np.ndarray. Индекс alias значения для каждой ячейки.
+    values: np.ndarray. Значения, которые возвращаются при семплировании.
+    """
+    def __init__(self, weights, values=None):
+        """
+        weights: array-like. Неотрицательные веса. Нормировать не обязательно.
+        values: array-like. Значения соответствующие весам.
+                None - возвращаются позиции 0..n-1.
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        n = weights.shape[0]
+        if n == 0 or (weights < 0).any() or not weights.sum() > 0:
+            raise ValueError("Weights must be non-empty, non-negative and have a positive sum")
+
+        self.values = np.arange(n) if values is None else np.asarray(values)
+        if self.values.shape[0] != n:
+            raise ValueError(f"Got {self.values.shape[0]} values for {n} weights")
+
+        # Метод Воуза: ячейки с весом меньше среднего добиваются остатком крупных
+        prob = weights * n / weights.sum()
+        alias = np.arange(n, dtype=np.int64)
+        small = [i for i in range(n) if prob[i] < 1]
+        large = [i for i in range(n) if prob[i] >= 1]
+
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            alias[less] = more
+            prob[more] -= 1 - prob[less]
+            if prob[more] < 1:
+                small.append(more)
+            else:
+                large.append(more)
+
+        # Остатки от погрешности округления
+        for i in small + large:
+            prob[i] = 1
+
+        self.prob = prob
+        self.alias = alias
+
+
+    @classmethod
+    def from_arrays(cls, prob, alias, values):
+        """
+        Таблица из уже построенных массивов без повторного построения.
+        ---------------
+        prob: np.ndarray. Вероятность оставить ячейку.
+        alias: np.ndarray. Индекс alias значения для каждой ячейки.
+        values: np.ndarray. Значения.
+        """
+        table = cls.__new__(cls)
+        table.prob = prob
+        table.alias = alias
+        table.values = values
+        return table
+
+
+    def draw(self, size=None, rng=None):
+        """
+        Семплирование значений с возвращением.
+        ---------------
+        size: int. Кол-во значений. None - одно значение скаляром.
+        rng: np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию.
+        """
+        rng = get_rng(rng)
+        cells = rng.integers(0, self.prob.shape[0], size=size)
+        keep = rng.random(size=size) < self.prob[cells]
+        return self.values[np.where(keep, cells, self.alias[cells])]
+
+
+# 2. Реестр alias таблиц конфига
+
+class SamplerRegistry:
+    """
+    Alias таблицы всех взвешенных распределений одного конфига по ключам.
+    Создается в билдере конфига и передается генераторам через конфиг.
+    ---------
+    Атрибуты:
+    ---------
+    tables: dict. Ключ -> AliasTable.
+    """
+    def __init__(self):
+        self.tables = {}
+
+
+    def add(self, key, weights, values=None):
+        """
+        Построить и добавить таблицу.
+        ---------------
+        key: str. Ключ распределения.
+        weights: array-like. Веса.
+        values: array-like. Значения. None - позиции весов.
+        """
+        self.tables[key] = AliasTable(weights=weights, values=values)
+
+
+    def add_time_weights(self, all_time_weights):
+        """
+        Добавить таблицы часов для всех паттернов времени.
+        Ключ - название паттерна, значения - часы.
+        ---------------
+        all_time_weights: dict. Результат get_all_time_patterns.
+        """
+        for key, pattern in all_time_weights.items():
+            weights = pattern["weights"]
+            self.add(key=key, weights=weights.proportion, values=weights.hours)
+
+
+    def to_arrays(self):
+        """
+        Массивы всех таблиц для ReferenceStore. Массивы таблицы i - prob_i, alias_i, values_i.
+        ---------------
+        Возвращает (массивы, скалярные параметры)
+        """
+        arrays = {}
+        for i, table in enumerate(self.tables.values()):
+            arrays.update({f"prob_{i}": table.prob, f"alias_{i}": table.alias, f"values_{i}": table.values})
+        return arrays, {"keys": list(self.tables)}
+
+
+    @classmethod
+    def from_arrays(cls, keys, **arrays):
+        """
+        Реестр из массивов to_arrays.
+        ---------------
+        keys: list. Ключи таблиц по порядку.
+        arrays: np.ndarray. Массивы таблиц prob_i, alias_i, values_i.
+        """
+        registry = cls()
+        for i, key in enumerate(keys):
+            registry.tables[key] = AliasTable.from_arrays(prob=arrays[f"prob_{i}"], alias=arrays[f"alias_{i}"], \
+                                                          values=arrays[f"values_{i}"])
+        return registry
+
+
+    def get(self, key):
+        """
+        Таблица по ключу.
+        ---------------
+        key: str. Ключ распределения.
+        """
+        table = self.tables.get(key)
+        if table is None:
+            raise KeyError(f"No sampler for key '{key}'")
+        return table
+
+
+    def draw(self, key, size=None, rng=None):
+        """
+        Семплирование из таблицы по ключу.
+        ---------------
+        key: str. Ключ распределения.
+        size: int. Кол-во значений. None - одно значение скаляром.
+        rng: np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию.
+        """
+        return self.get(key).draw(size=size, rng=rng)
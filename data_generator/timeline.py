@@ -0,0 +1,90 @@
+# Хронология транзакций клиента для поиска ближайших по времени транзакций
+from bisect import bisect_left, insort
+
+
+class ClientTimeline:
+    """
+    Отсортированное unix время транзакций одного клиента раздельно
+    для оффлайн и онлайн транзакций. Поиск ближайшей транзакции
+    бинарным поиском вместо сканирования датафрейма клиента.
+    Пополняется по мере генерации транзакций клиента.
+    ---------
+    Атрибуты:
+    ---------
+    client_id: int. id клиента. Для логирования. По умолчанию None.
+    offline_unix: list. Отсортированное unix время оффлайн транзакций.
+    online_unix: list. Отсортированное unix время онлайн транзакций.
+    last_unix: int. Unix время последней транзакции. По умолчанию None.
+    last_online: bool. Онлайн флаг последней транзакции. По умолчанию None.
+    """
+    def __init__(self, client_id=None):
+        """
+        client_id: int. id клиента.
+        """
+        self.client_id = client_id
+        self.offline_unix = []
+        self.online_unix = []
+        self.last_unix = None
+        self.last_online = None
+
+
+    @classmethod
+    def from_txns(cls, txns_df, client_id=None):
+        """
+        Хронология из уже существующих транзакций клиента.
+        ---------------
+        txns_df: pd.DataFrame. Транзакции клиента с колонками unix_time и online.
+        client_id: int. id клиента.
+        """
+        timeline = cls(client_id=client_id)
+        for unix_time, online in zip(txns_df.unix_time.tolist(), txns_df.online.tolist()):
+            timeline.add(unix_time=unix_time, online=online)
+        return timeline
+
+
+    def __len__(self):
+        return len(self.offline_unix) + len(self.online_unix)
+
+
+    def add(self, unix_time, online):
+        """
+        Добавить транзакцию в хронологию.
+        При равном времени последней остается транзакция добавленная раньше.
+        ---------------
+        unix_time: int. Unix время транзакции в секундах.
+        online: bool. Онлайн флаг транзакции.
+        """
+        unix_time = int(unix_time)
+        insort(self.online_unix if online else self.offline_unix, unix_time)
+
+        if self.last_unix is None or unix_time > self.last_unix:
+            self.last_unix = unix_time
+            self.last_online = bool(online)
+
+
+    @staticmethod
+    def nearest(sorted_unix, unix_time):
+        """
+        Ближайшее по модулю разницы значение в отсортированном списке.
+        Вернет None если список пустой.
+        ---------------
+        sorted_unix: list. Отсортированное unix время.
+        unix_time: int. Unix время для которого ищется ближайшее.
+        """
+        pos = bisect_left(sorted_unix, unix_time)
+        candidates = sorted_unix[max(pos - 1, 0):pos + 1]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda x: abs(x - unix_time))
+
+
+    def closest(self, unix_time, online):
+        """
+        Unix время ближайшей оффлайн или онлайн транзакции.
+        Вернет None если транзакций такого типа нет.
+        ---------------
+        unix_time: int. Unix время для которого ищется ближайшая транзакция.
+        online: bool. Искать среди онлайн или оффлайн транзакций.
+        """
+        sorted_unix = self.online_unix if online else self.offline_unix
+        return self.nearest(sorted_unix=sorted_unix, unix_time=unix_time)
@@ -4,10 +4,12 @@ import geopandas as gpd
 from shapely.geometry import Point
 import numpy as np
 from scipy.stats import truncnorm
-from pyproj import Geod
 from tqdm import tqdm
 import yaml
 
+from data_generator.rng import get_rng, BufferedRng
+from data_generator.distance import default_distance
+
 # 1. 
 # функция генерации случайных точек в указанной зоне
 # это не сам полигон города, а четырехугольник из крайних точек полигона города
@@ -42,15 +44,16 @@ def gen_trans_coordinates(polygon, number):
 
 # 3.
 
-def build_transaction(client_id, txn_time, txn_unix, amount, txn_type, channel, category_name, online, merchant_id, \
+def build_transaction(client_id, txn_unix, amount, txn_type, channel, category_name, online, merchant_id, \
                       trans_city, trans_lat, trans_lon, trans_ip, device_id, account, is_fraud, is_suspicious, \
                       status, rule):
     """
-    Собирает словарь с данными транзакции
+    Собирает словарь с данными транзакции.
+    Без txn_time - эта колонка создается из unix_time при записи транзакций в файл
     """
 
     txn_dict = {
-                "client_id": client_id, "txn_time": txn_time, "unix_time":txn_unix, "amount": amount, "type": txn_type,
+                "client_id": client_id, "unix_time":txn_unix, "amount": amount, "type": txn_type,
                 "channel": channel, "category": category_name, "online": online, "merchant_id": merchant_id,
                 "trans_city":trans_city, "trans_lat": trans_lat, "trans_lon": trans_lon, "trans_ip":trans_ip,
                 "device_id": device_id, "account": account, "is_fraud": is_fraud, "is_suspicious":is_suspicious, "status":status,
@@ -62,7 +65,7 @@ def build_transaction(client_id, txn_time, txn_unix, amount, txn_type, channel,
 
 # 4. 
 
-def gen_trans_number_norm(avg_num, num_std, low_bound=1, up_bound=120):
+def gen_trans_number_norm(avg_num, num_std, low_bound=1, up_bound=120, rng=None):
     """
     Возвращает целое число по нормальному распределению.
     Число ограничено выставленными лимитами.
@@ -71,11 +74,16 @@ def gen_trans_number_norm(avg_num, num_std, low_bound=1, up_bound=120):
     num_std - стандартное отклонение числа транзакций
     low_bound - минимальное возможное число транзакций
     up_bound - максимальное возможное число транзакций
+    rng - np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию
     """
     
+    # Одно значение из таблицы обратной функции распределения если генератор буферизованный
+    if isinstance(rng, BufferedRng):
+        return int(rng.truncnorm(low_bound=low_bound, high_bound=up_bound, mean=avg_num, std=num_std))
+
     # Вернет float в виде np.ndarray
     random_float = truncnorm.rvs(a=(low_bound - avg_num) / num_std, b=(up_bound - avg_num) / num_std, \
-                                 loc=avg_num, scale=num_std, size=1)
+                                 loc=avg_num, scale=num_std, size=1, random_state=get_rng(rng))
 
     # Преобразуем float в int и извлекаем из массива
     return random_float.astype(int)[0]
@@ -83,7 +91,7 @@ def gen_trans_number_norm(avg_num, num_std, low_bound=1, up_bound=120):
 
 # 5. 
 
-def get_values_from_truncnorm(low_bound, high_bound, mean, std, size=1):
+def get_values_from_truncnorm(low_bound, high_bound, mean, std, size=1, rng=None):
     """
     Сгенерировать массив чисел из обрезанного нормального распределения.
     Можно сгенерировать массив с одним числом
@@ -93,10 +101,16 @@ def get_values_from_truncnorm(low_bound, high_bound, mean, std, size=1):
     mean - float, int. Среднее
     std - float, int. Стандартное отклонение
     size - Количество чисел в возвращаемом массиве
+    rng - np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию
     ------------
     Возвращает np.ndarray
     """
-    return truncnorm.rvs((low_bound - mean) / std, (high_bound - mean) / std, loc=mean, scale=std, size=size)
+    # Одно значение из таблицы обратной функции распределения если генератор буферизованный
+    if size == 1 and isinstance(rng, BufferedRng):
+        return np.array([rng.truncnorm(low_bound=low_bound, high_bound=high_bound, mean=mean, std=std)])
+
+    return truncnorm.rvs((low_bound - mean) / std, (high_bound - mean) / std, loc=mean, scale=std, size=size, \
+                         random_state=get_rng(rng))
 
 # 6.
 
@@ -105,58 +119,55 @@ def calc_distance(lat_01, lon_01, lat_02, lon_02, km=True):
     Считает растояние между двумя координатами на Земном шаре.
     Между координатами последней по времени транзакции и переданными координатами.
     -----------------------------
-    lat_01 - float. Широта первой точки
-    lon_01 - float. Долгота первой точки
-    lat_02 - float. Широта второй точки
-    lon_02 - float. Долгота второй точки
+    lat_01 - float | np.ndarray. Широта первой точки
+    lon_01 - float | np.ndarray. Долгота первой точки
+    lat_02 - float | np.ndarray. Широта второй точки
+    lon_02 - float | np.ndarray. Долгота второй точки
     km - bool. Единицы измерения. Либо километры либо метры. Километры округляет до 2-х знаков, метры до целого.
     """
-    
-    # Геодезический расчёт по эллипсоиду WGS84
-    geod = Geod(ellps="WGS84")
-    # [-1] берет последний элемент из кортежа. Это метры
-    distance_m = geod.inv(lon_01, lat_01, lon_02, lat_02)[-1]
-
-    if km:
-        return round(distance_m / 1000, 2)
-
-    return round(distance_m)
+    # Геодезический расчёт по эллипсоиду WGS84 через общий объект Geod
+    return default_distance.distance(lat_01=lat_01, lon_01=lon_01, lat_02=lat_02, lon_02=lon_02, km=km)
 
 
 # 7. Функция sample_category. На данный момент предназначена только для фрода
 
-def sample_category(categories, online=None, is_fraud=None, rule=None):
+def sample_category(categories, samplers, online=None, is_fraud=None, rule=None, rng=None):
     """
     На данный момент предназначена только для фрода
     -----------------------------------
     categories - pd.DataFrame с категориями и их характеристиками
+    samplers - SamplerRegistry. Alias таблицы категорий по fraud_share. Ключи 'fraud_online',
+               'fraud_freq', 'fraud_offline'. Значения - позиции категорий в categories.
     online - bool. Онлайн или оффлайн категория нужна
     is_fraud - bool. Фрод или не фрод. От этого зависит вероятность категории.
+    rng - np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию
+    -----------------------------------
+    Возвращает pd.DataFrame с одной записью категории
     """
+    rng = get_rng(rng)
 
     if is_fraud and online and rule != "trans_freq_increase":
-        online_categories = categories.loc[categories.online == True]
-        cat_sample = online_categories.sample(1, weights=online_categories.fraud_share)
-        return cat_sample
+        key = "fraud_online"
 
     elif is_fraud and online and rule == "trans_freq_increase":
-        chosen_categories = categories.loc[categories.category.isin(["shopping_net", "misc_net"])]
-        cat_sample = chosen_categories.sample(1, weights=chosen_categories.fraud_share)
-        return cat_sample
-
+        key = "fraud_freq"
         
     elif is_fraud and not online:
-        offline_categories = categories.loc[categories.online == False]
-        cat_sample = offline_categories.sample(1, weights=offline_categories.fraud_share)
-        return cat_sample
+        key = "fraud_offline"
+
+    else:
+        return None
+
+    return categories.iloc[[samplers.draw(key=key, rng=rng)]]
 
 
 # 8. Функция семплирования антифрод-правила
-def sample_rule(rules):
+def sample_rule(samplers, rng=None):
     """
-    rules - pd.DataFrame с названиями правил и их весами
+    samplers - SamplerRegistry. Alias таблица 'rules': названия правил по их весам
+    rng - np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию
     """
-    return rules.rule.sample(1, weights=rules.weight).iat[0]
+    return samplers.draw(key="rules", rng=rng)
 
 
 # 9.Функция создания пустого датафрейма под транзакции
@@ -186,7 +197,7 @@ def create_progress_bar(obj, text=None):
 
 
 # 11. Случайное округление суммы
-def amt_rounding(amount, rate=0.6):
+def amt_rounding(amount, rate=0.6, rng=None):
     """
     Целочисленное округление.
     До единиц, десятков, сотен, тысяч.
@@ -194,13 +205,15 @@ def amt_rounding(amount, rate=0.6):
     -------------
     amount: float | int.
     rate: float. Доля случаев когда сумма не округялется.
+    rng: np.random.Generator. Генератор случайных чисел. None - генератор по умолчанию.
     """
-    if np.random.uniform(0, 1) < rate:
+    rng = get_rng(rng)
+    if rng.uniform(0, 1) < rate:
         return amount
     
     dividers = np.array([1, 10, 100, 1000])
     reduced_divs = dividers[dividers <= amount]
-    divider = np.random.choice(reduced_divs)
+    divider = rng.choice(reduced_divs)
     return amount // divider * divider
 
 
@@ -1,6 +1,7 @@
 from scipy.stats import truncnorm, norm
 import numpy as np
-import pandas as pd
+
+from data_generator.parquet_meta import parquet_num_rows
 
 class ConfigsValidator:
     """
@@ -38,8 +39,8 @@ class ConfigsValidator:
         
         data_paths = self.base_cfg["data_paths"]
         path = data_paths["clients"]["clients"] # путь к файлу со всеми клиентами
-        clients = pd.read_parquet(path)
-        self.total_clients = clients.shape[0]
+        # Кол-во строк из метаданных parquet файла, без чтения данных
+        self.total_clients = parquet_num_rows(path=path)
         return self.total_clients
 
 